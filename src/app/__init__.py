@@ -1,8 +1,30 @@
-"""Application package for Little Tree Wallpaper Next."""
+"""Application package for Little Tree Wallpaper Next.
 
-from .application import Application
-from .logging_config import setup_logging
+Importing the package is cheap on purpose: worker processes of
+:mod:`app.process_pool` import it when unpickling jobs, so the UI stack and
+the logging setup are only loaded on first use (``main.py`` calls
+:func:`setup_logging`).
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .application import Application
+    from .logging_config import setup_logging
+
+
+def __getattr__(name: str) -> Any:
+    if name == "Application":
+        from .application import Application
+
+        return Application
+    if name == "setup_logging":
+        from .logging_config import setup_logging
+
+        return setup_logging
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-setup_logging()
 
 __all__ = ["Application", "setup_logging"]
@@ -10,13 +10,14 @@ import os
 import random
 import re
 import time
-from collections.abc import Iterator, Sequence
+from collections import deque
+from collections.abc import Awaitable, Callable, Iterator, Sequence
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
 from pathlib import Path
 from threading import RLock
-from typing import Any
+from typing import Any, TypeVar
 from urllib.parse import parse_qsl, quote, quote_plus
 
 import aiohttp
@@ -24,6 +25,9 @@ from loguru import logger
 
 import ltwapi
 from app.favorites import FavoriteItem, FavoriteManager
+from app.image_features import ImageFeatures
+from app.image_hash import DEFAULT_MAX_DISTANCE, ImageHashes
+from app.image_metadata import image_metadata_index
 from app.paths import CACHE_DIR, DATA_DIR
 from app.settings import SettingsStore
 from app.wallpaper_sources import (
@@ -57,6 +61,16 @@ UNIT_SECONDS: dict[str, int] = {
     "hours": 3600,
 }
 
+# 去重过滤：与最近这么多张已应用壁纸比较感知哈希
+_DEDUP_HISTORY_SIZE = 32
+
+_T = TypeVar("_T")
+
+# 外观筛选 brightness="auto" 时视为夜间（使用暗色壁纸）的时段
+_NIGHT_START_HOUR = 19
+_NIGHT_END_HOUR = 7
+_DEFAULT_COLOR_DISTANCE = 80.0
+
 IMAGE_EXTENSIONS = {".bmp", ".gif", ".jpg", ".jpeg", ".png", ".webp", ".heic", ".heif"}
 
 ORDER_RANDOM = "random"
@@ -85,6 +99,53 @@ def _normalize_slideshow_order(value: str | None) -> str:
     return ORDER_SEQUENTIAL
 
 
+def _appearance_filter(config: dict[str, Any]) -> dict[str, Any] | None:
+    """把条目的 ``appearance`` 配置转换为 ``FavoriteManager.find_by_appearance`` 参数。
+
+    ``brightness`` 可为 ``dark`` / ``light`` / ``auto``（夜间选暗色，白天不限）。
+    """
+    raw = config.get("appearance")
+    if not isinstance(raw, dict):
+        return None
+    result: dict[str, Any] = {}
+    brightness = str(raw.get("brightness") or "").strip().lower()
+    if brightness == "auto":
+        hour = datetime.now().hour
+        if hour >= _NIGHT_START_HOUR or hour < _NIGHT_END_HOUR:
+            result["brightness"] = "dark"
+    elif brightness in {"dark", "light"}:
+        result["brightness"] = brightness
+    color = str(raw.get("color") or "").strip()
+    if color:
+        result["color"] = color
+        try:
+            result["max_color_distance"] = float(
+                raw.get("max_color_distance") or _DEFAULT_COLOR_DISTANCE,
+            )
+        except (TypeError, ValueError):
+            result["max_color_distance"] = _DEFAULT_COLOR_DISTANCE
+    return result or None
+
+
+def _features_match(features: ImageFeatures | None, appearance: dict[str, Any]) -> bool:
+    if features is None:
+        return False
+    brightness = appearance.get("brightness")
+    if brightness == "dark" and not features.is_dark:
+        return False
+    if brightness == "light" and not features.is_light:
+        return False
+    color = appearance.get("color")
+    if color:
+        try:
+            distance = features.color_distance(color)
+        except ValueError:
+            return True
+        if distance > appearance.get("max_color_distance", _DEFAULT_COLOR_DISTANCE):
+            return False
+    return True
+
+
 def _entry_identity(entry: AutoChangeListEntry, index: int) -> str:
     return entry.id or f"{entry.type}:{index}"
 
@@ -453,6 +514,7 @@ class AutoChangeService:
         self._slideshow_snapshot: list[str] = []
         self._list_order_state: dict[tuple[str, ...], dict[str, Any]] = {}
         self._im_executor = _IntelliMarketsExecutor()
+        self._recent_hashes: deque[ImageHashes] = deque(maxlen=_DEDUP_HISTORY_SIZE)
 
     async def ensure_running(self) -> None:
         if self._task is not None and not self._task.done():
@@ -773,7 +835,7 @@ class AutoChangeService:
             result = await self._apply_spotlight()
         elif entry_type == "favorite_folder":
             folder_id = config.get("folder_id")
-            result = await self._apply_favorite(folder_id)
+            result = await self._apply_favorite(folder_id, _appearance_filter(config))
         elif entry_type == "wallpaper_source":
             category_id = config.get("category_id")
             params = config.get("params") or {}
@@ -793,9 +855,17 @@ class AutoChangeService:
                 folder = Path(path)
                 if folder.exists() and folder.is_dir():
                     candidates = [p for p in folder.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS]
-                    if candidates:
-                        target = random.choice(candidates)
-                        result = await self._set_wallpaper_path(target)
+                    appearance = _appearance_filter(config)
+                    if appearance and candidates:
+                        features = await asyncio.to_thread(image_metadata_index.features_many, candidates)
+                        candidates = [
+                            p
+                            for p in candidates
+                            if _features_match(features.get(os.path.abspath(p)), appearance)
+                        ]
+                        logger.debug("外观筛选后剩余 {} 张图片：{}", len(candidates), appearance)
+                    random.shuffle(candidates)
+                    result = await self._apply_candidates(candidates, self._resolve_existing_path)
         if result:
             logger.info("自动更换条目成功：type={} id={}", entry_type, entry.id)
         else:
@@ -822,16 +892,25 @@ class AutoChangeService:
         item = random.choice(choices)
         return await self._download_and_apply(item.get("url"), prefix="spotlight")
 
-    async def _apply_favorite(self, folder_id: str | None) -> bool:
+    async def _apply_favorite(
+        self,
+        folder_id: str | None,
+        appearance: dict[str, Any] | None = None,
+    ) -> bool:
         items = await asyncio.to_thread(self._favorite_manager.list_items, folder_id)
+        if items and appearance:
+            await asyncio.to_thread(
+                self._favorite_manager.compute_image_features,
+                [item.id for item in items],
+            )
+            items = await asyncio.to_thread(
+                lambda: self._favorite_manager.find_by_appearance(folder_id, **appearance),
+            )
+            logger.debug("外观筛选后剩余 {} 项收藏：{}", len(items), appearance)
         if not items:
             return False
         random.shuffle(items)
-        for item in items:
-            path = await self._resolve_favorite_path(item)
-            if path is not None and await self._set_wallpaper_path(path):
-                return True
-        return False
+        return await self._apply_candidates(items, self._resolve_favorite_path)
 
     async def _apply_wallpaper_source(self, category_id: str | None, params: dict[str, Any]) -> bool:
         if not category_id:
@@ -845,11 +924,11 @@ class AutoChangeService:
             logger.error("壁纸源不可用: {error}", error=str(exc))
             return False
         random.shuffle(items)
-        for item in items:
-            local_path = item.local_path
-            if local_path and await self._set_wallpaper_path(local_path):
-                return True
-        return False
+
+        async def _resolve(item: Any) -> Path | None:
+            return Path(item.local_path) if item.local_path else None
+
+        return await self._apply_candidates(items, _resolve)
 
     async def _apply_intellimarkets(self, source: dict[str, Any] | None, params: list[dict[str, Any]]) -> bool:
         if not source:
@@ -860,10 +939,7 @@ class AutoChangeService:
             logger.error("IntelliMarkets 源执行失败: {error}", error=str(exc))
             return False
         random.shuffle(paths)
-        for path in paths:
-            if await self._set_wallpaper_path(path):
-                return True
-        return False
+        return await self._apply_candidates(paths, self._resolve_existing_path)
 
     async def _apply_ai(self, config: dict[str, Any]) -> bool:
         provider = str(config.get("provider") or "pollinations")
@@ -922,10 +998,66 @@ class AutoChangeService:
         try:
             logger.debug("开始设置壁纸：{}", path)
             await asyncio.to_thread(ltwapi.set_wallpaper, str(path))
-            return True
         except Exception as exc:  # pragma: no cover - platform dependent
             logger.error("设置壁纸失败: {error}", error=str(exc))
             return False
+        if self._dedup_settings()[0]:
+            hashes = await asyncio.to_thread(image_metadata_index.hashes, path)
+            if hashes is not None:
+                self._recent_hashes.append(hashes)
+        return True
+
+    def _dedup_settings(self) -> tuple[bool, int]:
+        enabled = bool(self._settings_store.get("wallpaper.auto_change.dedup.enabled", True))
+        try:
+            max_distance = int(
+                self._settings_store.get(
+                    "wallpaper.auto_change.dedup.max_distance",
+                    DEFAULT_MAX_DISTANCE,
+                ),
+            )
+        except (TypeError, ValueError):
+            max_distance = DEFAULT_MAX_DISTANCE
+        return enabled, max(0, max_distance)
+
+    async def _is_recent_duplicate(self, path: Path) -> bool:
+        enabled, max_distance = self._dedup_settings()
+        if not enabled or not self._recent_hashes:
+            return False
+        hashes = await asyncio.to_thread(image_metadata_index.hashes, path)
+        if hashes is None:
+            return False
+        return any(recent.is_similar(hashes, max_distance) for recent in self._recent_hashes)
+
+    @staticmethod
+    async def _resolve_existing_path(path: Path) -> Path | None:
+        return path
+
+    async def _apply_candidates(
+        self,
+        candidates: Sequence[_T],
+        resolve: Callable[[_T], Awaitable[Path | None]],
+    ) -> bool:
+        """依次尝试候选，跳过与最近壁纸近似重复的图片。
+
+        所有候选都是近期壁纸的重复时，退回按原顺序应用被跳过的候选，
+        保证更换仍能完成。
+        """
+        skipped: list[Path] = []
+        for candidate in candidates:
+            path = await resolve(candidate)
+            if path is None:
+                continue
+            if await self._is_recent_duplicate(path):
+                logger.debug("跳过与近期壁纸重复的候选：{}", path)
+                skipped.append(path)
+                continue
+            if await self._set_wallpaper_path(path):
+                return True
+        for path in skipped:
+            if await self._set_wallpaper_path(path):
+                return True
+        return False
 
     async def _resolve_favorite_path(self, item: FavoriteItem) -> Path | None:
         candidates: list[str] = []
@@ -1179,6 +1311,8 @@ class _IntelliMarketsExecutor:
         if image_cfg.get("is_list"):
             values = _flatten_sequence_values(values)
         results: list[Path] = []
+        pending_urls: list[str] = []
+        pending_names: list[str] = []
         for idx, raw in enumerate(values):
             if raw in (None, ""):
                 continue
@@ -1201,18 +1335,21 @@ class _IntelliMarketsExecutor:
                 )
                 results.append(path)
                 continue
-            download = await asyncio.to_thread(
-                ltwapi.download_file,
-                str(url),
+            pending_urls.append(str(url))
+            pending_names.append(f"im-{timestamp}-{idx}")
+        if pending_urls:
+            downloads = await asyncio.to_thread(
+                ltwapi.download_files,
+                pending_urls,
                 str(storage_dir),
-                f"im-{timestamp}-{idx}",
+                pending_names,
                 120,
                 2,
                 {"Accept": "image/*"},
-                None,
-                False,
             )
-            if download:
+            for download in downloads:
+                if not download:
+                    continue
                 candidate = Path(download)
                 if candidate.exists():
                     results.append(candidate)
@@ -0,0 +1,114 @@
+"""内容寻址存储 - 以 SHA-256 为键保存文件，相同内容只落盘一次。"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+from loguru import logger
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path: Path) -> tuple[str, int]:
+    """流式计算文件的 SHA-256，返回 ``(hexdigest, size)``。"""
+    hasher = hashlib.sha256()
+    size = 0
+    with path.open("rb") as fp:
+        while chunk := fp.read(_CHUNK_SIZE):
+            hasher.update(chunk)
+            size += len(chunk)
+    return hasher.hexdigest(), size
+
+
+class ContentStore:
+    """按内容哈希保存 blob，并通过硬链接把 blob 暴露到任意目标路径。
+
+    blob 位于 ``root/<前两位>/<digest>``。目标文件优先以硬链接指向 blob，
+    文件系统不支持硬链接时退化为复制。引用计数由调用方维护（例如收藏的
+    校验和索引），当某个 digest 不再被引用时调用 :meth:`remove`。
+    """
+
+    def __init__(self, root: Path) -> None:
+        self._root = root
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    def blob_path(self, digest: str) -> Path:
+        return self._root / digest[:2] / digest
+
+    def contains(self, digest: str) -> bool:
+        return self.blob_path(digest).is_file()
+
+    def temp_path(self) -> Path:
+        """返回存储目录内的临时文件路径，写完后可通过 :meth:`adopt` 入库。"""
+        tmp_dir = self._root / ".tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        return tmp_dir / f"{uuid.uuid4().hex}.part"
+
+    def adopt(self, temp_file: Path, digest: str) -> Path:
+        """把已写完、已知哈希的临时文件移入存储；内容已存在时丢弃临时文件。"""
+        blob = self.blob_path(digest)
+        if blob.is_file():
+            temp_file.unlink(missing_ok=True)
+            return blob
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(temp_file, blob)
+        return blob
+
+    def add_file(self, source: Path, digest: str | None = None) -> tuple[str, int, Path]:
+        """先哈希再入库：相同内容已存在时不再复制。返回 ``(digest, size, blob)``。"""
+        if digest is None:
+            digest, size = hash_file(source)
+        else:
+            size = source.stat().st_size
+        blob = self.blob_path(digest)
+        if blob.is_file():
+            return digest, size, blob
+        temp_file = self.temp_path()
+        try:
+            shutil.copyfile(source, temp_file)
+            blob = self.adopt(temp_file, digest)
+        finally:
+            temp_file.unlink(missing_ok=True)
+        return digest, size, blob
+
+    def materialize(self, digest: str, destination: Path) -> Path:
+        """让 ``destination`` 指向 blob 内容（硬链接，失败时复制）。"""
+        blob = self.blob_path(digest)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        if destination.exists():
+            try:
+                if os.path.samefile(blob, destination):
+                    return destination
+            except OSError:
+                pass
+            destination.unlink()
+        try:
+            os.link(blob, destination)
+        except OSError:
+            shutil.copy2(blob, destination)
+        return destination
+
+    def remove(self, digest: str) -> bool:
+        blob = self.blob_path(digest)
+        try:
+            blob.unlink()
+        except FileNotFoundError:
+            return False
+        except OSError as exc:
+            logger.warning("删除内容存储 blob 失败 {digest}: {error}", digest=digest, error=str(exc))
+            return False
+        try:
+            blob.parent.rmdir()
+        except OSError:
+            pass
+        return True
+
+
+__all__ = ["ContentStore", "hash_file"]
@@ -83,14 +83,12 @@ import asyncio
 import base64
 import copy
 import hashlib
-import io
 import json
 import mimetypes
 import os
 import random
 import re
 import shutil
-import tarfile
 import time
 import uuid
 from collections.abc import Callable, Sequence
@@ -126,15 +124,24 @@ from app.constants import (
     ZHAOYU_API_URL,
 )
 from app.update import InstallerUpdateService, UpdateChecker, UpdateInfo, UpdateChannel
-from app.download_manager import DownloadLocationType, download_manager
+from app.download_manager import DownloadLocationType, DownloadStats, download_manager
 from app.favorites import (
     FavoriteFolder,
     FavoriteItem,
+    FavoriteLocalizationProgress,
     FavoriteManager,
     FavoriteSource,
 )
 from app.first_run import update_marker
-from app.image_optimizer import image_optimizer
+from app.im_catalog import (
+    ChunkStreamReader,
+    IntelliMarketsCatalog,
+    iter_tarball_entries,
+)
+from app.image_features import parse_color
+from app.image_metadata import image_metadata_index
+from app.image_optimizer import OptimizationProfile, available_formats, image_optimizer
+from app.mirrors import mirror_selector
 from app.paths import CACHE_DIR, DATA_DIR, LICENSE_PATH, PLUGINS_DIR
 from app.plugins import (
     KNOWN_PERMISSIONS,
@@ -151,6 +158,7 @@ from app.plugins import (
     PluginStatus,
 )
 from app.plugins.events import EventDefinition, PluginEventBus
+from app.search_index import SearchIndex
 from app.settings import SettingsStore
 from app.sniff import (
     DEFAULT_SNIFF_REFERER_TEMPLATE,
@@ -185,6 +193,10 @@ from app.store.ui import StoreUI
 app_config = SettingsStore()
 
 _WS_DEFAULT_KEY = "__default__"
+_SEARCH_DEBOUNCE_SECONDS = 0.2
+# 收藏网格每次加载的卡片数量，以及距底部多少像素时预加载下一页
+_FAVORITE_PAGE_SIZE = 48
+_FAVORITE_PRELOAD_PIXELS = 600
 
 
 @dataclass
@@ -327,7 +339,14 @@ class Pages:
 
         self._ensure_global_namespaces()
 
-        self._favorite_manager = FavoriteManager()
+        self._favorite_manager = FavoriteManager(
+            backend=str(app_config.get("storage.favorites_backend", "sqlite") or "sqlite"),
+        )
+        self._favorite_manager.add_classification_listener(
+            self._on_favorite_classification_batch,
+        )
+        # 分类队列直接在应用事件循环上调度，同步分类器由管理器转入线程执行
+        self._favorite_manager.bind_event_loop(getattr(page, "loop", None))
         self._favorite_tabs: ft.Tabs | None = None
         self._favorite_selected_folder: str = "__all__"
         self._favorite_folder_dropdown: ft.Dropdown | None = None
@@ -335,6 +354,7 @@ class Pages:
         self._favorite_edit_folder_button: ft.IconButton | None = None
         self._favorite_delete_folder_button: ft.IconButton | None = None
         self._favorite_localize_button: ft.IconButton | None = None
+        self._favorite_dedup_button: ft.IconButton | None = None
         self._favorite_export_button: ft.IconButton | None = None
         self._favorite_import_button: ft.IconButton | None = None
         self._favorite_localization_status_text: ft.Text | None = None
@@ -464,8 +484,12 @@ class Pages:
         self._sniff_settings_timeout_field: ft.TextField | None = None
         self._sniff_settings_use_source_referer_switch: ft.Switch | None = None
 
+        self._debounce_tokens: dict[str, object] = {}
+
         # IntelliMarkets source marketplace state
         self._im_sources_by_category: dict[str, list[dict[str, Any]]] = {}
+        self._im_all_sources: list[dict[str, Any]] = []
+        self._im_search_index: SearchIndex[str] | None = None
         self._im_all_category_key: str = "__all__"
         self._im_all_category_label: str = "全部"
         self._im_total_sources: int = 0
@@ -483,6 +507,7 @@ class Pages:
         self._im_repo_owner = "IntelliMarkets"
         self._im_repo_name = "Wallpaper_API_Index"
         self._im_repo_branch = "main"
+        self._im_catalog = IntelliMarketsCatalog()
         self._im_mirror_pref_dropdown: ft.Dropdown | None = None
         self._im_source_dialog: ft.AlertDialog | None = None
         self._im_active_source: dict[str, Any] | None = None
@@ -623,6 +648,7 @@ class Pages:
         self.page.run_task(self._load_spotlight_wallpaper)
         self.page.run_task(self._load_im_sources)
         self.page.run_task(self._auto_check_updates_on_launch)
+        self.page.run_task(self._recover_image_optimization)
 
     # 模型列表加载已移除
 
@@ -2507,7 +2533,7 @@ class Pages:
             folder_id = config.get("folder_id")
             folder = self._favorite_manager.get_folder(folder_id) if folder_id else None
             name = folder.name if folder else "未知收藏夹"
-            return f"收藏夹：{name}"
+            return f"收藏夹：{name}{self._auto_appearance_suffix(config)}"
         if entry_type == "wallpaper_source":
             category_id = config.get("category_id")
             ref = (
@@ -2538,9 +2564,18 @@ class Pages:
             return f"图片：{path or '未选择'}"
         if entry_type == "local_folder":
             path = config.get("path") or ""
-            return f"文件夹：{path or '未选择'}"
+            return f"文件夹：{path or '未选择'}{self._auto_appearance_suffix(config)}"
         return entry_type or "未知条目"
 
+    @staticmethod
+    def _auto_appearance_suffix(config: dict[str, Any]) -> str:
+        appearance = config.get("appearance") or {}
+        labels = {"dark": "暗色", "light": "亮色", "auto": "夜间暗色"}
+        parts = [labels[b] for b in [appearance.get("brightness")] if b in labels]
+        if appearance.get("color"):
+            parts.append(f"主色 {appearance['color']}")
+        return f"（{' · '.join(parts)}）" if parts else ""
+
     def _auto_editor_add_entry_type(
         self,
         entry_type: str,
@@ -2600,12 +2635,50 @@ class Pages:
                     params[control.option.key] = value
             return {"category_id": category_id, "params": params}
 
+        def _add_appearance_controls() -> None:
+            appearance = config.get("appearance") or {}
+            brightness_dropdown = ft.Dropdown(
+                label="亮度筛选",
+                options=[
+                    ft.dropdown.Option(key="", text="不限"),
+                    ft.dropdown.Option(key="dark", text="暗色"),
+                    ft.dropdown.Option(key="light", text="亮色"),
+                    ft.dropdown.Option(key="auto", text="自动（夜间使用暗色）"),
+                ],
+                value=str(appearance.get("brightness") or ""),
+                dense=True,
+            )
+            color_field = ft.TextField(
+                label="主色筛选（可选）",
+                hint_text="#RRGGBB",
+                value=str(appearance.get("color") or ""),
+                dense=True,
+            )
+            collected_controls["appearance_brightness"] = brightness_dropdown
+            collected_controls["appearance_color"] = color_field
+            controls.extend([brightness_dropdown, color_field])
+
+        def _collect_appearance() -> dict[str, Any]:
+            brightness_dropdown: ft.Dropdown = collected_controls["appearance_brightness"]
+            color_field: ft.TextField = collected_controls["appearance_color"]
+            appearance: dict[str, Any] = {}
+            if brightness_dropdown.value:
+                appearance["brightness"] = brightness_dropdown.value
+            color = (color_field.value or "").strip()
+            if color:
+                try:
+                    parse_color(color)
+                except ValueError:
+                    raise ValueError("请输入合法的颜色，例如 #1E88E5。")
+                appearance["color"] = color
+            return {"appearance": appearance} if appearance else {}
+
         def _collect_favorite_folder() -> dict[str, Any]:
             dropdown: ft.Dropdown = collected_controls["dropdown"]
             folder_id = dropdown.value
             if not folder_id:
                 raise ValueError("请选择一个收藏夹。")
-            return {"folder_id": folder_id}
+            return {"folder_id": folder_id, **_collect_appearance()}
 
         def _collect_im_source() -> dict[str, Any]:
             dropdown: ft.Dropdown = collected_controls["dropdown"]
@@ -2615,6 +2688,7 @@ class Pages:
             source = collected_controls.get("source_map", {}).get(source_key)
             if not source:
                 raise ValueError("未找到该 IM 图片源。")
+            source = self._im_source_with_details(source)
             param_controls: list[_IMParameterControl] = collected_controls.get(
                 "params",
                 [],
@@ -2722,6 +2796,7 @@ class Pages:
                 dropdown.value = options[0].key
             collected_controls["dropdown"] = dropdown
             controls.append(dropdown)
+            _add_appearance_controls()
             collect_fn = _collect_favorite_folder
         elif normalized_type == "wallpaper_source":
             refs = self._auto_collect_wallpaper_categories()
@@ -2857,6 +2932,9 @@ class Pages:
                     )
                 else:
                     source = source_map.get(source_key)
+                    if source is not None:
+                        source = self._im_source_with_details(source)
+                        source_map[source_key] = source
                     if source is None:
                         params_column.controls.append(
                             ft.Text("未找到该图片源。", size=12, color=ft.Colors.RED),
@@ -2978,9 +3056,13 @@ class Pages:
             )
             collected_controls["path"] = path_field
             controls.append(path_field)
+            _add_appearance_controls()
 
             def _collect_local_folder() -> dict[str, Any]:
-                return _collect_local_path("path", "请选择图片文件夹。")
+                return {
+                    **_collect_local_path("path", "请选择图片文件夹。"),
+                    **_collect_appearance(),
+                }
 
             collect_fn = _collect_local_folder
         else:
@@ -4593,8 +4675,14 @@ class Pages:
             payload.update(self._spotlight_event_payload())
         if extra:
             payload.update(extra)
+        self._record_downloaded_file(file_path)
         self._emit_resource_event("resource.download.completed", payload)
 
+    def _record_downloaded_file(self, file_path: str | Path) -> None:
+        """应用写入文件后在工作线程中更新下载统计，并在后台登记图片元数据。"""
+        self.page.run_task(asyncio.to_thread, download_manager.record_download, file_path)
+        image_metadata_index.request([file_path])
+
     def _bing_event_payload(self) -> dict[str, Any]:
         payload = self._bing_payload_data()
         payload["data_id"] = self._bing_data_id
@@ -6453,21 +6541,14 @@ class Pages:
             visible=False,
         )
 
-        # 下载统计信息
-        stats = download_manager.get_download_stats(app_config)
-        used_space_text = download_manager.format_file_size(stats.total_size)
-        file_count_text = f"{stats.total_files} 个文件"
-        last_download_text = (
-            "从未下载"
-            if not stats.last_download_time
-            else f"最后下载: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stats.last_download_time))}"
-        )
-
+        # 下载统计信息：先显示索引中的缓存值，再在后台与磁盘对账
+        stats = download_manager.peek_download_stats(app_config)
         self._download_stats_text = ft.Text(
-            f"已用空间: {used_space_text} | {file_count_text} | {last_download_text}",
+            self._format_download_stats(stats) if stats else "正在统计下载文件夹…",
             size=12,
             color=ft.Colors.GREY,
         )
+        self.page.run_task(self._refresh_download_stats, False)
 
         # 按钮组
         open_folder_button = ft.FilledTonalButton(
@@ -6790,9 +6871,8 @@ class Pages:
         else:
             self._show_snackbar("打开下载文件夹失败", error=True)
 
-    def _handle_refresh_download_stats(self, e: ft.ControlEvent):
-        """处理刷新下载统计"""
-        stats = download_manager.get_download_stats(app_config)
+    @staticmethod
+    def _format_download_stats(stats: DownloadStats) -> str:
         used_space_text = download_manager.format_file_size(stats.total_size)
         file_count_text = f"{stats.total_files} 个文件"
         last_download_text = (
@@ -6800,19 +6880,53 @@ class Pages:
             if not stats.last_download_time
             else f"最后下载: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stats.last_download_time))}"
         )
+        return f"已用空间: {used_space_text} | {file_count_text} | {last_download_text}"
+
+    def _handle_refresh_download_stats(self, e: ft.ControlEvent | None):
+        """处理刷新下载统计"""
+        self.page.run_task(self._refresh_download_stats, True)
+
+    async def _refresh_download_stats(self, notify: bool = True) -> None:
+        """在工作线程中与磁盘对账并刷新下载统计文本。"""
+        try:
+            stats = await asyncio.to_thread(download_manager.get_download_stats, app_config)
+        except Exception as exc:
+            logger.error(f"刷新下载统计失败: {exc}")
+            return
 
-        if hasattr(self, "_download_stats_text"):
-            self._download_stats_text.value = f"已用空间: {used_space_text} | {file_count_text} | {last_download_text}"
-            self._download_stats_text.update()
+        text = getattr(self, "_download_stats_text", None)
+        if text is not None:
+            text.value = self._format_download_stats(stats)
+            if text.page is not None:
+                text.update()
 
-        self._show_snackbar("统计信息已刷新")
+        if notify:
+            self._show_snackbar("统计信息已刷新")
 
     def _handle_clear_download_folder(self, e: ft.ControlEvent):
         """处理清空下载文件夹"""
+        if download_manager.is_clearing:
+            self._show_snackbar("正在清空下载文件夹，请稍候", error=True)
+            return
+
+        trash_checkbox = ft.Checkbox(
+            label="移到回收站" if download_manager.trash_available else "移到回收站（需要安装 send2trash）",
+            value=download_manager.trash_available,
+            disabled=not download_manager.trash_available,
+        )
+        self._download_clear_trash_checkbox = trash_checkbox
+
         # 显示确认对话框
         confirm_dialog = ft.AlertDialog(
             title=ft.Text("确认清空"),
-            content=ft.Text("确定要清空下载文件夹吗？此操作不可撤销。"),
+            content=ft.Column(
+                [
+                    ft.Text("确定要清空下载文件夹吗？直接删除后不可撤销。"),
+                    trash_checkbox,
+                ],
+                tight=True,
+                spacing=8,
+            ),
             actions=[
                 ft.TextButton(
                     "取消",
@@ -6835,18 +6949,67 @@ class Pages:
 
     def _confirm_clear_download_folder(self):
         """确认清空下载文件夹"""
-        success, message = download_manager.clear_download_folder(app_config)
+        checkbox = getattr(self, "_download_clear_trash_checkbox", None)
+        move_to_trash = bool(checkbox and checkbox.value and not checkbox.disabled)
 
         # 关闭下载清空确认对话框
         self._close_clear_download_dialog()
+        self.page.run_task(self._run_clear_download_folder, move_to_trash)
+
+    async def _run_clear_download_folder(self, move_to_trash: bool) -> None:
+        """在后台清空下载文件夹，并用对话框显示进度。"""
+        progress_bar = ft.ProgressBar(width=400, value=None)
+        status_text = ft.Text("正在统计文件…", size=14)
+        stats_text = ft.Text("", size=12, color=ft.Colors.GREY)
+        cancel_button = ft.TextButton("取消", on_click=lambda _: download_manager.cancel_clear())
+
+        progress_dialog = ft.AlertDialog(
+            modal=True,
+            title=ft.Text("移到回收站" if move_to_trash else "清空下载文件夹"),
+            content=ft.Container(
+                content=ft.Column([progress_bar, status_text, stats_text], tight=True, spacing=10),
+                width=400,
+            ),
+            actions=[cancel_button],
+        )
+        self.page.open(progress_dialog)
+        self.page.update()
+
+        def progress_callback(progress):
+            if not progress_dialog.open:
+                return
+            progress_bar.value = (
+                progress.processed_count / progress.total_count if progress.total_count else None
+            )
+            status_text.value = f"正在处理: {Path(progress.current_file).name}"
+            stats_text.value = (
+                f"已处理 {progress.processed_count}/{progress.total_count} | "
+                f"已释放: {download_manager.format_file_size(progress.freed_bytes)}"
+            )
+            self.page.update()
+
+        try:
+            result = await download_manager.clear_download_folder_async(
+                app_config,
+                move_to_trash=move_to_trash,
+                progress_callback=progress_callback,
+            )
+        except Exception as exc:
+            logger.error(f"清空下载文件夹失败: {exc}")
+            self.page.close(progress_dialog)
+            self._show_snackbar(f"清空失败: {exc}", error=True)
+            return
+
+        self.page.close(progress_dialog)
+        self.page.update()
 
         # 显示结果
-        if success:
-            self._show_snackbar(message)
-            # 刷新统计信息
-            self._handle_refresh_download_stats(None)
+        if result.success or result.cancelled:
+            self._show_snackbar(result.message)
         else:
-            self._show_snackbar(f"清空失败: {message}", error=True)
+            self._show_snackbar(f"清空失败: {result.message}", error=True)
+        # 刷新统计信息
+        await self._refresh_download_stats(False)
 
     def _close_clear_download_dialog(self) -> None:
         """关闭下载清空确认对话框，不影响全局对话框关闭逻辑"""
@@ -6876,10 +7039,28 @@ class Pages:
             self.page.update()
 
     # 图片优化相关方法
+    async def _recover_image_optimization(self) -> None:
+        """启动时续完上次中断的图片优化替换（没有未完成的日志时直接返回）。
+
+        优化任务开始时会自行恢复，任务进行中不能再恢复，否则会提交或删除
+        任务正在写入的临时文件。
+        """
+        if image_optimizer.is_running:
+            return
+        folder_path = download_manager.get_download_folder_path(app_config)
+        if not folder_path or not image_optimizer.has_pending_recovery(folder_path):
+            return
+        try:
+            await asyncio.to_thread(image_optimizer.recover_folder, folder_path)
+        except Exception as exc:
+            logger.warning(f"恢复中断的图片优化失败: {exc}")
+
     def _handle_optimize_images(self, e: ft.ControlEvent):
         """处理优化图片按钮点击"""
         # 检查是否已在优化中
-        if hasattr(self, "_is_optimizing") and self._is_optimizing:
+        if (
+            hasattr(self, "_is_optimizing") and self._is_optimizing
+        ) or image_optimizer.is_running:
             self._show_snackbar("图片优化正在进行中，请等待完成", error=True)
             return
 
@@ -6908,6 +7089,84 @@ class Pages:
             label="{value}%",
         )
 
+        format_labels = {"avif": "AVIF", "webp": "WebP", "jxl": "JPEG XL", "jpeg": "JPEG"}
+        format_dropdown = ft.Dropdown(
+            label="输出格式",
+            value="avif",
+            options=[
+                ft.dropdown.Option(key=name, text=format_labels.get(name, name))
+                for name in available_formats()
+            ],
+            dense=True,
+        )
+        mode_dropdown = ft.Dropdown(
+            label="质量模式",
+            value="quality",
+            options=[
+                ft.dropdown.Option(key="quality", text="固定质量"),
+                ft.dropdown.Option(key="bytes", text="目标大小 (KB)"),
+                ft.dropdown.Option(key="ssim", text="目标 SSIM (0-1)"),
+            ],
+            dense=True,
+        )
+        target_field = ft.TextField(
+            label="目标值",
+            value="",
+            dense=True,
+            visible=False,
+        )
+        resolution_dropdown = ft.Dropdown(
+            label="最大分辨率（长边）",
+            value="0",
+            options=[
+                ft.dropdown.Option(key="0", text="不限制"),
+                ft.dropdown.Option(key="3840", text="3840 (4K)"),
+                ft.dropdown.Option(key="2560", text="2560 (2K)"),
+                ft.dropdown.Option(key="1920", text="1920 (1080p)"),
+            ],
+            dense=True,
+        )
+        strip_metadata_checkbox = ft.Checkbox(label="去除 EXIF 等元数据", value=True)
+        keep_original_checkbox = ft.Checkbox(label="保留原图", value=False)
+
+        def on_mode_change(e):
+            mode = mode_dropdown.value
+            target_field.visible = mode != "quality"
+            quality_slider.disabled = mode != "quality"
+            if mode == "bytes":
+                target_field.value = "1024"
+            elif mode == "ssim":
+                target_field.value = "0.95"
+            self.page.update()
+
+        mode_dropdown.on_change = on_mode_change
+
+        def build_profile() -> OptimizationProfile | None:
+            mode = mode_dropdown.value
+            target_bytes = None
+            target_ssim = None
+            try:
+                if mode == "bytes":
+                    target_bytes = int(float(target_field.value or 0) * 1024)
+                    if target_bytes <= 0:
+                        raise ValueError
+                elif mode == "ssim":
+                    target_ssim = float(target_field.value or 0)
+                    if not 0 < target_ssim < 1:
+                        raise ValueError
+            except ValueError:
+                self._show_snackbar("目标值无效", error=True)
+                return None
+            return OptimizationProfile(
+                format=format_dropdown.value or "avif",
+                quality=int(quality_slider.value),
+                max_resolution=int(resolution_dropdown.value or 0) or None,
+                strip_metadata=bool(strip_metadata_checkbox.value),
+                keep_original=bool(keep_original_checkbox.value),
+                target_bytes=target_bytes,
+                target_ssim=target_ssim,
+            )
+
         # 进度条
         progress_bar = ft.ProgressBar(
             width=300,
@@ -6934,7 +7193,9 @@ class Pages:
 
         def on_start_optimize(e):
             """开始优化"""
-            quality = int(quality_slider.value)
+            profile = build_profile()
+            if profile is None:
+                return
 
             # 设置优化状态
             self._is_optimizing = True
@@ -6948,7 +7209,16 @@ class Pages:
             # 禁用对话框控件
             start_button.disabled = True
             cancel_button.disabled = False
-            quality_slider.disabled = True
+            for control in (
+                quality_slider,
+                format_dropdown,
+                mode_dropdown,
+                target_field,
+                resolution_dropdown,
+                strip_metadata_checkbox,
+                keep_original_checkbox,
+            ):
+                control.disabled = True
 
             # 显示进度条
             progress_bar.visible = True
@@ -6962,7 +7232,7 @@ class Pages:
             # 开始异步优化
             self.page.run_task(
                 self._start_image_optimization,
-                quality,
+                profile,
                 progress_bar,
                 status_text,
                 stats_text,
@@ -6970,6 +7240,8 @@ class Pages:
 
         def on_cancel_optimize(e):
             """取消优化"""
+            # 停止提交新文件，已转换完成的文件仍会替换原图
+            image_optimizer.cancel()
             self._close_optimize_dialog()
 
         start_button = ft.ElevatedButton(
@@ -6990,11 +7262,17 @@ class Pages:
             content=ft.Container(
                 content=ft.Column(
                     [
-                        ft.Text(f"将把 {image_count} 张图片转换为AVIF格式"),
-                        ft.Text("AVIF格式提供更好的压缩比和质量"),
+                        ft.Text(f"将优化 {image_count} 张图片"),
+                        ft.Text("AVIF / JPEG XL 压缩比最高，WebP / JPEG 兼容性更好"),
                         ft.Divider(),
+                        format_dropdown,
+                        mode_dropdown,
+                        target_field,
                         ft.Text("选择压缩质量:"),
                         quality_slider,
+                        resolution_dropdown,
+                        strip_metadata_checkbox,
+                        keep_original_checkbox,
                         ft.Divider(),
                         status_text,
                         progress_bar,
@@ -7003,7 +7281,7 @@ class Pages:
                     scroll=ft.ScrollMode.AUTO,
                 ),
                 width=350,
-                height=250,
+                height=420,
             ),
             actions=[
                 cancel_button,
@@ -7020,7 +7298,7 @@ class Pages:
 
     async def _start_image_optimization(
         self,
-        quality: int,
+        profile: OptimizationProfile,
         progress_bar: ft.ProgressBar,
         status_text: ft.Text,
         stats_text: ft.Text,
@@ -7060,10 +7338,15 @@ class Pages:
                     self.page.update()
 
             # 执行优化
-            result = await image_optimizer.optimize_folder_to_avif(
+            try:
+                budget_mb = int(app_config.get("storage.optimize_memory_budget_mb", 1024) or 1024)
+            except (TypeError, ValueError):
+                budget_mb = 1024
+            result = await image_optimizer.optimize_folder(
                 folder_path,
-                quality=quality,
+                profile,
                 progress_callback=progress_callback,
+                memory_budget=max(budget_mb, 64) * 1024 * 1024,
             )
 
             # 更新最终状态
@@ -7074,8 +7357,13 @@ class Pages:
                         result.original_size, result.optimized_size
                     )
                     stats_text.value = f"成功处理 {result.processed_files} 张图片 | 压缩比: {compression_ratio:.1f}% | 耗时: {result.time_elapsed:.1f}秒"
+                    if result.skipped_files:
+                        stats_text.value += f" | 跳过未变化: {result.skipped_files}"
+                    if result.kept_files:
+                        stats_text.value += f" | 输出未变小、保留原图: {result.kept_files}"
                     self._show_snackbar(
                         f"图片优化完成！节省空间 {compression_ratio:.1f}%"
+                        f"（{image_optimizer.format_file_size(max(result.saved_bytes, 0))}）"
                     )
                 else:
                     status_text.value = "优化完成（有错误）"
@@ -7642,6 +7930,7 @@ class Pages:
             logger.error("下载失败: {error}", error=str(exc))
             self._show_snackbar("下载失败，请查看日志。", error=True)
             return
+        self._record_downloaded_file(final_path)
         self._show_snackbar(f"已下载到 {final_path}")
 
     async def _generate_copy_image(self) -> None:
@@ -8255,10 +8544,13 @@ class Pages:
         grouped: dict[str, dict[str, Any]] = {}
         order_index = {record.identifier: index for index, record in enumerate(records)}
         merge_priority = self._ws_merge_priority_map(records)
+        matched = (
+            self._wallpaper_source_manager.search_category_ids(term) if term else None
+        )
         for record in records:
             refs = self._wallpaper_source_manager.category_refs(record.identifier)
             for ref in refs:
-                if term and not any(term in token for token in ref.search_tokens):
+                if matched is not None and ref.category_id not in matched:
                     continue
                 primary_label = (
                     ref.category.category or ref.source_name or record.spec.name
@@ -8392,9 +8684,8 @@ class Pages:
     ) -> list[WallpaperCategoryRef]:
         if not term:
             return list(refs)
-        return [
-            ref for ref in refs if any(term in token for token in ref.search_tokens)
-        ]
+        matched = self._wallpaper_source_manager.search_category_ids(term)
+        return [ref for ref in refs if ref.category_id in matched]
 
     def _ws_build_primary_entries(
         self,
@@ -9432,6 +9723,11 @@ class Pages:
         if self._ws_fetch_in_progress:
             return
         raw = getattr(event.control, "value", "") or ""
+        self._debounce("ws_search", lambda: self._ws_apply_search(raw))
+
+    def _ws_apply_search(self, raw: str) -> None:
+        if self._ws_fetch_in_progress:
+            return
         self._ws_search_text = raw.strip().lower()
         self._ws_recompute_ui(preserve_selection=False)
 
@@ -10727,11 +11023,36 @@ class Pages:
         if self.page:
             self.page.run_task(self._load_im_sources, True)
 
+    def _debounce(
+        self,
+        key: str,
+        callback: Callable[[], None],
+        delay: float = _SEARCH_DEBOUNCE_SECONDS,
+    ) -> None:
+        """Run ``callback`` once input under ``key`` has been idle for ``delay``."""
+        token = object()
+        self._debounce_tokens[key] = token
+        if self.page is None:
+            callback()
+            return
+
+        async def _runner() -> None:
+            await asyncio.sleep(delay)
+            if self._debounce_tokens.get(key) is not token:
+                return
+            self._debounce_tokens.pop(key, None)
+            callback()
+
+        self.page.run_task(_runner)
+
     def _on_im_search_change(self, event: ft.ControlEvent) -> None:
         raw_value = ""
         if event and getattr(event, "control", None):
             raw_value = str(getattr(event.control, "value", "") or "")
         normalized = raw_value.strip()
+        self._debounce("im_search", lambda: self._apply_im_search(normalized))
+
+    def _apply_im_search(self, normalized: str) -> None:
         if normalized == self._im_search_text:
             return
         self._im_search_text = normalized
@@ -10750,15 +11071,7 @@ class Pages:
             self._im_selected_category = category
 
         if category == self._im_all_category_key:
-            aggregated: list[dict[str, Any]] = []
-            for items in self._im_sources_by_category.values():
-                aggregated.extend(items)
-            base_sources = sorted(
-                aggregated,
-                key=lambda item: (
-                    item.get("friendly_name") or item.get("file_name") or ""
-                ).lower(),
-            )
+            base_sources = self._im_all_sources
             resolved_category = self._im_all_category_key
         else:
             if category not in self._im_sources_by_category:
@@ -10766,43 +11079,40 @@ class Pages:
                 if category is None:
                     return [], None, 0
                 self._im_selected_category = category
-            base_sources = list(self._im_sources_by_category.get(category, []))
+            base_sources = self._im_sources_by_category.get(category, [])
             resolved_category = category
 
-        if not search_term:
-            return base_sources, resolved_category, len(base_sources)
+        if not search_term or self._im_search_index is None:
+            return list(base_sources), resolved_category, len(base_sources)
 
-        filtered = [
-            item for item in base_sources if self._im_source_matches(item, search_term)
-        ]
+        matched = self._im_search_index.search_set(search_term)
+        filtered = [item for item in base_sources if item.get("path") in matched]
         return filtered, resolved_category, len(base_sources)
 
-    def _im_source_matches(self, source: dict[str, Any], term: str) -> bool:
-        term_lower = term.strip().lower()
-        if not term_lower:
-            return True
-
-        candidates: list[str] = []
-        for key in ("friendly_name", "intro", "file_name", "path", "link", "category"):
-            value = source.get(key)
-            if isinstance(value, str) and value:
-                candidates.append(value)
-
-        parameters = source.get("parameters") or []
-        if isinstance(parameters, Sequence):
-            for param in parameters:
-                if not isinstance(param, dict):
-                    continue
-                for param_key in ("friendly_name", "name"):
-                    value = param.get(param_key)
-                    if isinstance(value, str) and value:
-                        candidates.append(value)
-
-        for candidate in candidates:
-            if term_lower in candidate.lower():
-                return True
-
-        return False
+    def _im_build_search_index(
+        self,
+        sources: Sequence[dict[str, Any]],
+    ) -> SearchIndex[str]:
+        return SearchIndex(
+            (
+                str(source.get("path") or ""),
+                [
+                    *(
+                        source.get(key)
+                        for key in (
+                            "friendly_name",
+                            "intro",
+                            "file_name",
+                            "path",
+                            "link",
+                            "category",
+                        )
+                    ),
+                    *(source.get("parameter_names") or []),
+                ],
+            )
+            for source in sources
+        )
 
     # -----------------------------
     # IntelliMarkets 专用镜像策略
@@ -10854,32 +11164,93 @@ class Pages:
             headers["Accept"] = "application/vnd.github+json"
         return headers
 
-    async def _fetch_bytes_with_mirrors(
+    async def _im_stream_catalog_with_mirrors(
         self,
         session: aiohttp.ClientSession,
-        url: str,
+        candidates: list[str],
         *,
-        binary: bool = False,
-        timeout: float = 30.0,
-        candidates: list[str] | None = None,
-    ) -> bytes:
+        revision: str | None,
+        etag: str | None,
+        timeout: float = 60.0,
+    ) -> int:
+        """Download the repository tarball and rebuild the catalog from it.
+
+        Candidates race for the first byte via the shared mirror selector; a
+        mirror failing mid-stream rolls the catalog transaction back and the
+        race is repeated among the remaining candidates.
+        """
         errors: list[str] = []
-        headers = self._im_request_headers(binary=binary)
-        trial_list = candidates if candidates else [url]
-        for candidate in trial_list:
+        headers = self._im_request_headers(binary=True)
+        remaining = list(candidates)
+        while remaining:
             try:
-                async with session.get(
-                    candidate,
+                async with mirror_selector.open_fastest(
+                    session,
+                    remaining,
                     headers=headers,
                     timeout=timeout,
-                ) as resp:
-                    if resp.status == 200:
-                        return await resp.read()
-                    errors.append(f"{candidate} -> HTTP {resp.status}")
-            except Exception as exc:  # pragma: no cover - network variability
-                errors.append(f"{candidate}: {exc}")
+                ) as (candidate, resp):
+                    remaining.remove(candidate)
+                    logger.info(f"开始流式解析 IntelliMarkets 图片源：{candidate}")
+                    try:
+                        return await self._im_stream_response_into_catalog(
+                            resp,
+                            revision=revision,
+                            etag=etag,
+                        )
+                    except Exception as exc:  # pragma: no cover - network variability
+                        errors.append(f"{candidate}: {exc}")
+                        await asyncio.to_thread(
+                            mirror_selector.report_failure,
+                            candidate,
+                        )
+            except RuntimeError as exc:
+                # 所有剩余候选均未能返回响应头
+                errors.append(str(exc))
+                break
         raise RuntimeError("; ".join(errors))
 
+    async def _im_stream_response_into_catalog(
+        self,
+        resp: aiohttp.ClientResponse,
+        *,
+        revision: str | None,
+        etag: str | None,
+    ) -> int:
+        # 下载与解析并行：网络数据块经有界队列交给工作线程中的 tarfile 流式解析，
+        # 内存峰值只与单个成员大小相关，而非整个 tarball。
+        reader = ChunkStreamReader()
+        catalog = self._im_catalog
+
+        def _consume() -> int:
+            try:
+                return catalog.replace_all(
+                    iter_tarball_entries(reader),
+                    revision=revision,
+                    etag=etag,
+                )
+            finally:
+                reader.close()
+
+        consumer = asyncio.ensure_future(asyncio.to_thread(_consume))
+        error: Exception | None = None
+        try:
+            async for chunk in resp.content.iter_chunked(64 * 1024):
+                if consumer.done():
+                    break
+                if not reader.try_feed(chunk) and not await asyncio.to_thread(
+                    reader.feed,
+                    chunk,
+                ):
+                    break
+        except Exception as exc:  # pragma: no cover - network variability
+            error = exc
+        except BaseException:
+            reader.abort()
+            raise
+        await asyncio.to_thread(reader.finish, error)
+        return await consumer
+
     def _build_github_raw_url(self, relative_path: str) -> str:
         encoded = quote(relative_path, safe="/")
         return (
@@ -11000,9 +11371,35 @@ class Pages:
             return candidate.strip()
         return f"source-{hashlib.sha1(json.dumps(source, sort_keys=True).encode('utf-8')).hexdigest()}"
 
+    def _im_source_with_details(self, source: dict[str, Any]) -> dict[str, Any]:
+        """Return ``source`` merged with its full definition from the catalog.
+
+        Index rows held in memory omit ``content``; the definition is read
+        from the on-disk catalog only when a source is actually opened.
+        """
+        if "content" in source:
+            return source
+        relative_path = source.get("path")
+        if not isinstance(relative_path, str) or not relative_path:
+            return source
+        content = self._im_catalog.load_details(relative_path)
+        if content is None:
+            logger.warning(f"IntelliMarkets 目录中缺少图片源详情：{relative_path}")
+            return source
+        return {
+            **source,
+            "parameters": content.get("parameters"),
+            "response": content.get("response"),
+            "raw_url": self._build_github_raw_url(relative_path),
+            "html_url": self._build_github_html_url(relative_path),
+            # 专用于程序内部的 raw 镜像候选（不展示给用户）
+            "raw_mirror_candidates": self._im_raw_mirrors(relative_path),
+            "content": content,
+        }
+
     def _open_im_source_detail_page(self, source: dict[str, Any]) -> None:
         self._cancel_im_fetch_task()
-        self._im_active_source = source
+        self._im_active_source = self._im_source_with_details(source)
         self._im_last_results = []
         if self.page is not None:
             self.page.go("/resource/im-source")
@@ -11926,6 +12323,8 @@ class Pages:
             if not image_values:
                 raise RuntimeError("未在响应中找到图片链接")
 
+            resolved: list[tuple[Path | None, str | None]] = []
+            pending_urls: list[str] = []
             for idx, raw in enumerate(image_values):
                 if raw in (None, ""):
                     continue
@@ -11939,33 +12338,40 @@ class Pages:
                 if raw in (None, ""):
                     continue
 
-                local_path: Path | None = None
-                original_url: str | None = None
-
                 if image_cfg.get("is_base64"):
                     try:
                         data_bytes = base64.b64decode(str(raw))
                     except Exception as exc:  # pragma: no cover - invalid payload
                         logger.error(f"解码 Base64 图片失败: {exc}")
                         continue
-                    local_path = await asyncio.to_thread(
+                    saved_path = await asyncio.to_thread(
                         self._im_save_image_bytes,
                         storage_dir,
                         data_bytes,
                         idx,
                         headers.get("Content-Type"),
                     )
+                    resolved.append((saved_path, None))
                 else:
-                    original_url = str(raw)
-                    download_path = await asyncio.to_thread(
-                        self._im_download_via_url,
-                        original_url,
-                        storage_dir,
-                    )
-                    if not download_path:
-                        continue
-                    local_path = Path(download_path)
-
+                    pending_urls.append(str(raw))
+                    resolved.append((None, str(raw)))
+
+            if pending_urls:
+                downloaded = await asyncio.to_thread(
+                    self._im_download_many_via_url,
+                    pending_urls,
+                    storage_dir,
+                )
+                download_iter = iter(downloaded)
+                merged: list[tuple[Path | None, str | None]] = []
+                for local_path, original_url in resolved:
+                    if original_url is not None:
+                        download_path = next(download_iter, None)
+                        local_path = Path(download_path) if download_path else None
+                    merged.append((local_path, original_url))
+                resolved = merged
+
+            for local_path, original_url in resolved:
                 if local_path is None:
                     continue
 
@@ -12064,12 +12470,16 @@ class Pages:
         path.write_bytes(data)
         return path
 
-    def _im_download_via_url(self, url: str, directory: Path) -> str | None:
+    def _im_download_many_via_url(
+        self,
+        urls: Sequence[str],
+        directory: Path,
+    ) -> list[str | None]:
         try:
-            return ltwapi.download_file(url, save_path=str(directory))
+            return ltwapi.download_files(list(urls), save_path=str(directory))
         except Exception as exc:  # pragma: no cover - network errors
             logger.error(f"下载图片失败：{exc}")
-            return None
+            return [None] * len(urls)
 
     def _im_make_preview_data(self, path: Path) -> tuple[str, str] | None:
         try:
@@ -12586,6 +12996,7 @@ class Pages:
         """处理下载完成"""
         try:
             final_path = await final_path_task
+            self._record_downloaded_file(final_path)
             self._show_snackbar(f"已下载到 {final_path}")
 
             # 发送下载完成事件
@@ -13011,126 +13422,143 @@ class Pages:
         if self.page:
             self.page.update()
 
+    def _im_apply_catalog_rows(
+        self,
+        rows: list[dict[str, Any]],
+        search_index: SearchIndex[str] | None = None,
+    ) -> None:
+        categories: dict[str, list[dict[str, Any]]] = {}
+        for row in rows:
+            categories.setdefault(row.get("category") or "未分类", []).append(row)
+        self._im_sources_by_category = categories
+        self._im_all_sources = sorted(
+            rows,
+            key=lambda item: (
+                item.get("friendly_name") or item.get("file_name") or ""
+            ).lower(),
+        )
+        self._im_search_index = search_index or self._im_build_search_index(rows)
+        self._im_total_sources = len(rows)
+        if self._im_selected_category is None or (
+            self._im_selected_category != self._im_all_category_key
+            and self._im_selected_category not in categories
+        ):
+            self._im_selected_category = (
+                self._im_all_category_key if categories else None
+            )
+
+    def _im_revision_candidates(self) -> list[str]:
+        owner = self._im_repo_owner
+        repo = self._im_repo_name
+        branch = self._im_repo_branch
+        official = [f"https://api.github.com/repos/{owner}/{repo}/commits/{branch}"]
+        mirror = [f"https://api.kkgithub.com/repos/{owner}/{repo}/commits/{branch}"]
+        preference = str(
+            app_config.get("im.mirror_preference", "default_first") or "default_first",
+        )
+        if preference == "mirror_first":
+            return [*mirror, *official]
+        return [*official, *mirror]
+
+    async def _fetch_im_remote_revision(
+        self,
+        session: aiohttp.ClientSession,
+        known_etag: str | None,
+    ) -> tuple[str | None, str | None, bool]:
+        """Query the latest commit SHA of the source repository.
+
+        Returns ``(sha, etag, not_modified)``. A conditional request is sent
+        with the stored ETag so an unchanged repository answers ``304``.
+        """
+        headers = self._im_request_headers()
+        headers["Accept"] = "application/vnd.github.sha"
+        if known_etag:
+            headers["If-None-Match"] = known_etag
+        for candidate in mirror_selector.rank(self._im_revision_candidates()):
+            try:
+                async with session.get(candidate, headers=headers, timeout=15) as resp:
+                    if resp.status == 304:
+                        return None, known_etag, True
+                    if resp.status != 200:
+                        logger.warning(
+                            f"获取 IntelliMarkets 仓库版本失败：{candidate} -> HTTP {resp.status}",
+                        )
+                        continue
+                    sha = (await resp.text()).strip()
+                    if not re.fullmatch(r"[0-9a-f]{40}", sha):
+                        continue
+                    return sha, resp.headers.get("ETag"), False
+            except Exception as exc:  # pragma: no cover - network variability
+                logger.warning(f"获取 IntelliMarkets 仓库版本失败：{candidate}: {exc}")
+        return None, None, False
+
     async def _load_im_sources(self, force: bool = False) -> None:
         if self._im_loading:
             return
         self._im_loading = True
         self._im_error = None
-        self._refresh_im_ui()
 
-        # 构建 tarball 候选列表（官方与镜像）
-        tarball_candidates = self._im_tarball_candidates()
-        logger.info(f"IntelliMarkets 图片源下载候选：{tarball_candidates}")
+        catalog = self._im_catalog
+        if not self._im_sources_by_category:
+            cached_rows = await asyncio.to_thread(catalog.load_index)
+            if cached_rows:
+                cached_index = await asyncio.to_thread(
+                    self._im_build_search_index,
+                    cached_rows,
+                )
+                self._im_apply_catalog_rows(cached_rows, cached_index)
+                self._im_last_updated = await asyncio.to_thread(
+                    lambda: catalog.checked_at,
+                )
+                logger.info(
+                    "已从本地目录载入 {count} 个 IntelliMarkets 图片源",
+                    count=len(cached_rows),
+                )
+        self._refresh_im_ui()
 
         timeout = aiohttp.ClientTimeout(total=60)
         try:
             async with aiohttp.ClientSession(timeout=timeout) as session:
-                tarball_bytes = await self._fetch_bytes_with_mirrors(
+                known_revision, known_etag = await asyncio.to_thread(
+                    lambda: (catalog.revision, catalog.etag),
+                )
+                remote_sha, remote_etag, not_modified = (
+                    await self._fetch_im_remote_revision(
+                        session,
+                        known_etag if known_revision else None,
+                    )
+                )
+                up_to_date = bool(self._im_sources_by_category) and (
+                    not_modified
+                    or (remote_sha is not None and remote_sha == known_revision)
+                )
+                if up_to_date and not force:
+                    logger.info("IntelliMarkets 图片源目录已是最新，跳过下载")
+                    await asyncio.to_thread(catalog.mark_checked, etag=remote_etag)
+                    self._im_last_updated = time.time()
+                    return
+
+                # 构建 tarball 候选列表（官方与镜像）
+                tarball_candidates = self._im_tarball_candidates()
+                logger.info(f"IntelliMarkets 图片源下载候选：{tarball_candidates}")
+                count = await self._im_stream_catalog_with_mirrors(
                     session,
-                    tarball_candidates[0],
-                    binary=True,
+                    tarball_candidates,
+                    revision=remote_sha or (known_revision if not_modified else None),
+                    etag=remote_etag,
                     timeout=timeout.total,
-                    candidates=tarball_candidates,
                 )
-            logger.info("成功获取 IntelliMarkets 图片源数据，开始解析内容…")
-
-            categories: dict[str, list[dict[str, Any]]] = {}
-            total_sources = 0
-            tar_stream = io.BytesIO(tarball_bytes)
-            with tarfile.open(fileobj=tar_stream, mode="r:gz") as tar:
-                for member in tar.getmembers():
-                    if not member.isfile():
-                        continue
-                    if not member.name.lower().endswith(".json"):
-                        continue
-                    parts = member.name.split("/", 1)
-                    if len(parts) < 2:
-                        continue
-                    relative_path = parts[1]
-                    if not relative_path:
-                        continue
-                    relative_segments = relative_path.split("/")
-                    if not relative_segments:
-                        continue
-
-                    if len(relative_segments) == 1:
-                        category_name = "未分类"
-                        file_name = relative_segments[0]
-                    else:
-                        category_name = relative_segments[0]
-                        file_name = relative_segments[-1]
-
-                    if not file_name.lower().endswith(".json"):
-                        continue
-
-                    extracted = tar.extractfile(member)
-                    if extracted is None:
-                        continue
-                    raw_bytes = extracted.read()
-                    text = raw_bytes.decode("utf-8-sig", errors="ignore")
-                    try:
-                        config_payload = json.loads(text)
-                    except json.JSONDecodeError as exc:
-                        logger.error(
-                            "解析 IntelliMarkets 图片源失败: {path} -> {error}",
-                            path=relative_path,
-                            error=str(exc),
-                        )
-                        continue
-
-                    raw_url = self._build_github_raw_url(relative_path)
-                    html_url = self._build_github_html_url(relative_path)
-                    # 专用于程序内部的 raw 镜像候选（不展示给用户）
-                    raw_mirror_candidates = self._im_raw_mirrors(relative_path)
-
-                    source_info: dict[str, Any] = {
-                        "category": category_name,
-                        "path": relative_path,
-                        "file_name": file_name,
-                        "friendly_name": config_payload.get("friendly_name")
-                        or file_name,
-                        "intro": config_payload.get("intro") or "",
-                        "icon": config_payload.get("icon"),
-                        "link": config_payload.get("link"),
-                        "func": config_payload.get("func") or "GET",
-                        "apicore_version": config_payload.get("APICORE_version"),
-                        "parameters": config_payload.get("parameters"),
-                        "response": config_payload.get("response"),
-                        "raw_url": raw_url,
-                        "html_url": html_url,
-                        "raw_mirror_candidates": raw_mirror_candidates,
-                        "size": member.size,
-                        "content": config_payload,
-                    }
-
-                    categories.setdefault(category_name, []).append(source_info)
-                    total_sources += 1
             logger.info(
                 "IntelliMarkets 图片源解析完成，共加载 {count} 个图片源。",
-                count=total_sources,
+                count=count,
             )
-            for items in categories.values():
-                items.sort(
-                    key=lambda item: (
-                        item.get("friendly_name") or item.get("file_name") or ""
-                    ).lower(),
-                )
-
-            self._im_sources_by_category = categories
-            self._im_total_sources = total_sources
-            if self._im_selected_category is None or (
-                self._im_selected_category != self._im_all_category_key
-                and self._im_selected_category not in categories
-            ):
-                self._im_selected_category = (
-                    self._im_all_category_key if categories else None
-                )
+            rows = await asyncio.to_thread(catalog.load_index)
+            search_index = await asyncio.to_thread(self._im_build_search_index, rows)
+            self._im_apply_catalog_rows(rows, search_index)
             self._im_last_updated = time.time()
         except Exception as exc:  # pragma: no cover - network variability
             logger.error(f"加载 IntelliMarkets 图片源失败: {exc}")
             self._im_error = str(exc)
-            self._im_sources_by_category = {}
-            self._im_total_sources = 0
         finally:
             self._im_loading = False
             self._refresh_im_ui()
@@ -13352,10 +13780,9 @@ class Pages:
             self.page.run_task(_hide_row_later)
 
     def _build_favorite_folder_view(self, folder_id: str) -> ft.Control:
-        items = self._favorite_manager.list_items(
-            None if folder_id in (None, "__all__") else folder_id,
-        )
-        if not items:
+        scope = None if folder_id in (None, "__all__") else folder_id
+        first_page = self._favorite_manager.query(scope, limit=_FAVORITE_PAGE_SIZE)
+        if not first_page.items:
             return ft.Container(
                 content=ft.Column(
                     [
@@ -13378,9 +13805,50 @@ class Pages:
             spacing=16,
             run_spacing=16,
             auto_scroll=False,
+            scroll_interval=100,
         )
-        for item in items:
-            grid.controls.append(self._build_favorite_card(item))
+        grid.controls.extend(self._build_favorite_card(item) for item in first_page.items)
+
+        # 卡片按页懒加载：滚动接近底部（或点击按钮）时再查询并构建下一页
+        paging_state: dict[str, Any] = {
+            "cursor": first_page.next_cursor,
+            "loading": False,
+        }
+        load_more_button = ft.TextButton(
+            "加载更多",
+            icon=ft.Icons.EXPAND_MORE,
+            visible=bool(first_page.next_cursor),
+        )
+
+        def _load_next_page(_: ft.ControlEvent | None = None) -> None:
+            cursor = paging_state["cursor"]
+            if not cursor or paging_state["loading"]:
+                return
+            paging_state["loading"] = True
+            try:
+                result = self._favorite_manager.query(
+                    scope,
+                    cursor=cursor,
+                    limit=_FAVORITE_PAGE_SIZE,
+                )
+                grid.controls.extend(self._build_favorite_card(item) for item in result.items)
+                paging_state["cursor"] = result.next_cursor
+                load_more_button.visible = bool(result.next_cursor)
+            finally:
+                paging_state["loading"] = False
+            if grid.page is not None:
+                grid.update()
+            if load_more_button.page is not None:
+                load_more_button.update()
+
+        def _on_grid_scroll(event: ft.OnScrollEvent) -> None:
+            if event.max_scroll_extent is None or event.pixels is None:
+                return
+            if event.pixels >= event.max_scroll_extent - _FAVORITE_PRELOAD_PIXELS:
+                _load_next_page()
+
+        grid.on_scroll = _on_grid_scroll
+        load_more_button.on_click = _load_next_page
 
         if folder_id in (None, "__all__"):
             folder_label = "全部收藏"
@@ -13391,7 +13859,7 @@ class Pages:
         header_row = ft.Row(
             [
                 ft.Text(folder_label, size=14, weight=ft.FontWeight.BOLD),
-                ft.Text(f"共 {len(items)} 项收藏", size=12, color=ft.Colors.GREY),
+                ft.Text(f"共 {first_page.total} 项收藏", size=12, color=ft.Colors.GREY),
             ],
             alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
             vertical_alignment=ft.CrossAxisAlignment.CENTER,
@@ -13402,6 +13870,10 @@ class Pages:
                 [
                     header_row,
                     grid,
+                    ft.Row(
+                        [load_more_button],
+                        alignment=ft.MainAxisAlignment.CENTER,
+                    ),
                 ],
                 spacing=12,
                 expand=True,
@@ -13777,47 +14249,7 @@ class Pages:
                 delete_button.update()
 
     async def _localize_favorite_item(self, item: FavoriteItem) -> bool:
-        if (
-            item.localization.status == "completed"
-            and item.localization.local_path
-            and Path(item.localization.local_path).exists()
-        ):
-            return True
-        if item.local_path and Path(item.local_path).exists():
-            destination = await asyncio.to_thread(
-                self._favorite_manager.localize_item_from_file,
-                item.id,
-                item.local_path,
-            )
-            return destination is not None
-        download_url = item.preview_url or item.source.preview_url or item.source.url
-        if not download_url:
-            logger.warning("收藏缺少可下载地址，跳过本地化: {item}", item=item.id)
-            return False
-        downloads_dir = (
-            self._favorite_manager.localization_root() / "__downloads"
-        ).resolve()
-        downloads_dir.mkdir(parents=True, exist_ok=True)
-        temp_name = f"{item.id}-{uuid.uuid4().hex}"
-        downloaded_path = await asyncio.to_thread(
-            ltwapi.download_file,
-            download_url,
-            downloads_dir,
-            temp_name,
-        )
-        if not downloaded_path:
-            return False
-        destination = await asyncio.to_thread(
-            self._favorite_manager.localize_item_from_file,
-            item.id,
-            str(downloaded_path),
-        )
-        # 清理临时文件
-        try:
-            Path(downloaded_path).unlink(missing_ok=True)
-        except Exception:
-            pass
-        return destination is not None
+        return await asyncio.to_thread(self._favorite_manager.localize_item, item.id)
 
     async def _ensure_favorite_local_copy(self, item: FavoriteItem) -> str | None:
         for candidate in (item.localization.local_path, item.local_path):
@@ -13841,40 +14273,188 @@ class Pages:
             self._show_snackbar("当前视图没有可本地化的收藏。")
             return
 
+        item_ids = [item.id for item in items]
+        selected = set(item_ids)
+        leftovers = [
+            item_id
+            for item_id in self._favorite_manager.pending_localization_ids()
+            if item_id not in selected
+        ]
+        if not leftovers:
+            self._start_favorite_localization(item_ids, resume=False)
+            return
+
+        def _choose(resume: bool) -> None:
+            self._close_dialog()
+            self._start_favorite_localization(item_ids, resume=resume)
+
+        dialog = ft.AlertDialog(
+            modal=True,
+            title=ft.Text("继续未完成的本地化"),
+            content=ft.Text(
+                f"上次本地化任务还有 {len(leftovers)} 项收藏未完成，是否与当前视图一并处理？",
+            ),
+            actions=[
+                ft.TextButton("仅当前视图", on_click=lambda _: _choose(False)),
+                ft.FilledTonalButton(
+                    "一并继续",
+                    icon=ft.Icons.PLAYLIST_ADD,
+                    on_click=lambda _: _choose(True),
+                ),
+            ],
+            actions_alignment=ft.MainAxisAlignment.END,
+        )
+        self._open_dialog(dialog)
+
+    def _start_favorite_localization(self, item_ids: list[str], *, resume: bool) -> None:
         button = self._favorite_localize_button
         if button is not None:
             button.disabled = True
             button.update()
 
+        def _on_progress(event: FavoriteLocalizationProgress) -> None:
+            for finished_id in event.finished_ids:
+                self._set_item_localizing(finished_id, False)
+            # 续传的遗留条目会计入总数，以管理器给出的 total 为准
+            if event.total != self._favorite_batch_total:
+                self._favorite_batch_total = event.total
+            self._update_localization_progress(event.done - self._favorite_batch_done)
+
         async def _runner() -> None:
-            success = 0
-            self._show_localization_progress(len(items))
-            for item in items:
-                self._favorite_manager.update_localization(
-                    item.id,
-                    status="pending",
-                    local_path=item.localization.local_path,
-                    folder_path=item.localization.folder_path,
+            self._show_localization_progress(len(item_ids))
+            for item_id in item_ids:
+                self._set_item_localizing(item_id, True)
+            result: FavoriteLocalizationProgress | None = None
+            try:
+                result = await asyncio.to_thread(
+                    self._favorite_manager.localize_items,
+                    item_ids,
+                    resume=resume,
+                    progress_callback=_on_progress,
                 )
-                self._set_item_localizing(item.id, True)
-                try:
-                    current_item = self._favorite_manager.get_item(item.id) or item
-                    if await self._localize_favorite_item(current_item):
-                        success += 1
-                except Exception as exc:  # pragma: no cover - defensive logging
-                    logger.error(f"本地化收藏失败: {exc}")
-                finally:
-                    self._set_item_localizing(item.id, False)
-                    self._update_localization_progress()
+            except Exception as exc:  # pragma: no cover - defensive logging
+                logger.error(f"本地化收藏失败: {exc}")
+            finally:
+                for item_id in item_ids:
+                    self._set_item_localizing(item_id, False)
+            success = result.succeeded if result else 0
+            total = result.total if result else len(item_ids)
             self._refresh_favorite_tabs()
             if button is not None:
                 button.disabled = False
                 button.update()
-            self._finish_localization_progress(success, len(items))
-            self._show_snackbar(f"已本地化 {success}/{len(items)} 项收藏。")
+            self._finish_localization_progress(success, total)
+            self._show_snackbar(f"已本地化 {success}/{total} 项收藏。")
 
         self.page.run_task(_runner)
 
+    def _handle_find_favorite_duplicates(self, _: ft.ControlEvent | None = None) -> None:
+        folder_id = self._favorite_selected_folder
+        scope = None if folder_id in (None, "__all__") else folder_id
+        button = self._favorite_dedup_button
+        if button is not None:
+            button.disabled = True
+            button.update()
+        status_text = self._favorite_localization_status_text
+        progress_bar = self._favorite_localization_progress_bar
+        status_row = self._favorite_localization_status_row
+
+        def _set_status(message: str, value: float | None) -> None:
+            if status_text is not None:
+                status_text.value = message
+            if progress_bar is not None:
+                progress_bar.value = value
+                progress_bar.visible = True
+            if status_row is not None:
+                status_row.visible = True
+            for control in (status_text, progress_bar, status_row):
+                if control is not None and control.page is not None:
+                    control.update()
+
+        _on_progress = self._make_throttled_progress(
+            progress_bar, status_text, "正在计算图片指纹 {done}/{total}…",
+        )
+
+        async def _runner() -> None:
+            _set_status("正在查找重复收藏…", None)
+            try:
+                groups = await asyncio.to_thread(
+                    self._favorite_manager.find_duplicates,
+                    scope,
+                    progress_callback=_on_progress,
+                )
+            except Exception as exc:  # pragma: no cover - defensive logging
+                logger.error(f"查找重复收藏失败: {exc}")
+                self._show_snackbar("查找重复收藏失败，请查看日志。", error=True)
+                groups = None
+            finally:
+                if status_row is not None:
+                    status_row.visible = False
+                    if status_row.page is not None:
+                        status_row.update()
+                if button is not None:
+                    button.disabled = False
+                    button.update()
+            if groups is None:
+                return
+            if not groups:
+                self._show_snackbar("未发现重复的收藏。")
+                return
+            self._open_favorite_duplicates_dialog(groups)
+
+        self.page.run_task(_runner)
+
+    def _open_favorite_duplicates_dialog(self, groups: list[list[FavoriteItem]]) -> None:
+        folder_names = {folder.id: folder.name for folder in self._favorite_manager.list_folders()}
+
+        def _build_row(item: FavoriteItem) -> ft.Control:
+            row = ft.Row(spacing=8, vertical_alignment=ft.CrossAxisAlignment.CENTER)
+
+            def _remove(_: ft.ControlEvent) -> None:
+                self._remove_favorite(item.id)
+                row.opacity = 0.4
+                row.disabled = True
+                row.update()
+
+            row.controls = [
+                ft.Column(
+                    [
+                        ft.Text(item.title, size=13, max_lines=1, overflow=ft.TextOverflow.ELLIPSIS),
+                        ft.Text(
+                            folder_names.get(item.folder_id, item.folder_id),
+                            size=11,
+                            color=ft.Colors.GREY,
+                        ),
+                    ],
+                    spacing=0,
+                    expand=True,
+                ),
+                ft.IconButton(
+                    icon=ft.Icons.DELETE_OUTLINE,
+                    tooltip="移除该收藏",
+                    on_click=_remove,
+                ),
+            ]
+            return row
+
+        sections: list[ft.Control] = []
+        for index, group in enumerate(groups, start=1):
+            sections.append(ft.Text(f"第 {index} 组（{len(group)} 项）", weight=ft.FontWeight.BOLD))
+            sections.extend(_build_row(item) for item in group)
+            sections.append(ft.Divider(height=1))
+
+        dialog = ft.AlertDialog(
+            modal=True,
+            title=ft.Text(f"发现 {len(groups)} 组重复收藏"),
+            content=ft.Container(
+                width=420,
+                height=360,
+                content=ft.Column(sections, spacing=6, scroll=ft.ScrollMode.AUTO),
+            ),
+            actions=[ft.TextButton("关闭", on_click=lambda _: self._close_dialog())],
+        )
+        self._open_dialog(dialog)
+
     def _handle_localize_single_item(self, item_id: str) -> None:
         item = self._favorite_manager.get_item(item_id)
         if not item:
@@ -14022,6 +14602,34 @@ class Pages:
 
         self.page.run_task(_runner)
 
+    @staticmethod
+    def _make_throttled_progress(
+        progress_bar: ft.ProgressBar | None,
+        status_text: ft.Text | None,
+        template: str,
+    ) -> Callable[[int, int], None]:
+        """返回 ``(done, total)`` 进度回调，至多每 0.1 秒刷新一次界面（完成时总会刷新）。
+
+        ``template`` 用 ``done`` / ``total`` 格式化，例如 ``"正在打包资源 {done}/{total}…"``。
+        """
+        last_update = 0.0
+
+        def _on_progress(done: int, total: int) -> None:
+            nonlocal last_update
+            now = time.monotonic()
+            if done < total and now - last_update < 0.1:
+                return
+            last_update = now
+            if progress_bar is not None:
+                progress_bar.value = done / total if total else 1
+            if status_text is not None:
+                status_text.value = template.format(done=done, total=total)
+            for control in (progress_bar, status_text):
+                if control is not None and control.page is not None:
+                    control.update()
+
+        return _on_progress
+
     def _open_export_dialog(self) -> None:
         folders = self._favorite_folders()
         if not folders:
@@ -14079,18 +14687,25 @@ class Pages:
         )
 
         status_text = ft.Text("选择要导出的收藏夹，并指定导出文件路径。", size=12)
+        progress_bar = ft.ProgressBar(value=0, visible=False)
 
         def _submit(_: ft.ControlEvent | None = None) -> None:
             if not selected_ids:
                 self._show_snackbar("请至少选择一个收藏夹。", error=True)
                 return
             target = Path(path_field.value).expanduser()
+            _on_progress = self._make_throttled_progress(
+                progress_bar, status_text, "正在打包资源 {done}/{total}…",
+            )
 
             async def _runner() -> None:
                 export_button = export_button_holder["button"]
                 if isinstance(export_button, ft.Control):
                     export_button.disabled = True
                     export_button.update()
+                progress_bar.value = 0
+                progress_bar.visible = True
+                progress_bar.update()
                 try:
                     target.parent.mkdir(parents=True, exist_ok=True)
                     folder_list = list(selected_ids)
@@ -14098,6 +14713,7 @@ class Pages:
                         self._favorite_manager.export_folders,
                         target,
                         folder_list,
+                        progress_callback=_on_progress,
                     )
                     self._show_snackbar(f"收藏已导出到 {target}。")
                     self._close_dialog()
@@ -14108,6 +14724,9 @@ class Pages:
                     if isinstance(export_button, ft.Control):
                         export_button.disabled = False
                         export_button.update()
+                    if progress_bar.page is not None:
+                        progress_bar.visible = False
+                        progress_bar.update()
 
             self.page.run_task(_runner)
 
@@ -14126,6 +14745,7 @@ class Pages:
                     select_all_checkbox,
                     ft.Column([cb for cb, _ in folder_checkboxes], spacing=4),
                     path_field,
+                    progress_bar,
                 ],
                 spacing=12,
                 tight=True,
@@ -14154,20 +14774,28 @@ class Pages:
         )
 
         status_text = ft.Text("选择导入包后，系统会合并收藏夹及收藏记录。", size=12)
+        progress_bar = ft.ProgressBar(value=0, visible=False)
 
         def _submit(_: ft.ControlEvent | None = None) -> None:
             path = Path(path_field.value).expanduser()
             if not path.exists():
                 self._show_snackbar("指定的导入文件不存在。", error=True)
                 return
+            _on_progress = self._make_throttled_progress(
+                progress_bar, status_text, "正在导入资源 {done}/{total}…",
+            )
 
             async def _runner() -> None:
                 import_button.disabled = True
                 import_button.update()
+                progress_bar.value = 0
+                progress_bar.visible = True
+                progress_bar.update()
                 try:
                     folders, items = await asyncio.to_thread(
                         self._favorite_manager.import_folders,
                         path,
+                        progress_callback=_on_progress,
                     )
                     self._show_snackbar(
                         f"导入完成：新增收藏夹 {folders} 个，收藏 {items} 条。",
@@ -14181,6 +14809,9 @@ class Pages:
                 finally:
                     import_button.disabled = False
                     import_button.update()
+                    if progress_bar.page is not None:
+                        progress_bar.visible = False
+                        progress_bar.update()
 
             self.page.run_task(_runner)
 
@@ -14196,7 +14827,7 @@ class Pages:
             content=ft.Container(
                 width=420,
                 content=ft.Column(
-                    [status_text, path_field],
+                    [status_text, path_field, progress_bar],
                     spacing=12,
                     tight=True,
                 ),
@@ -14267,8 +14898,14 @@ class Pages:
         self._open_favorite_editor(payload, item_id=item.id)
 
     def _schedule_favorite_classification(self, item_id: str) -> None:
+        self._favorite_manager.enqueue_classification([item_id])
+
+    def _on_favorite_classification_batch(self, item_ids: list[str]) -> None:
+        # 在分类队列所在的循环或后备线程上调用，统一通过 run_task 刷新界面
+        if not item_ids or self.page is None:
+            return
+
         async def _runner() -> None:
-            await self._favorite_manager.maybe_classify_item(item_id)
             self._refresh_favorite_tabs()
 
         self.page.run_task(_runner)
@@ -16387,6 +17024,8 @@ class Pages:
             logger.error("下载失败: {}", exc)
             self._show_snackbar("下载失败，请查看日志。", error=True)
         else:
+            for path in paths:
+                self._record_downloaded_file(path)
             if paths:
                 if len(paths) == 1:
                     self._show_snackbar(f"已下载到 {paths[0]}")
@@ -16576,6 +17215,11 @@ class Pages:
             tooltip="本地化当前视图收藏",
             on_click=self._handle_localize_current_folder,
         )
+        self._favorite_dedup_button = ft.IconButton(
+            icon=ft.Icons.CONTENT_COPY,
+            tooltip="查找重复收藏",
+            on_click=self._handle_find_favorite_duplicates,
+        )
         self._favorite_export_button = ft.IconButton(
             icon=ft.Icons.CLOUD_UPLOAD,
             tooltip="导出收藏",
@@ -16625,6 +17269,7 @@ class Pages:
             controls=[
                 add_local_fav_button,
                 self._favorite_localize_button,
+                self._favorite_dedup_button,
                 self._favorite_export_button,
                 self._favorite_import_button,
                 ft.IconButton(
@@ -2,15 +2,31 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
+import os
 import platform
-import shutil
 import subprocess
+from collections.abc import Callable, Iterable
 from dataclasses import dataclass
 from pathlib import Path
-from typing import NamedTuple
+from threading import Event, RLock
+from typing import Any, NamedTuple
 
 from loguru import logger
 
+from app.paths import CACHE_DIR
+
+try:
+    from send2trash import send2trash
+except ImportError:
+    send2trash = None
+
+STATS_INDEX_PATH = CACHE_DIR / "download_stats_index.json"
+_STATS_INDEX_VERSION = 1
+# 清空下载文件夹时每批处理的条目数：每批之后检查取消、汇报进度并更新统计索引
+_CLEAR_BATCH_SIZE = 256
+
 
 class DownloadLocationType:
     """下载位置类型常量。"""
@@ -29,6 +45,316 @@ class DownloadStats(NamedTuple):
     location: Path
 
 
+class DownloadStatsIndex:
+    """下载文件夹的持久化统计索引。
+
+    按目录记录其中每个文件的大小与修改时间，以及目录自身的修改时间。
+    应用写入或删除文件后调用 :meth:`record_file` 增量更新，只改动该文件的条目；
+    目录记录的修改时间保持不变，下次对账时重新扫描该目录（在工作线程中），
+    同期外部程序的增删也会一并发现；
+    :meth:`reconcile` 只重新扫描修改时间发生变化的目录（新增、删除、重命名
+    都会改变所在目录的修改时间），:meth:`totals` 直接返回内存中的汇总值。
+
+    外部程序原地改写文件内容不会改变目录修改时间，这类变化要等
+    ``reconcile(full=True)`` 才会反映到统计中。
+    """
+
+    def __init__(self, path: Path = STATS_INDEX_PATH, *, exclude: Iterable[str] = ()) -> None:
+        self._path = path
+        # 根目录下不计入统计的文件名（例如下载文件夹标识文件）
+        self._exclude = frozenset(exclude)
+        self._lock = RLock()
+        self._loaded = False
+        self._root: str | None = None
+        # 相对目录（以 / 分隔，根目录为空串）-> {"mtime", "files": {文件名: [大小, 修改时间]}, "dirs": [子目录名]}
+        self._dirs: dict[str, dict[str, Any]] = {}
+        self._totals: tuple[int, int, float | None] | None = None
+        self._dirty = False
+
+    @property
+    def root(self) -> str | None:
+        return self._root
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def _ensure_loaded(self) -> None:
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            try:
+                if not self._path.exists():
+                    return
+                data = json.loads(self._path.read_text(encoding="utf-8"))
+                if not isinstance(data, dict) or data.get("version") != _STATS_INDEX_VERSION:
+                    return
+                dirs = data.get("dirs")
+                if isinstance(data.get("root"), str) and isinstance(dirs, dict):
+                    self._root = data["root"]
+                    self._dirs = {
+                        str(key): value for key, value in dirs.items() if isinstance(value, dict)
+                    }
+            except Exception as exc:
+                logger.warning("读取下载统计索引失败，将重新扫描: {error}", error=str(exc))
+                self._root = None
+                self._dirs = {}
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = json.dumps(
+                {"version": _STATS_INDEX_VERSION, "root": self._root, "dirs": self._dirs},
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+            self._dirty = False
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._path.with_suffix(".tmp")
+            tmp_path.write_text(payload, encoding="utf-8")
+            tmp_path.replace(self._path)
+        except Exception as exc:
+            logger.warning("保存下载统计索引失败: {error}", error=str(exc))
+
+    def _abspath(self, relative: str) -> str:
+        assert self._root is not None
+        return os.path.join(self._root, *relative.split("/")) if relative else self._root
+
+    def _scan_directory(self, relative: str) -> dict[str, Any] | None:
+        """用 ``os.scandir`` 扫描单个目录（不递归）；目录不存在时返回 ``None``。"""
+        path = self._abspath(relative)
+        try:
+            # 先取目录修改时间再列目录：扫描期间发生的改动会让下次对账重新扫描该目录
+            mtime = os.stat(path).st_mtime
+            files: dict[str, list[float]] = {}
+            subdirs: list[str] = []
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                        elif entry.is_file():
+                            if not relative and entry.name in self._exclude:
+                                continue
+                            stat = entry.stat()
+                            files[entry.name] = [stat.st_size, stat.st_mtime]
+                    except OSError:
+                        continue
+        except OSError:
+            return None
+        return {"mtime": mtime, "files": files, "dirs": subdirs}
+
+    def _reset(self, root: str) -> None:
+        self._root = root
+        self._dirs = {}
+        self._totals = None
+        self._dirty = True
+
+    def reconcile(self, root: str | Path, *, full: bool = False) -> None:
+        """使索引与磁盘一致。阻塞调用，请在工作线程中使用。
+
+        未变化的目录只需一次 ``stat``；``full=True`` 时重新扫描所有目录。
+        """
+        root_key = os.path.abspath(root)
+        with self._lock:
+            self._ensure_loaded()
+            if self._root != root_key:
+                self._reset(root_key)
+            known = {relative: entry.get("mtime") for relative, entry in self._dirs.items()}
+
+        seen: set[str] = set()
+        stack = [""]
+        while stack:
+            relative = stack.pop()
+            try:
+                mtime = os.stat(self._abspath(relative)).st_mtime
+            except OSError:
+                continue
+            if not full and known.get(relative) == mtime:
+                with self._lock:
+                    entry = self._dirs.get(relative)
+            else:
+                entry = self._scan_directory(relative)
+                if entry is None:
+                    continue
+                with self._lock:
+                    if self._root != root_key:
+                        return
+                    self._dirs[relative] = entry
+                    self._totals = None
+                    self._dirty = True
+            seen.add(relative)
+            if entry is not None:
+                stack.extend(f"{relative}/{name}" if relative else name for name in entry["dirs"])
+
+        with self._lock:
+            if self._root == root_key:
+                for relative in [key for key in self._dirs if key not in seen]:
+                    del self._dirs[relative]
+                    self._totals = None
+                    self._dirty = True
+        self.save()
+
+    def _locate(self, path: str | Path) -> tuple[str, str] | None:
+        if self._root is None:
+            return None
+        try:
+            relative = os.path.relpath(os.path.abspath(path), self._root)
+        except ValueError:  # Windows 下位于不同驱动器
+            return None
+        if relative == os.curdir or relative == os.pardir or relative.startswith(os.pardir + os.sep):
+            return None
+        parent, name = os.path.split(relative)
+        return parent.replace(os.sep, "/"), name
+
+    def _ensure_directory(self, relative: str) -> dict[str, Any] | None:
+        """返回目录条目；父目录已建立索引而该目录是新建的，则立即扫描并登记。"""
+        entry = self._dirs.get(relative)
+        if entry is not None or not relative:
+            return entry
+        parent, _, name = relative.rpartition("/")
+        parent_entry = self._ensure_directory(parent)
+        if parent_entry is None:
+            return None
+        entry = self._scan_directory(relative)
+        if entry is None:
+            return None
+        self._dirs[relative] = entry
+        self._totals = None
+        if name not in parent_entry["dirs"]:
+            parent_entry["dirs"].append(name)
+        return entry
+
+    def record_file(self, path: str | Path) -> bool:
+        """应用写入或删除文件后调用；返回文件是否位于已索引的目录中。
+
+        尚未建立索引时直接忽略，留给下一次 :meth:`reconcile`。
+        """
+        with self._lock:
+            if not self._loaded:
+                return False
+            located = self._locate(path)
+            if located is None:
+                return False
+            relative, name = located
+            if not relative and name in self._exclude:
+                return False
+            entry = self._ensure_directory(relative)
+            if entry is None:
+                return False
+            try:
+                stat = os.stat(os.path.join(self._abspath(relative), name))
+            except OSError:
+                current = None
+            else:
+                current = [stat.st_size, stat.st_mtime]
+            previous = entry["files"].pop(name, None)
+            if current is not None:
+                entry["files"][name] = current
+            self._update_totals(previous, current)
+            self._dirty = True
+            return True
+
+    def _update_totals(self, previous: list[float] | None, current: list[float] | None) -> None:
+        # 增量调整汇总值；被删除的恰好是最新文件时才需要重新汇总
+        if self._totals is None:
+            return
+        total_files, total_size, latest = self._totals
+        if previous is not None:
+            total_files -= 1
+            total_size -= previous[0]
+            if latest is not None and previous[1] >= latest:
+                self._totals = None
+                return
+        if current is not None:
+            total_files += 1
+            total_size += current[0]
+            if latest is None or current[1] > latest:
+                latest = current[1]
+        self._totals = (total_files, total_size, latest)
+
+    def remove_files(self, paths: Iterable[str | Path]) -> int:
+        """把已删除的文件移出索引，返回索引中记录的这些文件的总字节数。"""
+        freed = 0
+        with self._lock:
+            for path in paths:
+                located = self._locate(path)
+                if located is None:
+                    continue
+                relative, name = located
+                entry = self._dirs.get(relative)
+                if entry is None:
+                    continue
+                previous = entry["files"].pop(name, None)
+                if previous is None:
+                    continue
+                freed += previous[0]
+                self._update_totals(previous, None)
+                self._dirty = True
+        return freed
+
+    def forget_directory(self, path: str | Path) -> None:
+        """目录被删除后调用，移除它及其子目录的条目。"""
+        with self._lock:
+            located = self._locate(path)
+            if located is None:
+                return
+            parent, name = located
+            relative = f"{parent}/{name}" if parent else name
+            prefix = relative + "/"
+            for key in [key for key in self._dirs if key == relative or key.startswith(prefix)]:
+                del self._dirs[key]
+            parent_entry = self._dirs.get(parent)
+            if parent_entry is not None and name in parent_entry["dirs"]:
+                parent_entry["dirs"].remove(name)
+            self._totals = None
+            self._dirty = True
+
+    def totals(self) -> tuple[int, int, float | None]:
+        """返回 ``(文件数, 总字节数, 最近修改时间)``，不访问磁盘。"""
+        with self._lock:
+            if self._totals is None:
+                total_files = 0
+                total_size = 0
+                latest: float | None = None
+                for entry in self._dirs.values():
+                    files = entry["files"]
+                    total_files += len(files)
+                    for size, mtime in files.values():
+                        total_size += size
+                        if latest is None or mtime > latest:
+                            latest = mtime
+                self._totals = (total_files, total_size, latest)
+            return self._totals
+
+
+@dataclass
+class ClearProgress:
+    """清空下载文件夹的进度信息。"""
+
+    processed_count: int
+    total_count: int
+    freed_bytes: int
+    current_file: str
+
+
+@dataclass
+class ClearResult:
+    """清空下载文件夹的结果。"""
+
+    success: bool
+    message: str
+    deleted_files: int = 0
+    failed_files: int = 0
+    deleted_folders: int = 0
+    freed_bytes: int = 0
+    cancelled: bool = False
+    moved_to_trash: bool = False
+
+
 @dataclass
 class DownloadLocation:
     """下载位置配置。"""
@@ -46,6 +372,22 @@ class DownloadManager:
         self._download_marker_file = "小树壁纸下载文件夹.txt"
         self._download_folder_name = "小树壁纸"  # 专用下载文件夹名称
         self._config_key_prefix = "download"
+        self._stats_index = DownloadStatsIndex(exclude=(self._download_marker_file,))
+        self._clear_cancel_event: Event | None = None
+
+    @property
+    def trash_available(self) -> bool:
+        """是否支持“移到回收站”（需要可选依赖 send2trash）。"""
+        return send2trash is not None
+
+    @property
+    def is_clearing(self) -> bool:
+        return self._clear_cancel_event is not None
+
+    def cancel_clear(self) -> None:
+        """请求取消正在进行的清空操作；当前批次处理完后停止。"""
+        if self._clear_cancel_event is not None:
+            self._clear_cancel_event.set()
 
     def get_system_download_location(self) -> Path:
         """获取系统下载文件夹路径。"""
@@ -186,34 +528,40 @@ class DownloadManager:
         return location.path
 
     def get_download_stats(self, app_config) -> DownloadStats:
-        """获取下载统计数据。"""
+        """获取下载统计数据。
+
+        先按目录修改时间与统计索引对账，只重新扫描发生变化的目录；
+        首次调用需要完整遍历文件夹，请在工作线程中调用。
+        """
         folder_path = self.get_download_folder_path(app_config)
         if not folder_path or not folder_path.exists():
             return DownloadStats(0, 0, None, Path())
 
-        total_files = 0
-        total_size = 0
-        last_download_time = None
-
         try:
-            # 统计专用文件夹中的所有文件（排除标识文件）
-            marker_path = folder_path / self._download_marker_file
-
-            for file_path in folder_path.rglob("*"):
-                if file_path.is_file() and file_path != marker_path:
-                    total_files += 1
-                    try:
-                        total_size += file_path.stat().st_size
-                        file_mtime = file_path.stat().st_mtime
-                        if last_download_time is None or file_mtime > last_download_time:
-                            last_download_time = file_mtime
-                    except (OSError, PermissionError):
-                        continue
+            self._stats_index.reconcile(folder_path)
         except Exception as e:
             logger.error(f"统计下载文件夹时出错: {e}")
 
+        total_files, total_size, last_download_time = self._stats_index.totals()
         return DownloadStats(total_files, total_size, last_download_time, folder_path)
 
+    def peek_download_stats(self, app_config) -> DownloadStats | None:
+        """立即返回索引中的统计数据，不访问磁盘；索引尚未就绪时返回 ``None``。"""
+        folder_path = self.get_download_folder_path(app_config)
+        if not folder_path or not self._stats_index.loaded:
+            return None
+        if self._stats_index.root != os.path.abspath(folder_path):
+            return None
+        total_files, total_size, last_download_time = self._stats_index.totals()
+        return DownloadStats(total_files, total_size, last_download_time, folder_path)
+
+    def record_download(self, file_path: str | Path) -> None:
+        """应用在下载文件夹中写入或删除文件后调用，增量更新统计索引。"""
+        try:
+            self._stats_index.record_file(file_path)
+        except Exception as e:
+            logger.debug(f"更新下载统计索引失败 {file_path}: {e}")
+
     def format_file_size(self, size_bytes: int) -> str:
         """格式化文件大小。"""
         if size_bytes == 0:
@@ -262,55 +610,179 @@ class DownloadManager:
             logger.error(f"打开下载文件夹失败: {e}")
             return False
 
-    def clear_download_folder(self, app_config) -> tuple[bool, str]:
-        """清空下载文件夹（保留标识文件）。"""
+    def clear_download_folder(self, app_config, *, move_to_trash: bool = False) -> tuple[bool, str]:
+        """清空下载文件夹（保留标识文件）。阻塞调用，界面中请使用 :meth:`clear_download_folder_async`。"""
+        result = self._clear_folder(app_config, move_to_trash=move_to_trash)
+        return result.success, result.message
+
+    async def clear_download_folder_async(
+        self,
+        app_config,
+        *,
+        move_to_trash: bool = False,
+        progress_callback: Callable[[ClearProgress], None] | None = None,
+        cancel_event: Event | None = None,
+    ) -> ClearResult:
+        """在工作线程中清空下载文件夹（保留标识文件）。
+
+        ``progress_callback`` 在调用方的事件循环中执行，每处理一批文件回调一次；
+        调用 :meth:`cancel_clear` 或设置 ``cancel_event`` 可以在批次之间取消。
+        """
+        if self._clear_cancel_event is not None:
+            raise RuntimeError("正在清空下载文件夹")
+        cancel_event = cancel_event or Event()
+        self._clear_cancel_event = cancel_event
+        loop = asyncio.get_running_loop()
+
+        def _report(progress: ClearProgress) -> None:
+            if progress_callback is not None:
+                loop.call_soon_threadsafe(progress_callback, progress)
+
+        try:
+            return await asyncio.to_thread(
+                self._clear_folder,
+                app_config,
+                move_to_trash=move_to_trash,
+                progress_callback=_report,
+                cancel_event=cancel_event,
+            )
+        finally:
+            self._clear_cancel_event = None
+
+    def _clear_folder(
+        self,
+        app_config,
+        *,
+        move_to_trash: bool = False,
+        progress_callback: Callable[[ClearProgress], None] | None = None,
+        cancel_event: Event | None = None,
+    ) -> ClearResult:
         folder_path = self.get_download_folder_path(app_config)
         if not folder_path or not folder_path.exists():
-            return False, "下载文件夹不存在"
+            return ClearResult(False, "下载文件夹不存在")
+        if move_to_trash and send2trash is None:
+            return ClearResult(False, "未安装 send2trash，无法移到回收站")
 
+        cancel_event = cancel_event or Event()
+        index = self._stats_index
+        result = ClearResult(False, "", moved_to_trash=move_to_trash)
         try:
-            # 获取标识文件路径
-            marker_path = folder_path / self._download_marker_file
-
-            # 获取要删除的文件列表（包括子文件夹）
-            files_to_delete = []
-            for file_path in folder_path.rglob("*"):
-                if file_path.is_file() and file_path != marker_path:
-                    files_to_delete.append(file_path)
-
-            # 删除子文件夹
-            folders_to_delete = []
-            for folder_path_item in folder_path.iterdir():
-                if folder_path_item.is_dir() and folder_path_item.name != self._download_folder_name:
-                    folders_to_delete.append(folder_path_item)
-
-            if not files_to_delete and not folders_to_delete:
-                return True, "文件夹已经是空的"
-
-            # 删除文件
-            deleted_count = 0
-            for file_path in files_to_delete:
-                try:
-                    file_path.unlink()
-                    deleted_count += 1
-                except (OSError, PermissionError) as e:
-                    logger.warning(f"无法删除文件 {file_path}: {e}")
-
-            # 删除子文件夹
-            for folder_path_item in folders_to_delete:
+            # 先与磁盘对账：总数用于进度，释放的字节数直接取自索引，无需再逐个 stat
+            index.reconcile(folder_path)
+            total_count = index.totals()[0]
+            processed = 0
+            root = str(folder_path)
+            marker_path = os.path.join(root, self._download_marker_file)
+            folders: list[str] = []
+            batch: list[str] = []
+
+            def _flush() -> None:
+                nonlocal processed
+                if not batch:
+                    return
+                removed = self._delete_batch(batch, move_to_trash)
+                result.deleted_files += len(removed)
+                result.failed_files += len(batch) - len(removed)
+                result.freed_bytes += index.remove_files(removed)
+                processed += len(batch)
+                if progress_callback is not None:
+                    progress_callback(
+                        ClearProgress(
+                            processed_count=processed,
+                            total_count=max(total_count, processed),
+                            freed_bytes=result.freed_bytes,
+                            current_file=batch[-1],
+                        )
+                    )
+                batch.clear()
+
+            stack = [root]
+            while stack and not cancel_event.is_set():
+                directory = stack.pop()
+                if directory != root:
+                    folders.append(directory)
                 try:
-                    shutil.rmtree(folder_path_item)
-                    deleted_count += 1
-                except (OSError, PermissionError) as e:
-                    logger.warning(f"无法删除文件夹 {folder_path_item}: {e}")
-
-            logger.info(f"已清空下载文件夹，删除了 {deleted_count} 个文件/文件夹")
-            return True, f"已删除 {deleted_count} 个项目"
-
+                    with os.scandir(directory) as entries:
+                        for entry in entries:
+                            try:
+                                is_dir = entry.is_dir(follow_symlinks=False)
+                            except OSError:
+                                is_dir = False
+                            if is_dir:
+                                stack.append(entry.path)
+                                continue
+                            if entry.path == marker_path:
+                                continue
+                            batch.append(entry.path)
+                            if len(batch) >= _CLEAR_BATCH_SIZE:
+                                _flush()
+                                if cancel_event.is_set():
+                                    break
+                except OSError as e:
+                    logger.warning(f"无法读取文件夹 {directory}: {e}")
+            if not cancel_event.is_set():
+                _flush()
+            batch.clear()
+
+            # 由深到浅删除已经清空的子文件夹（其中仍有删除失败的文件时保留）
+            if not cancel_event.is_set():
+                for directory in reversed(folders):
+                    try:
+                        os.rmdir(directory)
+                    except OSError:
+                        continue
+                    result.deleted_folders += 1
+                    index.forget_directory(directory)
         except Exception as e:
-            error_msg = f"清空文件夹时出错: {e}"
-            logger.error(error_msg)
-            return False, error_msg
+            result.message = f"清空文件夹时出错: {e}"
+            logger.error(result.message)
+            return result
+        finally:
+            index.save()
+
+        result.cancelled = cancel_event.is_set()
+        result.success = not result.failed_files
+        action = "移到回收站" if move_to_trash else "删除"
+        freed_text = self.format_file_size(result.freed_bytes)
+        if result.cancelled:
+            result.message = f"已取消，{action}了 {result.deleted_files} 个文件（{freed_text}）"
+        elif not result.deleted_files and not result.deleted_folders and not result.failed_files:
+            result.message = "文件夹已经是空的"
+        elif result.failed_files:
+            result.message = f"已{action} {result.deleted_files} 个文件，{result.failed_files} 个文件无法{action}"
+        else:
+            result.message = f"已{action} {result.deleted_files} 个文件，释放 {freed_text}"
+        logger.info(
+            f"清空下载文件夹：{action} {result.deleted_files} 个文件、{result.deleted_folders} 个文件夹，"
+            f"失败 {result.failed_files}，释放 {result.freed_bytes} 字节"
+        )
+        return result
+
+    @staticmethod
+    def _delete_batch(paths: list[str], move_to_trash: bool) -> list[str]:
+        """删除（或移到回收站）一批文件，返回成功处理的路径。"""
+        if move_to_trash:
+            try:
+                send2trash(list(paths))
+                return list(paths)
+            except Exception:
+                # 整批失败时逐个重试，找出具体失败的文件
+                pass
+        removed: list[str] = []
+        for path in paths:
+            try:
+                if move_to_trash:
+                    send2trash(path)
+                else:
+                    os.unlink(path)
+            except Exception as e:
+                if not os.path.lexists(path):
+                    removed.append(path)
+                    continue
+                logger.warning(f"无法删除文件 {path}: {e}")
+                continue
+            removed.append(path)
+        return removed
 
     def validate_custom_path(self, path_str: str) -> tuple[bool, str]:
         """验证自定义路径是否有效。"""
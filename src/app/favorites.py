@@ -2,32 +2,190 @@
 
 from __future__ import annotations
 
+import asyncio
+import atexit
+import base64
+import bisect
+import concurrent.futures
+import copy
 import hashlib
 import inspect
 import json
+import os
 import re
-import shutil
-import tempfile
 import time
 import uuid
-from collections.abc import Awaitable, Sequence
-from dataclasses import dataclass, field
+from collections import Counter, deque
+from collections.abc import Awaitable, Callable, Iterable, Iterator, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import FrozenInstanceError, dataclass, field, replace
 from pathlib import Path
-from threading import RLock
-from typing import Any, Literal, Protocol, Union
-from zipfile import ZIP_DEFLATED, ZipFile
+from threading import Event, Lock, RLock, Thread, Timer
+from typing import IO, Any, Literal, Protocol
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile, ZipInfo
 
 from loguru import logger
 
+import ltwapi
 from app.constants import BUILD_VERSION
+from app.content_store import ContentStore, hash_file
+from app.favorites_storage import (
+    STORAGE_BACKEND_JSON,
+    STORAGE_BACKEND_SQLITE,
+    FavoriteChangeSet,
+    FavoriteStorage,
+    JsonFavoriteStorage,
+    SQLiteFavoriteStorage,
+)
+from app.image_features import (
+    DARK_LUMINANCE,
+    LIGHT_LUMINANCE,
+    ImageFeatures,
+    compute_features_batch,
+)
+from app.image_hash import (
+    DEFAULT_MAX_DISTANCE,
+    BKTree,
+    ImageHashes,
+    compute_hashes,
+    find_duplicate_groups,
+)
 from app.paths import DATA_DIR
-
-ClassifierResult = Union["FavoriteAIResult", Awaitable["FavoriteAIResult | None"], None]
-
+from app.search_index import normalize_text
 
 EXPORT_PACKAGE_VERSION = 2
 EXPORT_DATA_FILENAME = "favorites.json"
 
+# 已压缩的图片格式直接以 STORED 写入导出包，避免无意义的二次压缩
+_EXPORT_STORED_SUFFIXES = frozenset(
+    {".jpg", ".jpeg", ".png", ".webp", ".avif", ".gif", ".heic", ".heif", ".jxl"},
+)
+# 不超过该大小的资源由线程池整块读入并计算校验和，更大的文件在写包时流式处理
+_EXPORT_INLINE_MAX_BYTES = 32 * 1024 * 1024
+# 预读窗口中已读入内存、尚未写入导出包的资源总大小上限
+_EXPORT_READ_AHEAD_BYTES = 64 * 1024 * 1024
+_EXPORT_WORKERS = 4
+_COPY_CHUNK_SIZE = 1024 * 1024
+
+ProgressCallback = Callable[[int, int], None]
+
+LOCALIZATION_JOB_FILENAME = "localization_job.json"
+# 批量本地化：并发下载数、单项重试次数、进度回调的最小间隔
+_LOCALIZE_WORKERS = 6
+_LOCALIZE_RETRIES = 2
+_LOCALIZE_PROGRESS_INTERVAL = 0.2
+_LOCALIZE_JOB_SAVE_INTERVAL = 1.0
+
+# 感知哈希保存在 FavoriteItem.extra 的该键下，附带文件大小与修改时间用于判断是否过期
+IMAGE_HASH_EXTRA_KEY = "image_hash"
+_HASH_WORKERS = 4
+# 外观特征（主色 / 亮度 / 宽高比）保存在 extra 的该键下，同样附带文件大小与修改时间
+IMAGE_FEATURES_EXTRA_KEY = "image_features"
+# 按颜色查询时默认允许的 RGB 欧氏距离
+_DEFAULT_COLOR_DISTANCE = 80.0
+
+# AI 分类队列：默认批大小、同时进行的批次数、入队后等待合批的时间
+_CLASSIFY_BATCH_SIZE = 16
+_CLASSIFY_CONCURRENCY = 2
+_CLASSIFY_GATHER_DELAY = 0.3
+
+# 写回延迟：连续修改在该时间窗口内合并为一次落盘，最长不超过 _SAVE_MAX_DELAY
+_SAVE_DEBOUNCE_SECONDS = 0.5
+_SAVE_MAX_DELAY_SECONDS = 3.0
+
+
+class _ReadOnlyDict(dict):
+    """``dict`` inside a published favorite snapshot; rejects mutation."""
+
+    __slots__ = ()
+
+    def _reject(self, *_args: Any, **_kwargs: Any) -> None:
+        raise TypeError("favorite snapshots are read-only; modify them through FavoriteManager")
+
+    __setitem__ = __delitem__ = __ior__ = _reject
+    clear = pop = popitem = setdefault = update = _reject
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (dict, (dict(self),))
+
+    def __copy__(self) -> dict[str, Any]:
+        return dict(self)
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> dict[str, Any]:
+        return {key: copy.deepcopy(value, memo) for key, value in self.items()}
+
+
+class _ReadOnlyList(list):
+    """``list`` inside a published favorite snapshot; rejects mutation."""
+
+    __slots__ = ()
+
+    def _reject(self, *_args: Any, **_kwargs: Any) -> None:
+        raise TypeError("favorite snapshots are read-only; modify them through FavoriteManager")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _reject
+    append = extend = insert = pop = remove = clear = sort = reverse = _reject
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (list, (list(self),))
+
+    def __copy__(self) -> list[Any]:
+        return list(self)
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> list[Any]:
+        return [copy.deepcopy(value, memo) for value in self]
+
+
+def _freeze_value(value: Any) -> Any:
+    if isinstance(value, (_ReadOnlyDict, _ReadOnlyList)):
+        return value
+    if isinstance(value, dict):
+        return _ReadOnlyDict({key: _freeze_value(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return _ReadOnlyList(_freeze_value(item) for item in value)
+    return value
+
+
+def _thaw_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _thaw_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_thaw_value(item) for item in value]
+    return value
+
+
+class _Snapshot:
+    """Mixin for model objects that become immutable once the manager publishes them.
+
+    The manager edits private copies (``copy()`` always returns a mutable
+    object) and publishes them when the change is recorded; published objects
+    are what the read APIs hand out, so callers cannot change stored state
+    behind the manager's back.
+    """
+
+    __slots__ = ()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if getattr(self, "_published", False):
+            raise FrozenInstanceError(
+                f"cannot assign to field {name!r}: favorite snapshots are read-only",
+            )
+        object.__setattr__(self, name, value)
+
+    def _freeze_fields(self) -> None:  # pragma: no cover - overridden
+        pass
+
+    def publish(self) -> None:
+        if getattr(self, "_published", False):
+            return
+        self._freeze_fields()
+        object.__setattr__(self, "_published", True)
+
+    @property
+    def published(self) -> bool:
+        return getattr(self, "_published", False)
+
 
 class FavoriteClassifier(Protocol):
     """Callable interface used to plug in AI-assisted classification."""
@@ -36,8 +194,24 @@ class FavoriteClassifier(Protocol):
         ...
 
 
+class BatchFavoriteClassifier(Protocol):
+    """Batch-capable classifier: one call handles several items.
+
+    ``classify_batch`` returns one result (or ``None``) per input item, in
+    input order. ``batch_size`` caps how many items are sent per call.
+    """
+
+    batch_size: int
+
+    def classify_batch(
+        self,
+        items: Sequence[FavoriteItem],
+    ) -> BatchClassifierResult:  # pragma: no cover - Protocol signature
+        ...
+
+
 @dataclass(slots=True)
-class FavoriteSource:
+class FavoriteSource(_Snapshot):
     """Origin metadata describing where a favorite entry comes from."""
 
     type: str = "unknown"
@@ -47,6 +221,10 @@ class FavoriteSource:
     preview_url: str | None = None
     local_path: str | None = None
     extra: dict[str, Any] = field(default_factory=dict)
+    _published: bool = field(default=False, init=False, repr=False, compare=False)
+
+    def _freeze_fields(self) -> None:
+        self.extra = _freeze_value(self.extra)
 
     def to_dict(self) -> dict[str, Any]:
         return {
@@ -73,9 +251,12 @@ class FavoriteSource:
             extra=dict(data.get("extra", {})),
         )
 
+    def copy(self) -> FavoriteSource:
+        return replace(self, extra=_thaw_value(self.extra))
+
 
 @dataclass(slots=True)
-class FavoriteAIInfo:
+class FavoriteAIInfo(_Snapshot):
     """Stores AI metadata for a favorite entry."""
 
     status: Literal["idle", "pending", "running", "completed", "failed"] = "idle"
@@ -83,6 +264,11 @@ class FavoriteAIInfo:
     suggested_folder_id: str | None = None
     metadata: dict[str, Any] = field(default_factory=dict)
     updated_at: float | None = None
+    _published: bool = field(default=False, init=False, repr=False, compare=False)
+
+    def _freeze_fields(self) -> None:
+        self.suggested_tags = _freeze_value(self.suggested_tags)
+        self.metadata = _freeze_value(self.metadata)
 
     def to_dict(self) -> dict[str, Any]:
         return {
@@ -105,9 +291,16 @@ class FavoriteAIInfo:
         info.updated_at = data.get("updated_at")
         return info
 
+    def copy(self) -> FavoriteAIInfo:
+        return replace(
+            self,
+            suggested_tags=list(self.suggested_tags),
+            metadata=_thaw_value(self.metadata),
+        )
+
 
 @dataclass(slots=True)
-class FavoriteLocalizationInfo:
+class FavoriteLocalizationInfo(_Snapshot):
     """Tracks localization (downloaded assets) for a favorite entry."""
 
     status: Literal["absent", "pending", "completed", "failed"] = "absent"
@@ -117,6 +310,10 @@ class FavoriteLocalizationInfo:
     message: str | None = None
     checksum: str | None = None
     file_size: int | None = None
+    _published: bool = field(default=False, init=False, repr=False, compare=False)
+
+    def _freeze_fields(self) -> None:
+        pass
 
     def to_dict(self) -> dict[str, Any]:
         return {
@@ -150,9 +347,12 @@ class FavoriteLocalizationInfo:
             info.file_size = None
         return info
 
+    def copy(self) -> FavoriteLocalizationInfo:
+        return replace(self)
+
 
 @dataclass(slots=True)
-class FavoriteItem:
+class FavoriteItem(_Snapshot):
     """Single user favorite entry."""
 
     id: str
@@ -168,6 +368,14 @@ class FavoriteItem:
     ai: FavoriteAIInfo = field(default_factory=FavoriteAIInfo)
     localization: FavoriteLocalizationInfo = field(default_factory=FavoriteLocalizationInfo)
     extra: dict[str, Any] = field(default_factory=dict)
+    _published: bool = field(default=False, init=False, repr=False, compare=False)
+
+    def _freeze_fields(self) -> None:
+        self.tags = _freeze_value(self.tags)
+        self.extra = _freeze_value(self.extra)
+        self.source.publish()
+        self.ai.publish()
+        self.localization.publish()
 
     def to_dict(self) -> dict[str, Any]:
         return {
@@ -204,12 +412,23 @@ class FavoriteItem:
             extra=dict(data.get("extra", {})),
         )
 
+    def copy(self) -> FavoriteItem:
+        """Return an independent copy (used for copy-on-write inside the manager)."""
+        return replace(
+            self,
+            tags=list(self.tags),
+            source=self.source.copy(),
+            ai=self.ai.copy(),
+            localization=self.localization.copy(),
+            extra=_thaw_value(self.extra),
+        )
+
     def update_timestamp(self) -> None:
         self.updated_at = time.time()
 
 
 @dataclass(slots=True)
-class FavoriteFolder:
+class FavoriteFolder(_Snapshot):
     """User-defined folder grouping favorites."""
 
     id: str
@@ -219,6 +438,10 @@ class FavoriteFolder:
     created_at: float = field(default_factory=time.time)
     updated_at: float = field(default_factory=time.time)
     metadata: dict[str, Any] = field(default_factory=dict)
+    _published: bool = field(default=False, init=False, repr=False, compare=False)
+
+    def _freeze_fields(self) -> None:
+        self.metadata = _freeze_value(self.metadata)
 
     def to_dict(self) -> dict[str, Any]:
         return {
@@ -243,6 +466,9 @@ class FavoriteFolder:
             metadata=dict(data.get("metadata", {})),
         )
 
+    def copy(self) -> FavoriteFolder:
+        return replace(self, metadata=_thaw_value(self.metadata))
+
     def touch(self) -> None:
         self.updated_at = time.time()
 
@@ -256,6 +482,104 @@ class FavoriteAIResult:
     metadata: dict[str, Any] = field(default_factory=dict)
 
 
+ClassifierResult = FavoriteAIResult | Awaitable[FavoriteAIResult | None] | None
+BatchClassifierResult = (
+    Sequence[FavoriteAIResult | None] | Awaitable[Sequence[FavoriteAIResult | None]]
+)
+
+
+FavoriteSort = Literal[
+    "updated_desc",
+    "updated_asc",
+    "created_desc",
+    "created_asc",
+    "title_asc",
+    "title_desc",
+]
+
+
+@dataclass(slots=True)
+class FavoriteQueryResult:
+    """One page returned by :meth:`FavoriteManager.query`."""
+
+    items: list[FavoriteItem] = field(default_factory=list)
+    total: int = 0
+    next_cursor: str | None = None
+
+
+@dataclass(slots=True)
+class FavoriteLocalizationProgress:
+    """Progress event emitted by :meth:`FavoriteManager.localize_items`.
+
+    ``finished_ids`` only lists the items finished since the previous event.
+    """
+
+    total: int
+    done: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    finished_ids: list[str] = field(default_factory=list)
+    completed: bool = False
+
+
+@dataclass(slots=True)
+class _ExportAsset:
+    """One file to pack, plus the item payloads that reference it."""
+
+    source: Path
+    rel_path: str
+    payloads: list[dict[str, Any]] = field(default_factory=list)
+
+
+class _ImportPackage:
+    """Read access to an export package, either a ZIP file or a directory.
+
+    Member names are resolved against the package root; names escaping the
+    root (absolute paths, ``..``) are treated as missing.
+    """
+
+    def __init__(self, source_path: Path) -> None:
+        self._root: Path | None = None
+        self._zip: ZipFile | None = None
+        if source_path.is_dir():
+            self._root = source_path.resolve()
+        else:
+            self._zip = ZipFile(source_path, "r")
+
+    def __enter__(self) -> _ImportPackage:
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        if self._zip is not None:
+            self._zip.close()
+
+    def has_assets(self) -> bool:
+        if self._zip is not None:
+            return any(name.startswith("assets/") for name in self._zip.namelist())
+        return self._root is not None and (self._root / "assets").exists()
+
+    def open(self, name: str) -> IO[bytes] | None:
+        normalized = name.replace("\\", "/").lstrip("/")
+        if any(part == ".." for part in normalized.split("/")):
+            return None
+        if self._zip is not None:
+            try:
+                return self._zip.open(normalized, "r")
+            except KeyError:
+                return None
+        root = self._root
+        if root is None:
+            return None
+        candidate = (root / normalized).resolve()
+        try:
+            candidate.relative_to(root)
+        except ValueError:
+            return None
+        if not candidate.is_file():
+            return None
+        return candidate.open("rb")
+
+
 @dataclass(slots=True)
 class FavoriteCollection:
     """Serialized representation of the favorites database."""
@@ -291,8 +615,10 @@ class FavoriteCollection:
         self.folder_order = cleaned_order
         for index, folder_id in enumerate(self.folder_order):
             folder = self.folders.get(folder_id)
-            if folder:
+            if folder and folder.order != index:
+                folder = folder.copy()
                 folder.order = index
+                self.folders[folder_id] = folder
 
     def to_dict(self) -> dict[str, Any]:
         return {
@@ -325,46 +651,459 @@ class FavoriteCollection:
         return collection
 
 
-class FavoriteManager:
-    """High-level API for managing favorites on disk."""
+class _FavoriteIndex:
+    """Incrementally maintained lookup tables over ``FavoriteCollection.items``.
+
+    Ordered listings are kept as ``(updated_at, item_id)`` lists sorted
+    ascending, so the newest items sit at the end and re-timestamping an item
+    is a bisect removal plus an append.
+    """
+
+    __slots__ = (
+        "_by_checksum",
+        "_by_folder",
+        "_by_identifier",
+        "_by_luminance",
+        "_by_tag",
+        "_by_url",
+        "_entries",
+        "_hash_tree",
+        "_recent",
+    )
+
+    def __init__(self) -> None:
+        self._by_identifier: dict[str, dict[str, None]] = {}
+        self._by_url: dict[str, dict[str, None]] = {}
+        self._by_tag: dict[str, set[str]] = {}
+        self._by_checksum: dict[str, set[str]] = {}
+        self._by_folder: dict[str, list[tuple[float, str]]] = {}
+        self._recent: list[tuple[float, str]] = []
+        self._entries: dict[
+            str,
+            tuple[
+                str,
+                str | None,
+                str | None,
+                tuple[str, ...],
+                float,
+                str | None,
+                ImageHashes | None,
+                ImageFeatures | None,
+            ],
+        ] = {}
+        # (luminance, item_id) 升序，用于按亮度区间查询
+        self._by_luminance: list[tuple[float, str]] = []
+        # 感知哈希的 BK 树按需重建：只要有收藏的哈希变化就作废
+        self._hash_tree: BKTree[str] | None = None
+
+    def rebuild(self, items: dict[str, FavoriteItem]) -> None:
+        self._by_identifier.clear()
+        self._by_url.clear()
+        self._by_tag.clear()
+        self._by_checksum.clear()
+        self._by_folder.clear()
+        self._recent.clear()
+        self._entries.clear()
+        self._by_luminance.clear()
+        self._hash_tree = None
+        for item in sorted(items.values(), key=lambda value: value.updated_at):
+            self.update(item)
+
+    @staticmethod
+    def _remove_sorted(entries: list[tuple[float, str]], key: tuple[float, str]) -> None:
+        index = bisect.bisect_left(entries, key)
+        if index < len(entries) and entries[index] == key:
+            del entries[index]
+
+    @staticmethod
+    def _discard(index: dict[str, dict[str, None]], key: str | None, item_id: str) -> None:
+        if not key:
+            return
+        bucket = index.get(key)
+        if bucket is None:
+            return
+        bucket.pop(item_id, None)
+        if not bucket:
+            del index[key]
+
+    def remove(self, item_id: str) -> None:
+        entry = self._entries.pop(item_id, None)
+        if entry is None:
+            return
+        folder_id, identifier, url, tags, updated_at, checksum, hashes, features = entry
+        key = (updated_at, item_id)
+        if hashes is not None:
+            self._hash_tree = None
+        if features is not None:
+            self._remove_sorted(self._by_luminance, (features.luminance, item_id))
+        self._remove_sorted(self._recent, key)
+        folder_entries = self._by_folder.get(folder_id)
+        if folder_entries is not None:
+            self._remove_sorted(folder_entries, key)
+            if not folder_entries:
+                del self._by_folder[folder_id]
+        self._discard(self._by_identifier, identifier, item_id)
+        self._discard(self._by_url, url, item_id)
+        for tag in tags:
+            bucket = self._by_tag.get(tag)
+            if bucket is not None:
+                bucket.discard(item_id)
+                if not bucket:
+                    del self._by_tag[tag]
+        if checksum:
+            holders = self._by_checksum.get(checksum)
+            if holders is not None:
+                holders.discard(item_id)
+                if not holders:
+                    del self._by_checksum[checksum]
+
+    def update(self, item: FavoriteItem) -> None:
+        entry = (
+            item.folder_id,
+            item.source.identifier or None,
+            item.source.url or None,
+            tuple(item.tags),
+            float(item.updated_at),
+            item.localization.checksum if item.localization.status == "completed" else None,
+            ImageHashes.from_dict(item.extra.get(IMAGE_HASH_EXTRA_KEY)),
+            ImageFeatures.from_dict(item.extra.get(IMAGE_FEATURES_EXTRA_KEY)),
+        )
+        if self._entries.get(item.id) == entry:
+            return
+        self.remove(item.id)
+        self._entries[item.id] = entry
+        folder_id, identifier, url, tags, updated_at, checksum, hashes, features = entry
+        if hashes is not None:
+            self._hash_tree = None
+        if features is not None:
+            bisect.insort(self._by_luminance, (features.luminance, item.id))
+        key = (updated_at, item.id)
+        bisect.insort(self._recent, key)
+        bisect.insort(self._by_folder.setdefault(folder_id, []), key)
+        if identifier:
+            self._by_identifier.setdefault(identifier, {})[item.id] = None
+        if url:
+            self._by_url.setdefault(url, {})[item.id] = None
+        for tag in tags:
+            self._by_tag.setdefault(tag, set()).add(item.id)
+        if checksum:
+            self._by_checksum.setdefault(checksum, set()).add(item.id)
+
+    def find(self, identifier: str | None, url: str | None) -> str | None:
+        for index, key in ((self._by_identifier, identifier), (self._by_url, url)):
+            if key:
+                bucket = index.get(key)
+                if bucket:
+                    return next(iter(bucket))
+        return None
+
+    def recent_ids(self, folder_id: str | None = None) -> list[str]:
+        """Item ids ordered by ``updated_at`` descending."""
+        entries = self._recent if folder_id is None else self._by_folder.get(folder_id, [])
+        return [item_id for _, item_id in reversed(entries)]
+
+    def ordered_entries(self, folder_id: str | None = None) -> list[tuple[float, str]]:
+        """Live ``(updated_at, item_id)`` list sorted ascending; do not modify."""
+        return self._recent if folder_id is None else self._by_folder.get(folder_id, [])
+
+    def tag_ids(self, tag: str) -> set[str]:
+        return set(self._by_tag.get(tag, ()))
+
+    def checksum_refs(self, checksum: str) -> int:
+        """Number of localized items whose file has this content hash."""
+        return len(self._by_checksum.get(checksum, ()))
+
+    def tag_counts(self) -> dict[str, int]:
+        return {tag: len(ids) for tag, ids in self._by_tag.items()}
 
-    def __init__(self, storage_path: Path | None = None) -> None:
+    def image_hashes(self, item_ids: Iterable[str]) -> dict[str, ImageHashes]:
+        result: dict[str, ImageHashes] = {}
+        for item_id in item_ids:
+            entry = self._entries.get(item_id)
+            if entry is not None and entry[6] is not None:
+                result[item_id] = entry[6]
+        return result
+
+    def image_features(self, item_id: str) -> ImageFeatures | None:
+        entry = self._entries.get(item_id)
+        return entry[7] if entry is not None else None
+
+    def luminance_ids(self, low: float | None, high: float | None) -> list[str]:
+        """Items with features whose luminance lies in ``[low, high]``."""
+        start = 0 if low is None else bisect.bisect_left(self._by_luminance, (low, ""))
+        stop = (
+            len(self._by_luminance)
+            if high is None
+            else bisect.bisect_right(self._by_luminance, (high, "\uffff"))
+        )
+        return [item_id for _, item_id in self._by_luminance[start:stop]]
+
+    def similar_ids(self, hashes: ImageHashes, max_distance: int) -> list[str]:
+        """Items whose image is a near-duplicate of ``hashes``, closest first."""
+        if self._hash_tree is None:
+            self._hash_tree = BKTree(
+                (entry[6].phash, item_id)
+                for item_id, entry in self._entries.items()
+                if entry[6] is not None
+            )
+        return [
+            item_id
+            for _, item_id in self._hash_tree.search(hashes.phash, max_distance)
+            if hashes.is_similar(self._entries[item_id][6], max_distance)
+        ]
+
+
+class FavoriteManager:
+    """High-level API for managing favorites on disk.
+
+    Read APIs return the stored objects themselves rather than clones. They
+    are published read-only snapshots: assigning a field or mutating a
+    ``tags``/``extra``/``metadata`` container raises, so callers (plugins
+    included) cannot desynchronise the query index. Every mutation goes
+    through the manager, which edits a private ``copy()`` (copy-on-write) and
+    publishes it once the change is recorded, so a snapshot a caller holds
+    never changes underneath it. Callers that want a scratch object call
+    ``copy()`` themselves.
+    """
+
+    def __init__(
+        self,
+        storage_path: Path | None = None,
+        *,
+        backend: str | FavoriteStorage = STORAGE_BACKEND_SQLITE,
+    ) -> None:
         self._path = storage_path or DATA_DIR / "favorites" / "favorites.json"
         self._lock = RLock()
         self._collection = FavoriteCollection()
-        self._classifier: FavoriteClassifier | None = None
+        self._classifier: FavoriteClassifier | BatchFavoriteClassifier | None = None
+        self._classify_lock = Lock()
+        self._classify_queue: dict[str, None] = {}
+        self._classify_thread: Thread | None = None
+        self._classify_future: concurrent.futures.Future[None] | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._classify_listeners: list[Callable[[list[str]], None]] = []
+        self._storage = self._create_storage(backend)
+        self._dirty_items: set[str] = set()
+        self._deleted_items: set[str] = set()
+        self._folders_dirty = False
+        self._full_rewrite = False
+        self._flush_lock = Lock()
+        self._flush_timer: Timer | None = None
+        self._dirty_since: float | None = None
+        self._batch_depth = 0
+        self._index = _FavoriteIndex()
+        self._content_store: ContentStore | None = None
+        # 正在本地化（已入库但尚未写回条目）的 blob，引用计数归零也不能删除
+        self._pinned_checksums: Counter[str] = Counter()
         self.load()
+        atexit.register(self.flush)
 
     # ------------------------------------------------------------------
     # persistence helpers
     # ------------------------------------------------------------------
+    def _create_storage(self, backend: str | FavoriteStorage) -> FavoriteStorage:
+        if not isinstance(backend, str):
+            return backend
+        if backend.strip().lower() == STORAGE_BACKEND_JSON:
+            return JsonFavoriteStorage(self._path)
+        if backend.strip().lower() != STORAGE_BACKEND_SQLITE:
+            logger.warning("未知的收藏存储后端 {backend}，已使用 SQLite", backend=backend)
+        return SQLiteFavoriteStorage(
+            self._path.with_suffix(".sqlite3"),
+            legacy_json_path=self._path,
+        )
+
+    @property
+    def storage(self) -> FavoriteStorage:
+        return self._storage
+
     def _ensure_storage_dir(self) -> None:
         self._path.parent.mkdir(parents=True, exist_ok=True)
 
+    def _mark_item_dirty(self, item_id: str) -> None:
+        self._deleted_items.discard(item_id)
+        self._dirty_items.add(item_id)
+        item = self._collection.items.get(item_id)
+        if item is None:
+            self._index.remove(item_id)
+        else:
+            item.publish()
+            self._index.update(item)
+
+    def _mark_item_deleted(self, item_id: str) -> None:
+        self._dirty_items.discard(item_id)
+        self._deleted_items.add(item_id)
+        self._index.remove(item_id)
+
+    def _mark_folders_dirty(self) -> None:
+        self._folders_dirty = True
+        self._publish_folders()
+
+    def _publish_folders(self) -> None:
+        for folder in self._collection.folders.values():
+            folder.publish()
+
+    def _ensure_default_folder(self) -> FavoriteFolder:
+        before = (len(self._collection.folders), tuple(self._collection.folder_order))
+        folder = self._collection.ensure_default_folder()
+        if before != (len(self._collection.folders), tuple(self._collection.folder_order)):
+            self._mark_folders_dirty()
+        return folder
+
+    def _edit_item(self, item_id: str) -> FavoriteItem | None:
+        """Swap in a private copy of the item before mutating it.
+
+        Objects handed out by the read APIs are published, read-only
+        snapshots; the copy stays mutable until ``_mark_item_dirty`` publishes
+        it, so readers need no defensive copies.
+        """
+        item = self._collection.items.get(item_id)
+        if item is None:
+            return None
+        item = item.copy()
+        self._collection.items[item_id] = item
+        return item
+
+    def _edit_folder(self, folder_id: str) -> FavoriteFolder | None:
+        folder = self._collection.folders.get(folder_id)
+        if folder is None:
+            return None
+        folder = folder.copy()
+        self._collection.folders[folder_id] = folder
+        return folder
+
+    def _take_changes(self) -> FavoriteChangeSet:
+        collection = self._collection
+        changes = FavoriteChangeSet(version=collection.version, full=self._full_rewrite)
+        for item_id in self._dirty_items:
+            item = collection.items.get(item_id)
+            if item is None:
+                changes.deleted_items.add(item_id)
+            else:
+                changes.items[item_id] = item.to_dict()
+        changes.deleted_items.update(self._deleted_items)
+        if self._folders_dirty:
+            changes.folders = {
+                fid: folder.to_dict() for fid, folder in collection.folders.items()
+            }
+            changes.folder_order = list(collection.folder_order)
+        self._dirty_items = set()
+        self._deleted_items = set()
+        self._folders_dirty = False
+        self._full_rewrite = False
+        return changes
+
     def load(self) -> None:
         with self._lock:
+            self._dirty_items.clear()
+            self._deleted_items.clear()
+            self._folders_dirty = False
+            self._full_rewrite = False
             try:
-                if not self._path.exists():
+                data = self._storage.load()
+                if data is None:
                     self._collection = FavoriteCollection()
                     self._collection.ensure_default_folder()
-                    return
-                with self._path.open("r", encoding="utf-8") as fp:
-                    data = json.load(fp)
-                self._collection = FavoriteCollection.from_dict(data)
+                else:
+                    self._collection = FavoriteCollection.from_dict(data)
             except Exception as exc:  # pragma: no cover - defensive logging
                 logger.error(f"加载收藏数据失败: {exc}")
                 self._collection = FavoriteCollection()
                 self._collection.ensure_default_folder()
+            for item in self._collection.items.values():
+                item.publish()
+            self._publish_folders()
+            self._index.rebuild(self._collection.items)
+
+    def _has_pending_changes(self) -> bool:
+        return bool(
+            self._dirty_items
+            or self._deleted_items
+            or self._folders_dirty
+            or self._full_rewrite,
+        )
 
     def save(self) -> None:
+        """Schedule a write-behind flush of pending changes.
+
+        Successive calls within ``_SAVE_DEBOUNCE_SECONDS`` coalesce into one
+        write; inside :meth:`batch` nothing is written until the batch ends.
+        """
         with self._lock:
-            self._ensure_storage_dir()
+            if not self._has_pending_changes() or self._batch_depth:
+                return
+            now = time.monotonic()
+            if self._dirty_since is None:
+                self._dirty_since = now
+            delay = min(
+                _SAVE_DEBOUNCE_SECONDS,
+                max(0.0, self._dirty_since + _SAVE_MAX_DELAY_SECONDS - now),
+            )
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+            timer = Timer(delay, self.flush)
+            timer.daemon = True
+            self._flush_timer = timer
+            timer.start()
+
+    def flush(self) -> None:
+        """Write pending changes now.
+
+        The change set (and the full payload, for backends that need it) is
+        captured under the manager lock; the write itself happens outside of
+        it so readers are never blocked on disk I/O. Must not be called while
+        holding the manager lock.
+        """
+        with self._flush_lock:
+            with self._lock:
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                self._dirty_since = None
+                changes = self._take_changes()
+                if changes.is_empty():
+                    return
+                payload = (
+                    self._collection.to_dict()
+                    if changes.full or self._storage.requires_snapshot
+                    else None
+                )
             try:
-                payload = self._collection.to_dict()
-                with self._path.open("w", encoding="utf-8") as fp:
-                    json.dump(payload, fp, ensure_ascii=False, indent=2)
+                self._storage.commit(changes, lambda: payload or {})
             except Exception as exc:  # pragma: no cover - defensive logging
                 logger.error(f"保存收藏数据失败: {exc}")
+                with self._lock:
+                    self._requeue_changes(changes)
+
+    def _requeue_changes(self, changes: FavoriteChangeSet) -> None:
+        for item_id in changes.items:
+            if item_id not in self._deleted_items:
+                self._dirty_items.add(item_id)
+        for item_id in changes.deleted_items:
+            if item_id not in self._dirty_items:
+                self._deleted_items.add(item_id)
+        if changes.folders is not None:
+            self._folders_dirty = True
+        self._full_rewrite = self._full_rewrite or changes.full
+
+    @contextmanager
+    def batch(self) -> Iterator[FavoriteManager]:
+        """Group many mutations into a single flush when the outermost batch exits."""
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                outermost = self._batch_depth == 0
+            if outermost:
+                self.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self._storage.close()
+        atexit.unregister(self.flush)
 
     # ------------------------------------------------------------------
     # folder ops
@@ -376,12 +1115,16 @@ class FavoriteManager:
                 for fid in self._collection.folder_order
                 if fid in self._collection.folders
             ]
-            return [FavoriteFolder.from_dict(folder.to_dict()) for folder in folders]
+            for folder in folders:
+                folder.publish()
+            return folders
 
     def get_folder(self, folder_id: str) -> FavoriteFolder | None:
         with self._lock:
             folder = self._collection.folders.get(folder_id)
-            return FavoriteFolder.from_dict(folder.to_dict()) if folder else None
+            if folder is not None:
+                folder.publish()
+            return folder
 
     def create_folder(
         self,
@@ -404,8 +1147,9 @@ class FavoriteManager:
             self._collection.folders[folder_id] = folder
             self._collection.folder_order.append(folder_id)
             self._collection.ensure_default_folder()
+            self._mark_folders_dirty()
             self.save()
-            return FavoriteFolder.from_dict(folder.to_dict())
+            return self._collection.folders[folder_id]
 
     def rename_folder(
         self,
@@ -415,7 +1159,7 @@ class FavoriteManager:
         description: str | None = None,
     ) -> bool:
         with self._lock:
-            folder = self._collection.folders.get(folder_id)
+            folder = self._edit_folder(folder_id)
             if not folder:
                 return False
             if name is not None:
@@ -425,6 +1169,7 @@ class FavoriteManager:
             if description is not None:
                 folder.description = description.strip()
             folder.touch()
+            self._mark_folders_dirty()
             self.save()
             return True
 
@@ -438,15 +1183,18 @@ class FavoriteManager:
             if destination not in self._collection.folders:
                 self._collection.ensure_default_folder()
                 destination = "default"
-            for item in self._collection.items.values():
-                if item.folder_id == folder_id:
+            for item_id in self._index.recent_ids(folder_id):
+                item = self._edit_item(item_id)
+                if item is not None:
                     item.folder_id = destination
                     item.update_timestamp()
+                    self._mark_item_dirty(item_id)
             del self._collection.folders[folder_id]
             self._collection.folder_order = [
                 fid for fid in self._collection.folder_order if fid != folder_id
             ]
             self._collection.ensure_default_folder()
+            self._mark_folders_dirty()
             self.save()
             return True
 
@@ -461,20 +1209,12 @@ class FavoriteManager:
                     unique_ids.append(folder_id)
             self._collection.folder_order = list(unique_ids)
             self._collection.ensure_default_folder()
+            self._mark_folders_dirty()
             self.save()
 
     # ------------------------------------------------------------------
     # localization helpers
     # ------------------------------------------------------------------
-    def _compute_file_checksum(self, path: Path) -> str:
-        hasher = hashlib.sha256()
-        with path.open("rb") as handle:
-            for chunk in iter(lambda: handle.read(1024 * 1024), b""):
-                if not chunk:
-                    break
-                hasher.update(chunk)
-        return hasher.hexdigest()
-
     def _sanitize_import_item_payload(self, payload: dict[str, Any]) -> dict[str, Any]:
         sanitized: dict[str, Any] = dict(payload or {})
         sanitized["local_path"] = None
@@ -565,6 +1305,41 @@ class FavoriteManager:
             target.mkdir(parents=True, exist_ok=True)
         return target
 
+    @property
+    def content_store(self) -> ContentStore:
+        """Content-addressed blobs backing every localized file (hardlinked)."""
+        if self._content_store is None:
+            self._content_store = ContentStore(self.localization_root() / ".objects")
+        return self._content_store
+
+    def _release_localized_copy(self, local_path: str | None, checksum: str | None) -> None:
+        """Drop a managed localized file and its blob once nothing references it.
+
+        Must be called after the referencing item has been updated or removed
+        (so the checksum index no longer counts it) and while holding the lock.
+        Blobs pinned by an in-flight localization are kept.
+        """
+        if local_path:
+            path = Path(local_path)
+            try:
+                path.resolve().relative_to(self.localization_root())
+            except (OSError, ValueError):
+                path = None
+            if path is not None:
+                try:
+                    path.unlink(missing_ok=True)
+                except OSError as exc:  # pragma: no cover - filesystem error
+                    logger.warning(f"删除本地化文件失败: {exc}")
+        self._release_blob(checksum)
+
+    def _release_blob(self, checksum: str | None) -> None:
+        if (
+            checksum
+            and not self._index.checksum_refs(checksum)
+            and not self._pinned_checksums[checksum]
+        ):
+            self.content_store.remove(checksum)
+
     def localize_item_from_file(self, item_id: str, source_path: str) -> Path | None:
         source = Path(source_path)
         if not source.exists():
@@ -577,11 +1352,10 @@ class FavoriteManager:
             filename = self._localization_filename(item, source)
             folder_segment = self._localization_folder_segment(folder_id)
         target_dir = (self.localization_root() / folder_segment).resolve()
-        target_dir.mkdir(parents=True, exist_ok=True)
         destination = (target_dir / filename).resolve()
         try:
-            shutil.copy2(source, destination)
-        except Exception as exc:  # pragma: no cover - defensive logging
+            checksum, size = hash_file(source)
+        except OSError as exc:  # pragma: no cover - filesystem error
             logger.error(f"复制本地化文件失败: {exc}")
             self.update_localization(
                 item_id,
@@ -591,27 +1365,513 @@ class FavoriteManager:
                 message=str(exc),
             )
             return None
-        rel_folder = Path(folder_segment)
-        checksum = None
-        size = None
+        # 先固定 blob 再入库，避免其他条目释放同一内容时把它删掉
+        with self._lock:
+            self._pinned_checksums[checksum] += 1
         try:
-            checksum = self._compute_file_checksum(destination)
-        except OSError:  # pragma: no cover - filesystem error
-            checksum = None
+            try:
+                # 先哈希再入库：相同内容只保存一份 blob，目标路径以硬链接引用
+                self.content_store.add_file(source, checksum)
+                self.content_store.materialize(checksum, destination)
+            except Exception as exc:  # pragma: no cover - defensive logging
+                logger.error(f"复制本地化文件失败: {exc}")
+                self.update_localization(
+                    item_id,
+                    status="failed",
+                    local_path=None,
+                    folder_path=folder_segment,
+                    message=str(exc),
+                )
+                return None
+            if not self.update_localization(
+                item_id,
+                status="completed",
+                local_path=str(destination),
+                folder_path=Path(folder_segment).as_posix(),
+                message=None,
+                checksum=checksum,
+                file_size=size,
+            ):
+                # 条目在本地化期间已被删除，不留下无人引用的副本
+                destination.unlink(missing_ok=True)
+                return None
+            return destination
+        finally:
+            with self._lock:
+                self._pinned_checksums[checksum] -= 1
+                if not self._pinned_checksums[checksum]:
+                    del self._pinned_checksums[checksum]
+                    self._release_blob(checksum)
+
+    def _is_localized(self, item: FavoriteItem) -> bool:
+        local_path = item.localization.local_path
+        return (
+            item.localization.status == "completed"
+            and bool(local_path)
+            and Path(local_path).exists()
+        )
+
+    def localize_item(self, item_id: str, *, session: Any | None = None) -> bool:
+        """Make sure ``item_id`` has a localized copy, downloading it if needed.
+
+        ``session`` may be a shared ``requests.Session`` so bulk jobs reuse
+        pooled connections.
+        """
+        item = self.get_item(item_id)
+        if item is None:
+            return False
+        if self._is_localized(item):
+            return True
+        if item.local_path and Path(item.local_path).exists():
+            return self.localize_item_from_file(item_id, item.local_path) is not None
+        download_url = item.preview_url or item.source.preview_url or item.source.url
+        if not download_url:
+            logger.warning("收藏缺少可下载地址，跳过本地化: {item}", item=item_id)
+            return False
+        downloads_dir = self.localization_root() / "__downloads"
+        downloads_dir.mkdir(parents=True, exist_ok=True)
+        downloaded_path = ltwapi.download_file(
+            download_url,
+            str(downloads_dir),
+            f"{item_id}-{uuid.uuid4().hex}",
+            timeout=120,
+            max_retries=1,
+            session=session,
+        )
+        if not downloaded_path:
+            return False
+        try:
+            return self.localize_item_from_file(item_id, downloaded_path) is not None
+        finally:
+            Path(downloaded_path).unlink(missing_ok=True)
+
+    # ------------------------------------------------------------------
+    # bulk localization
+    # ------------------------------------------------------------------
+    def _localization_job_path(self) -> Path:
+        return self._path.parent / LOCALIZATION_JOB_FILENAME
+
+    def _write_localization_job(self, pending: Sequence[str]) -> None:
+        job_path = self._localization_job_path()
+        try:
+            if not pending:
+                job_path.unlink(missing_ok=True)
+                return
+            job_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = job_path.with_suffix(".tmp")
+            tmp_path.write_text(
+                json.dumps({"pending": list(pending), "updated_at": time.time()}),
+                encoding="utf-8",
+            )
+            os.replace(tmp_path, job_path)
+        except OSError as exc:  # pragma: no cover - filesystem error
+            logger.warning(f"保存本地化任务状态失败: {exc}")
+
+    def pending_localization_ids(self) -> list[str]:
+        """Items left over from an interrupted :meth:`localize_items` run."""
+        job_path = self._localization_job_path()
+        if not job_path.exists():
+            return []
         try:
-            size = destination.stat().st_size
-        except OSError:  # pragma: no cover - filesystem error
-            size = None
-        self.update_localization(
-            item_id,
-            status="completed",
-            local_path=str(destination),
-            folder_path=rel_folder.as_posix(),
-            message=None,
-            checksum=checksum,
-            file_size=size if isinstance(size, int) else None,
+            payload = json.loads(job_path.read_text(encoding="utf-8"))
+        except Exception as exc:
+            logger.warning(f"读取本地化任务状态失败: {exc}")
+            return []
+        pending = payload.get("pending") if isinstance(payload, dict) else None
+        if not isinstance(pending, list):
+            return []
+        with self._lock:
+            return [str(item_id) for item_id in pending if str(item_id) in self._collection.items]
+
+    def _localize_with_retry(
+        self,
+        item_id: str,
+        session: Any,
+        retries: int,
+        cancel_event: Event,
+    ) -> bool:
+        for attempt in range(retries + 1):
+            if cancel_event.is_set():
+                return False
+            try:
+                if self.localize_item(item_id, session=session):
+                    return True
+            except Exception as exc:
+                logger.warning(
+                    "本地化收藏失败（第 {attempt} 次）{item}: {error}",
+                    attempt=attempt + 1,
+                    item=item_id,
+                    error=str(exc),
+                )
+            if attempt < retries and cancel_event.wait(min(0.5 * 2**attempt, 5.0)):
+                return False
+        return False
+
+    def localize_items(
+        self,
+        item_ids: Sequence[str],
+        *,
+        max_workers: int = _LOCALIZE_WORKERS,
+        retries: int = _LOCALIZE_RETRIES,
+        resume: bool = False,
+        progress_callback: Callable[[FavoriteLocalizationProgress], None] | None = None,
+        cancel_event: Event | None = None,
+    ) -> FavoriteLocalizationProgress:
+        """Localize many favorites with a bounded worker pool.
+
+        Remaining item ids are persisted to ``localization_job.json`` while
+        the job runs. Leftovers of an interrupted job are only picked up when
+        ``resume`` is set (see :meth:`pending_localization_ids`); otherwise
+        they stay in the job file for a later resume. Each item is retried
+        ``retries`` times with backoff, and ``progress_callback`` is throttled
+        to a few events per second (the final event always fires). Setting
+        ``cancel_event`` stops scheduling new work and keeps the job file for
+        a later resume.
+        """
+        cancel_event = cancel_event or Event()
+        leftovers = self.pending_localization_ids()
+        requested = list(dict.fromkeys([*(leftovers if resume else []), *item_ids]))
+        # 未选择续传时保留上次遗留的条目，留待之后续传
+        requested_set = set(requested)
+        carried = [] if resume else [item_id for item_id in leftovers if item_id not in requested_set]
+        with self._lock:
+            candidates = [
+                item_id
+                for item_id in requested
+                if item_id in self._collection.items
+            ]
+            already_done = [
+                item_id
+                for item_id in candidates
+                if self._is_localized(self._collection.items[item_id])
+            ]
+        pending_ids = [item_id for item_id in candidates if item_id not in set(already_done)]
+        progress = FavoriteLocalizationProgress(
+            total=len(candidates),
+            done=len(already_done),
+            succeeded=len(already_done),
+            finished_ids=list(already_done),
         )
-        return destination
+        remaining = dict.fromkeys(pending_ids)
+        self._write_localization_job([*carried, *remaining])
+        with self.batch():
+            for item_id in pending_ids:
+                item = self.get_item(item_id)
+                if item is not None:
+                    self.update_localization(
+                        item_id,
+                        status="pending",
+                        local_path=item.localization.local_path,
+                        folder_path=item.localization.folder_path,
+                    )
+
+        progress_lock = Lock()
+        last_emit = 0.0
+        last_job_save = time.monotonic()
+
+        def _emit(force: bool = False) -> None:
+            nonlocal last_emit
+            if progress_callback is None:
+                progress.finished_ids.clear()
+                return
+            now = time.monotonic()
+            if not force and now - last_emit < _LOCALIZE_PROGRESS_INTERVAL:
+                return
+            last_emit = now
+            snapshot = replace(progress, finished_ids=list(progress.finished_ids))
+            progress.finished_ids.clear()
+            try:
+                progress_callback(snapshot)
+            except Exception as exc:  # pragma: no cover - defensive logging
+                logger.warning(f"本地化进度回调失败: {exc}")
+
+        workers = max(1, min(max_workers, len(pending_ids) or 1))
+        with ltwapi.build_pooled_session(workers) as session, ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix="ltw-fav-localize",
+        ) as executor:
+            futures = {
+                executor.submit(
+                    self._localize_with_retry,
+                    item_id,
+                    session,
+                    retries,
+                    cancel_event,
+                ): item_id
+                for item_id in pending_ids
+            }
+            for future in as_completed(futures):
+                item_id = futures[future]
+                try:
+                    success = future.result()
+                except Exception:  # pragma: no cover - guarded in _localize_with_retry
+                    success = False
+                cancelled = cancel_event.is_set() and not success
+                if not success and not cancelled:
+                    item = self.get_item(item_id)
+                    self.update_localization(
+                        item_id,
+                        status="failed",
+                        local_path=item.localization.local_path if item else None,
+                        folder_path=item.localization.folder_path if item else None,
+                        message="本地化失败",
+                    )
+                with progress_lock:
+                    if not cancelled:
+                        remaining.pop(item_id, None)
+                    progress.done += 1
+                    if success:
+                        progress.succeeded += 1
+                    elif not cancelled:
+                        progress.failed += 1
+                    progress.finished_ids.append(item_id)
+                    if time.monotonic() - last_job_save >= _LOCALIZE_JOB_SAVE_INTERVAL:
+                        last_job_save = time.monotonic()
+                        self._write_localization_job([*carried, *remaining])
+                    _emit()
+        self._write_localization_job([*carried, *remaining])
+        progress.completed = True
+        _emit(force=True)
+        return progress
+
+    # ------------------------------------------------------------------
+    # perceptual hashes
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _item_image_path(item: FavoriteItem) -> Path | None:
+        candidates = [item.local_path, item.source.local_path]
+        if item.localization.status == "completed":
+            candidates.insert(0, item.localization.local_path)
+        for candidate in candidates:
+            if candidate and Path(candidate).is_file():
+                return Path(candidate)
+        return None
+
+    def _plan_image_analysis(
+        self,
+        item_ids: Iterable[str] | None,
+        extra_key: str,
+        parse: Callable[[Any], Any],
+    ) -> list[tuple[str, Path, int, float]]:
+        """Items whose stored ``extra[extra_key]`` is missing or older than the file."""
+        plan: list[tuple[str, Path, int, float]] = []
+        with self._lock:
+            scope = self._collection.items.keys() if item_ids is None else item_ids
+            for item_id in list(scope):
+                item = self._collection.items.get(item_id)
+                if item is None:
+                    continue
+                path = self._item_image_path(item)
+                if path is None:
+                    continue
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                stored = item.extra.get(extra_key)
+                if (
+                    isinstance(stored, dict)
+                    and stored.get("size") == stat.st_size
+                    and stored.get("mtime") == stat.st_mtime
+                    and parse(stored) is not None
+                ):
+                    continue
+                plan.append((item_id, path, stat.st_size, stat.st_mtime))
+        return plan
+
+    def _store_image_analysis(self, extra_key: str, computed: dict[str, dict[str, Any]]) -> None:
+        if not computed:
+            return
+        with self.batch(), self._lock:
+            for item_id, payload in computed.items():
+                item = self._edit_item(item_id)
+                if item is None:
+                    continue
+                item.extra[extra_key] = payload
+                self._mark_item_dirty(item_id)
+            self.save()
+
+    def compute_image_hashes(
+        self,
+        item_ids: Iterable[str] | None = None,
+        *,
+        max_workers: int = _HASH_WORKERS,
+        progress_callback: ProgressCallback | None = None,
+        cancel_event: Event | None = None,
+    ) -> int:
+        """Compute perceptual hashes for favorites with a local image.
+
+        Hashes are stored under ``extra["image_hash"]`` together with the
+        file size and mtime, so unchanged files are skipped on later runs.
+        Returns the number of items (re)hashed.
+        """
+        cancel_event = cancel_event or Event()
+        plan = self._plan_image_analysis(item_ids, IMAGE_HASH_EXTRA_KEY, ImageHashes.from_dict)
+        total = len(plan)
+        if not total:
+            return 0
+
+        computed: dict[str, dict[str, Any]] = {}
+        done = 0
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(max_workers, total)),
+            thread_name_prefix="ltw-fav-hash",
+        ) as executor:
+            futures = {
+                executor.submit(compute_hashes, path): (item_id, size, mtime)
+                for item_id, path, size, mtime in plan
+            }
+            for future in as_completed(futures):
+                item_id, size, mtime = futures[future]
+                done += 1
+                try:
+                    hashes = future.result()
+                except Exception as exc:
+                    logger.debug("计算收藏感知哈希失败 {item}: {error}", item=item_id, error=str(exc))
+                else:
+                    computed[item_id] = {**hashes.to_dict(), "size": size, "mtime": mtime}
+                if progress_callback is not None:
+                    progress_callback(done, total)
+                if cancel_event.is_set():
+                    for pending in futures:
+                        pending.cancel()
+                    break
+
+        self._store_image_analysis(IMAGE_HASH_EXTRA_KEY, computed)
+        return len(computed)
+
+    def compute_image_features(
+        self,
+        item_ids: Iterable[str] | None = None,
+        *,
+        progress_callback: ProgressCallback | None = None,
+        cancel_event: Event | None = None,
+    ) -> int:
+        """Compute colour / brightness features in the background process pool.
+
+        Results are stored under ``extra["image_features"]`` and indexed for
+        :meth:`find_by_appearance`. Blocking; returns the number of items
+        analysed.
+        """
+        plan = self._plan_image_analysis(
+            item_ids,
+            IMAGE_FEATURES_EXTRA_KEY,
+            ImageFeatures.from_dict,
+        )
+        if not plan:
+            return 0
+        by_path = {str(path): (item_id, size, mtime) for item_id, path, size, mtime in plan}
+        results = compute_features_batch(
+            by_path,
+            progress_callback=progress_callback,
+            cancel_event=cancel_event,
+        )
+        computed = {
+            by_path[path][0]: {
+                **features.to_dict(),
+                "size": by_path[path][1],
+                "mtime": by_path[path][2],
+            }
+            for path, features in results.items()
+        }
+        self._store_image_analysis(IMAGE_FEATURES_EXTRA_KEY, computed)
+        return len(computed)
+
+    def get_image_features(self, item_id: str) -> ImageFeatures | None:
+        with self._lock:
+            return self._index.image_features(item_id)
+
+    def find_by_appearance(
+        self,
+        folder_id: str | None = None,
+        *,
+        brightness: Literal["dark", "light"] | None = None,
+        min_luminance: float | None = None,
+        max_luminance: float | None = None,
+        color: str | Sequence[int] | None = None,
+        max_color_distance: float = _DEFAULT_COLOR_DISTANCE,
+        min_aspect_ratio: float | None = None,
+        max_aspect_ratio: float | None = None,
+    ) -> list[FavoriteItem]:
+        """Favorites matching brightness / colour / aspect constraints.
+
+        Only items whose features were computed (see
+        :meth:`compute_image_features`) can match. ``brightness`` is a
+        shortcut for the dark/light luminance thresholds. Results are ordered
+        by colour distance when ``color`` is given, otherwise newest first.
+        """
+        if brightness == "dark":
+            max_luminance = DARK_LUMINANCE if max_luminance is None else min(max_luminance, DARK_LUMINANCE)
+        elif brightness == "light":
+            min_luminance = LIGHT_LUMINANCE if min_luminance is None else max(min_luminance, LIGHT_LUMINANCE)
+        with self._lock:
+            scope = folder_id if folder_id and folder_id != "__all__" else None
+            candidates = set(self._index.luminance_ids(min_luminance, max_luminance))
+            matches: list[tuple[float, FavoriteItem]] = []
+            for item_id in self._index.recent_ids(scope):
+                if item_id not in candidates:
+                    continue
+                features = self._index.image_features(item_id)
+                if features is None:
+                    continue
+                if min_aspect_ratio is not None and features.aspect_ratio < min_aspect_ratio:
+                    continue
+                if max_aspect_ratio is not None and features.aspect_ratio > max_aspect_ratio:
+                    continue
+                distance = 0.0
+                if color is not None:
+                    distance = features.color_distance(color)
+                    if distance > max_color_distance:
+                        continue
+                matches.append((distance, self._collection.items[item_id]))
+        if color is not None:
+            matches.sort(key=lambda pair: pair[0])
+        return [item for _, item in matches]
+
+    def get_image_hashes(self, item_id: str) -> ImageHashes | None:
+        with self._lock:
+            return self._index.image_hashes([item_id]).get(item_id)
+
+    def find_similar_items(
+        self,
+        hashes: ImageHashes,
+        *,
+        max_distance: int = DEFAULT_MAX_DISTANCE,
+    ) -> list[FavoriteItem]:
+        """Favorites whose stored hash is a near-duplicate of ``hashes``."""
+        with self._lock:
+            return [
+                self._collection.items[item_id]
+                for item_id in self._index.similar_ids(hashes, max_distance)
+            ]
+
+    def find_duplicates(
+        self,
+        folder_id: str | None = None,
+        *,
+        max_distance: int = DEFAULT_MAX_DISTANCE,
+        progress_callback: ProgressCallback | None = None,
+        cancel_event: Event | None = None,
+    ) -> list[list[FavoriteItem]]:
+        """Group near-identical favorites (one folder or all).
+
+        Blocking; missing hashes are computed first, reporting
+        ``progress_callback(done, total)``. Each group lists the newest item
+        first; only groups with two or more members are returned.
+        """
+        item_ids = [item.id for item in self.list_items(folder_id)]
+        self.compute_image_hashes(
+            item_ids,
+            progress_callback=progress_callback,
+            cancel_event=cancel_event,
+        )
+        with self._lock:
+            hashes = self._index.image_hashes(item_ids)
+            groups = find_duplicate_groups(hashes, max_distance)
+            return [
+                [self._collection.items[item_id] for item_id in group]
+                for group in groups
+            ]
 
     def _prepare_export(
         self,
@@ -619,7 +1879,12 @@ class FavoriteManager:
         include_assets: bool = True,
         *,
         item_ids: Sequence[str] | None = None,
-    ) -> tuple[dict[str, Any], list[tuple[Path, str]]]:
+    ) -> tuple[dict[str, Any], list[_ExportAsset]]:
+        """Snapshot the export payload under the lock.
+
+        Checksums and sizes are filled in later by :meth:`_build_export_package`
+        while the assets are streamed into the package.
+        """
         item_ids_set = {str(iid) for iid in item_ids} if item_ids else None
         with self._lock:
             if item_ids_set is None:
@@ -637,8 +1902,8 @@ class FavoriteManager:
                 selected_folder_ids_set: set[str] = set()
 
             item_payload: dict[str, dict[str, Any]] = {}
-            asset_plan: list[tuple[Path, str]] = []
-            planned_assets: set[tuple[str, str]] = set()
+            asset_plan: list[_ExportAsset] = []
+            planned_assets: dict[tuple[str, str], _ExportAsset] = {}
             timestamp = time.time()
             for item_id, item in self._collection.items.items():
                 if item_ids_set is not None:
@@ -689,18 +1954,13 @@ class FavoriteManager:
                     rel_path = (Path("assets") / folder_segment / filename).as_posix()
                     localization_payload["local_path"] = rel_path
                     localization_payload["status"] = localization_payload.get("status") or "completed"
-                    try:
-                        localization_payload["checksum"] = self._compute_file_checksum(asset_source)
-                    except OSError:  # pragma: no cover - filesystem error
-                        localization_payload.pop("checksum", None)
-                    try:
-                        localization_payload["file_size"] = asset_source.stat().st_size
-                    except OSError:  # pragma: no cover - filesystem error
-                        localization_payload.pop("file_size", None)
                     asset_key = (str(asset_source.resolve()), rel_path)
-                    if asset_key not in planned_assets:
-                        asset_plan.append((asset_source, rel_path))
-                        planned_assets.add(asset_key)
+                    asset = planned_assets.get(asset_key)
+                    if asset is None:
+                        asset = _ExportAsset(source=asset_source, rel_path=rel_path)
+                        planned_assets[asset_key] = asset
+                        asset_plan.append(asset)
+                    asset.payloads.append(localization_payload)
                 item_payload[item_id] = data
                 if item_ids_set is not None and item.folder_id not in selected_folder_ids_set:
                     selected_folder_ids_set.add(item.folder_id)
@@ -735,37 +1995,137 @@ class FavoriteManager:
                 export_data["selected_items"] = sorted(item_ids_set)
         return export_data, asset_plan
 
+    @staticmethod
+    def _read_export_asset(asset: _ExportAsset) -> tuple[bytes | None, str | None]:
+        """Worker: load and hash a small asset so the writer only appends bytes.
+
+        Assets above ``_EXPORT_INLINE_MAX_BYTES`` return ``(None, None)``; the
+        writer streams and hashes them in the same pass.
+        """
+        if asset.source.stat().st_size > _EXPORT_INLINE_MAX_BYTES:
+            return None, None
+        data = asset.source.read_bytes()
+        return data, hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def _export_read_ahead_cost(asset: _ExportAsset) -> int:
+        """Bytes an asset holds in memory between its read and its write."""
+        try:
+            size = asset.source.stat().st_size
+        except OSError:
+            return 0
+        return size if size <= _EXPORT_INLINE_MAX_BYTES else 0
+
+    @staticmethod
+    def _export_zip_info(asset: _ExportAsset) -> ZipInfo:
+        info = ZipInfo.from_file(asset.source, asset.rel_path)
+        info.compress_type = (
+            ZIP_STORED
+            if asset.source.suffix.lower() in _EXPORT_STORED_SUFFIXES
+            else ZIP_DEFLATED
+        )
+        return info
+
+    def _write_export_asset(
+        self,
+        zf: ZipFile,
+        asset: _ExportAsset,
+        future: Future[tuple[bytes | None, str | None]],
+    ) -> None:
+        try:
+            data, checksum = future.result()
+            info = self._export_zip_info(asset)
+            if data is not None:
+                zf.writestr(info, data)
+                size = len(data)
+            else:
+                hasher = hashlib.sha256()
+                size = 0
+                with asset.source.open("rb") as src, zf.open(info, "w", force_zip64=True) as dst:
+                    while chunk := src.read(_COPY_CHUNK_SIZE):
+                        hasher.update(chunk)
+                        dst.write(chunk)
+                        size += len(chunk)
+                checksum = hasher.hexdigest()
+        except Exception as exc:  # pragma: no cover - defensive logging
+            logger.warning(
+                "导出收藏时复制资源失败: {error}",
+                error=str(exc),
+            )
+            for payload in asset.payloads:
+                payload["local_path"] = None
+                payload.pop("checksum", None)
+                payload.pop("file_size", None)
+            return
+        for payload in asset.payloads:
+            payload["checksum"] = checksum
+            payload["file_size"] = size
+
     def _build_export_package(
         self,
         target_path: Path,
         export_data: dict[str, Any],
-        asset_plan: list[tuple[Path, str]],
+        asset_plan: list[_ExportAsset],
+        progress_callback: ProgressCallback | None = None,
     ) -> Path:
+        """Stream assets straight into the package, hashing them on the way.
+
+        Small assets are read and hashed by a thread pool while this thread
+        appends them to the ZIP in plan order. The read-ahead window is bounded
+        both in assets and in buffered bytes (``_EXPORT_READ_AHEAD_BYTES``).
+        ``favorites.json`` is written last so it carries the checksums.
+        """
         target_path = Path(target_path)
         if target_path.is_dir():
             package_path = target_path / "favorites.ltwfav"
         else:
             package_path = target_path
-        with tempfile.TemporaryDirectory() as tmp_dir:
-            tmp_root = Path(tmp_dir)
-            for source, rel_path in asset_plan:
-                destination = tmp_root / rel_path
-                destination.parent.mkdir(parents=True, exist_ok=True)
-                try:
-                    shutil.copy2(source, destination)
-                except Exception as exc:  # pragma: no cover - defensive logging
-                    logger.warning(
-                        "导出收藏时复制资源失败: {error}",
-                        error=str(exc),
-                    )
-            json_path = tmp_root / EXPORT_DATA_FILENAME
-            with json_path.open("w", encoding="utf-8") as fp:
-                json.dump(export_data, fp, ensure_ascii=False, indent=2)
-            package_path.parent.mkdir(parents=True, exist_ok=True)
-            with ZipFile(package_path, "w", compression=ZIP_DEFLATED) as zf:
-                for entry in tmp_root.rglob("*"):
-                    arcname = entry.relative_to(tmp_root)
-                    zf.write(entry, arcname)
+        package_path.parent.mkdir(parents=True, exist_ok=True)
+        total = len(asset_plan)
+        tmp_package = package_path.with_name(f".{package_path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            with ZipFile(tmp_package, "w", compression=ZIP_DEFLATED) as zf:
+                with ThreadPoolExecutor(
+                    max_workers=_EXPORT_WORKERS,
+                    thread_name_prefix="ltw-fav-export",
+                ) as executor:
+                    window: deque[
+                        tuple[_ExportAsset, Future[tuple[bytes | None, str | None]], int]
+                    ] = deque()
+                    pending = iter(asset_plan)
+                    upcoming: tuple[_ExportAsset, int] | None = None
+                    buffered = 0
+                    done = 0
+                    while True:
+                        while len(window) < _EXPORT_WORKERS * 2:
+                            if upcoming is None:
+                                asset = next(pending, None)
+                                if asset is None:
+                                    break
+                                upcoming = (asset, self._export_read_ahead_cost(asset))
+                            asset, cost = upcoming
+                            # 窗口为空时总是放行，保证单个资源也能推进
+                            if window and buffered + cost > _EXPORT_READ_AHEAD_BYTES:
+                                break
+                            upcoming = None
+                            buffered += cost
+                            future = executor.submit(self._read_export_asset, asset)
+                            window.append((asset, future, cost))
+                        if not window:
+                            break
+                        asset, future, cost = window.popleft()
+                        self._write_export_asset(zf, asset, future)
+                        buffered -= cost
+                        done += 1
+                        if progress_callback is not None:
+                            progress_callback(done, total)
+                zf.writestr(
+                    EXPORT_DATA_FILENAME,
+                    json.dumps(export_data, ensure_ascii=False, indent=2),
+                )
+            os.replace(tmp_package, package_path)
+        finally:
+            tmp_package.unlink(missing_ok=True)
         return package_path
 
     def export_folders(
@@ -774,12 +2134,18 @@ class FavoriteManager:
         folder_ids: Sequence[str] | None = None,
         *,
         include_assets: bool = True,
+        progress_callback: ProgressCallback | None = None,
     ) -> Path:
         export_data, asset_plan = self._prepare_export(
             folder_ids,
             include_assets=include_assets,
         )
-        return self._build_export_package(target_path, export_data, asset_plan)
+        return self._build_export_package(
+            target_path,
+            export_data,
+            asset_plan,
+            progress_callback,
+        )
 
     def export_items(
         self,
@@ -787,6 +2153,7 @@ class FavoriteManager:
         item_ids: Sequence[str],
         *,
         include_assets: bool = True,
+        progress_callback: ProgressCallback | None = None,
     ) -> Path:
         if not item_ids:
             raise ValueError("需要至少选择一个收藏才能导出。")
@@ -795,136 +2162,215 @@ class FavoriteManager:
             include_assets=include_assets,
             item_ids=item_ids,
         )
-        return self._build_export_package(target_path, export_data, asset_plan)
+        return self._build_export_package(
+            target_path,
+            export_data,
+            asset_plan,
+            progress_callback,
+        )
 
-    def import_folders(self, source_path: Path) -> tuple[int, int]:
+    def import_folders(
+        self,
+        source_path: Path,
+        *,
+        progress_callback: ProgressCallback | None = None,
+    ) -> tuple[int, int]:
+        """Import a ``.ltwfav`` package (or an extracted package directory).
+
+        Assets are streamed straight from the package into their final
+        localization paths with the exported checksum verified on the fly;
+        folders and items are then committed together in a single flush.
+        ``progress_callback(done, total)`` is reported per asset.
+        """
         source_path = Path(source_path)
         if not source_path.exists():
             raise FileNotFoundError(str(source_path))
         source_descriptor = str(source_path.resolve())
-        tmp_dir = tempfile.TemporaryDirectory()
-        tmp_root = Path(tmp_dir.name)
-        try:
-            if source_path.is_dir():
-                for entry in source_path.rglob("*"):
-                    destination = tmp_root / entry.relative_to(source_path)
-                    if entry.is_dir():
-                        destination.mkdir(parents=True, exist_ok=True)
-                    else:
-                        destination.parent.mkdir(parents=True, exist_ok=True)
-                        shutil.copy2(entry, destination)
-            else:
-                with ZipFile(source_path, "r") as zf:
-                    zf.extractall(tmp_root)
-
-            json_path = tmp_root / EXPORT_DATA_FILENAME
-            if not json_path.exists():
-                fallback_path = tmp_root / "favorites.json"
-                json_path = fallback_path if fallback_path.exists() else json_path
-            if not json_path.exists():
-                raise FileNotFoundError("导入包缺少 favorites.json")
-
-            with json_path.open("r", encoding="utf-8") as fp:
-                payload = json.load(fp)
-
-            package_version = int(payload.get("package_version", 1))
-            exported_at = payload.get("exported_at")
-            include_assets_flag = bool(payload.get("include_assets", False))
-            folders_data: dict[str, dict[str, Any]] = payload.get("folders", {}) or {}
-            items_data_raw: dict[str, dict[str, Any]] = payload.get("items", {}) or {}
-            sanitized_items: dict[str, dict[str, Any]] = {}
-            for original_id, raw_item in items_data_raw.items():
-                if isinstance(raw_item, dict):
-                    sanitized_items[str(original_id)] = self._sanitize_import_item_payload(raw_item)
-
-            assets_root = (tmp_root / "assets").resolve()
-            include_assets_flag = include_assets_flag or assets_root.exists()
-
-            created_folders = 0
-            imported_items = 0
-            folder_mapping: dict[str, str] = {}
-            item_mapping: dict[str, str] = {}
+        with _ImportPackage(source_path) as package, self.batch():
+            return self._import_package(package, source_descriptor, progress_callback)
 
-            with self._lock:
-                for original_id, folder_dict in folders_data.items():
-                    if not isinstance(folder_dict, dict):
-                        continue
-                    original_id_str = str(original_id)
-                    target_id = None
-                    for existing_id, existing in self._collection.folders.items():
-                        if existing.name == folder_dict.get("name"):
-                            target_id = existing_id
-                            existing.description = folder_dict.get("description", existing.description)
-                            existing.metadata.update(folder_dict.get("metadata", {}))
-                            existing.touch()
-                            break
-                    if not target_id:
-                        target_id = uuid.uuid4().hex
-                        new_folder = FavoriteFolder.from_dict(folder_dict)
-                        new_folder.id = target_id
-                        new_folder.created_at = time.time()
-                        new_folder.updated_at = time.time()
-                        self._collection.folders[target_id] = new_folder
-                        self._collection.folder_order.append(target_id)
-                        created_folders += 1
-                    folder_mapping[original_id_str] = target_id
-
-                for original_id, item_dict in sanitized_items.items():
-                    source_folder = str(item_dict.get("folder_id", "default"))
-                    target_folder = folder_mapping.get(source_folder, "default")
-                    new_id = uuid.uuid4().hex
-                    new_item = FavoriteItem.from_dict(item_dict)
-                    new_item.id = new_id
-                    new_item.folder_id = target_folder
-                    now = time.time()
-                    new_item.created_at = now
-                    new_item.updated_at = now
-                    new_item.localization = FavoriteLocalizationInfo()
-                    new_item.local_path = None
-                    import_metadata = {
-                        "package_version": package_version,
-                        "source": source_descriptor,
-                        "include_assets": include_assets_flag,
-                        "exported_at": exported_at,
-                        "imported_at": time.time(),
-                    }
-                    new_item.extra["imported_from"] = import_metadata
-                    self._collection.items[new_id] = new_item
-                    item_mapping[str(original_id)] = new_id
-                    imported_items += 1
+    def _stream_import_asset(
+        self,
+        package: _ImportPackage,
+        rel_path: str,
+        destination: Path,
+        expected_checksum: str | None,
+    ) -> tuple[str, int] | None:
+        """Copy one package member to ``destination``; ``None`` if it is missing.
+
+        Raises ``ValueError`` when the content does not match the checksum.
+        """
+        source = package.open(rel_path)
+        if source is None:
+            return None
+        store = self.content_store
+        partial = store.temp_path()
+        hasher = hashlib.sha256()
+        size = 0
+        try:
+            with source, partial.open("wb") as dst:
+                while chunk := source.read(_COPY_CHUNK_SIZE):
+                    hasher.update(chunk)
+                    dst.write(chunk)
+                    size += len(chunk)
+            checksum = hasher.hexdigest()
+            if expected_checksum and expected_checksum.lower() != checksum:
+                raise ValueError("资源校验和不匹配")
+            store.adopt(partial, checksum)
+            store.materialize(checksum, destination)
+        finally:
+            partial.unlink(missing_ok=True)
+        return checksum, size
 
-                self._collection.ensure_default_folder()
-                self.save()
+    def _import_package(
+        self,
+        package: _ImportPackage,
+        source_descriptor: str,
+        progress_callback: ProgressCallback | None,
+    ) -> tuple[int, int]:
+        data_file = package.open(EXPORT_DATA_FILENAME)
+        if data_file is None:
+            raise FileNotFoundError("导入包缺少 favorites.json")
+        with data_file:
+            payload = json.load(data_file)
+
+        package_version = int(payload.get("package_version", 1))
+        exported_at = payload.get("exported_at")
+        include_assets_flag = bool(payload.get("include_assets", False)) or package.has_assets()
+        folders_data: dict[str, dict[str, Any]] = payload.get("folders", {}) or {}
+        items_data_raw: dict[str, dict[str, Any]] = payload.get("items", {}) or {}
+        sanitized_items: dict[str, dict[str, Any]] = {}
+        for original_id, raw_item in items_data_raw.items():
+            if isinstance(raw_item, dict):
+                sanitized_items[str(original_id)] = self._sanitize_import_item_payload(raw_item)
+
+        created_folders = 0
+        folder_mapping: dict[str, str] = {}
+        new_items: list[FavoriteItem] = []
+        # (item, package member, destination, folder segment, expected checksum)
+        asset_jobs: list[tuple[FavoriteItem, str, Path, str, str | None]] = []
+        localization_root = self.localization_root()
 
-            tmp_root_real = tmp_root.resolve()
-            for original_id, new_id in item_mapping.items():
-                item_dict = sanitized_items.get(original_id) or {}
+        with self._lock:
+            for original_id, folder_dict in folders_data.items():
+                if not isinstance(folder_dict, dict):
+                    continue
+                original_id_str = str(original_id)
+                target_id = None
+                for existing_id, existing in list(self._collection.folders.items()):
+                    if existing.name == folder_dict.get("name"):
+                        target_id = existing_id
+                        existing = existing.copy()
+                        self._collection.folders[existing_id] = existing
+                        existing.description = folder_dict.get("description", existing.description)
+                        existing.metadata.update(folder_dict.get("metadata", {}))
+                        existing.touch()
+                        self._mark_folders_dirty()
+                        break
+                if not target_id:
+                    target_id = uuid.uuid4().hex
+                    new_folder = FavoriteFolder.from_dict(folder_dict)
+                    new_folder.id = target_id
+                    new_folder.created_at = time.time()
+                    new_folder.updated_at = time.time()
+                    self._collection.folders[target_id] = new_folder
+                    self._collection.folder_order.append(target_id)
+                    self._mark_folders_dirty()
+                    created_folders += 1
+                folder_mapping[original_id_str] = target_id
+            self._ensure_default_folder()
+
+            for item_dict in sanitized_items.values():
+                source_folder = str(item_dict.get("folder_id", "default"))
+                target_folder = folder_mapping.get(source_folder, "default")
+                new_item = FavoriteItem.from_dict(item_dict)
+                new_item.id = uuid.uuid4().hex
+                new_item.folder_id = target_folder
+                now = time.time()
+                new_item.created_at = now
+                new_item.updated_at = now
+                new_item.localization = FavoriteLocalizationInfo()
+                new_item.local_path = None
+                new_item.extra["imported_from"] = {
+                    "package_version": package_version,
+                    "source": source_descriptor,
+                    "include_assets": include_assets_flag,
+                    "exported_at": exported_at,
+                    "imported_at": now,
+                }
+                new_items.append(new_item)
                 localization_info = item_dict.get("localization") or {}
                 rel_path = localization_info.get("local_path")
-                if not rel_path:
-                    continue
-                asset_candidate = (tmp_root / rel_path).resolve()
-                try:
-                    asset_candidate.relative_to(tmp_root_real)
-                except ValueError:
-                    logger.warning("导入收藏时检测到不安全的资源路径，已跳过: {path}", path=rel_path)
-                    continue
-                if asset_candidate.exists():
-                    self.localize_item_from_file(new_id, str(asset_candidate))
-                else:
+                if rel_path:
+                    folder_segment = self._localization_folder_segment(target_folder)
+                    filename = self._localization_filename(new_item, Path(rel_path))
+                    asset_jobs.append(
+                        (
+                            new_item,
+                            rel_path,
+                            localization_root / folder_segment / filename,
+                            folder_segment,
+                            localization_info.get("checksum"),
+                        ),
+                    )
+
+        total = len(asset_jobs)
+        for done, (item, rel_path, destination, folder_segment, expected) in enumerate(
+            asset_jobs,
+            start=1,
+        ):
+            try:
+                result = self._stream_import_asset(package, rel_path, destination, expected)
+            except Exception as exc:
+                logger.warning(
+                    "导入收藏资源失败 {path}: {error}",
+                    path=rel_path,
+                    error=str(exc),
+                )
+                item.localization = FavoriteLocalizationInfo(
+                    status="failed",
+                    folder_path=folder_segment,
+                    updated_at=time.time(),
+                    message=str(exc),
+                )
+            else:
+                if result is None:
                     logger.warning("导入收藏缺少资源文件: {path}", path=rel_path)
+                else:
+                    checksum, size = result
+                    local_path = str(destination)
+                    item.localization = FavoriteLocalizationInfo(
+                        status="completed",
+                        local_path=local_path,
+                        folder_path=Path(folder_segment).as_posix(),
+                        updated_at=time.time(),
+                        checksum=checksum,
+                        file_size=size,
+                    )
+                    item.local_path = local_path
+                    if item.source.type == "local":
+                        item.source.local_path = local_path
+            if progress_callback is not None:
+                progress_callback(done, total)
 
-            return created_folders, imported_items
-        finally:
-            tmp_dir.cleanup()
+        with self._lock:
+            for item in new_items:
+                self._collection.items[item.id] = item
+                self._mark_item_dirty(item.id)
+            self.save()
+
+        return created_folders, len(new_items)
 
     def reset_localization(self, item_id: str) -> bool:
         with self._lock:
-            item = self._collection.items.get(item_id)
+            item = self._edit_item(item_id)
             if not item:
                 return False
+            previous = item.localization
             item.localization = FavoriteLocalizationInfo()
             item.update_timestamp()
+            self._mark_item_dirty(item_id)
+            self._release_localized_copy(previous.local_path, previous.checksum)
             self.save()
             return True
 
@@ -939,10 +2385,17 @@ class FavoriteManager:
         checksum: str | None = None,
         file_size: int | None = None,
     ) -> bool:
+        """Record a localization state change for ``item_id``.
+
+        When a completed localization is replaced (reset to pending, failed,
+        or re-localized elsewhere or to other content), the previous file and
+        blob are released like :meth:`remove_item` does.
+        """
         with self._lock:
-            item = self._collection.items.get(item_id)
+            item = self._edit_item(item_id)
             if not item:
                 return False
+            previous = item.localization.copy()
             item.localization.status = status
             item.localization.local_path = local_path
             item.localization.folder_path = folder_path
@@ -955,6 +2408,12 @@ class FavoriteManager:
                 if item.source.type == "local":
                     item.source.local_path = local_path
             item.update_timestamp()
+            self._mark_item_dirty(item_id)
+            if previous.status == "completed":
+                self._release_localized_copy(
+                    previous.local_path if previous.local_path != local_path else None,
+                    previous.checksum if previous.checksum != checksum else None,
+                )
             self.save()
             return True
 
@@ -977,34 +2436,132 @@ class FavoriteManager:
         if folder_id in self._collection.folders:
             return folder_id
         logger.warning("尝试写入不存在的收藏夹 {folder_id}，已自动切换到默认收藏夹", folder_id=folder_id)
-        self._collection.ensure_default_folder()
+        self._ensure_default_folder()
         return "default"
 
     def list_items(self, folder_id: str | None = None) -> list[FavoriteItem]:
         with self._lock:
-            items = list(self._collection.items.values())
-            if folder_id and folder_id != "__all__":
-                items = [item for item in items if item.folder_id == folder_id]
-            items.sort(key=lambda item: item.updated_at, reverse=True)
-            return [FavoriteItem.from_dict(item.to_dict()) for item in items]
+            scope = folder_id if folder_id and folder_id != "__all__" else None
+            items = self._collection.items
+            return [items[item_id] for item_id in self._index.recent_ids(scope)]
+
+    def list_tags(self) -> dict[str, int]:
+        """Return every tag in use with the number of favorites carrying it."""
+        with self._lock:
+            return self._index.tag_counts()
+
+    @staticmethod
+    def _encode_cursor(sort: str, entry: tuple[Any, str]) -> str:
+        raw = json.dumps([sort, *entry], ensure_ascii=False).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+
+    @staticmethod
+    def _decode_cursor(cursor: str, sort: str) -> tuple[Any, str] | None:
+        """Decode ``cursor``; a cursor issued for another sort mode raises ``ValueError``."""
+        try:
+            cursor_sort, key, item_id = json.loads(
+                base64.urlsafe_b64decode(cursor.encode("ascii")),
+            )
+        except Exception:
+            logger.warning("无效的收藏分页游标: {cursor}", cursor=cursor)
+            return None
+        if cursor_sort != sort:
+            raise ValueError(
+                f"cursor was issued for sort {cursor_sort!r}, cannot continue with {sort!r}",
+            )
+        return key, str(item_id)
+
+    def _sort_key(self, item: FavoriteItem, field_name: str) -> Any:
+        if field_name == "created":
+            return float(item.created_at)
+        if field_name == "title":
+            return normalize_text(item.title)
+        return float(item.updated_at)
+
+    def _item_matches_text(self, item: FavoriteItem, tokens: list[str]) -> bool:
+        haystack = normalize_text(
+            "\n".join(
+                [
+                    item.title,
+                    item.description,
+                    item.source.title,
+                    *item.tags,
+                ],
+            ),
+        )
+        return all(token in haystack for token in tokens)
+
+    def query(
+        self,
+        folder_id: str | None = None,
+        *,
+        tags: Sequence[str] | None = None,
+        text: str | None = None,
+        sort: FavoriteSort = "updated_desc",
+        cursor: str | None = None,
+        limit: int = 60,
+    ) -> FavoriteQueryResult:
+        """Return one page of favorites plus a cursor for the next page.
+
+        ``tags`` must all be present on an item; ``text`` is matched
+        (case-insensitively, every whitespace-separated token) against title,
+        description, source title and tags. Cursors are keyset based, so
+        pages stay consistent while other items are added or removed. A
+        cursor only continues the sort mode it was issued for; passing it
+        with a different ``sort`` raises ``ValueError``.
+        """
+        field_name, _, direction = sort.partition("_")
+        descending = direction != "asc"
+        scope = folder_id if folder_id and folder_id != "__all__" else None
+        tag_list = self._normalize_tags(tags)
+        tokens = normalize_text(text or "").split()
+        limit = max(1, int(limit))
+        with self._lock:
+            items = self._collection.items
+            if field_name == "updated":
+                entries = self._index.ordered_entries(scope)
+            else:
+                entries = sorted(
+                    (self._sort_key(items[item_id], field_name), item_id)
+                    for _, item_id in self._index.ordered_entries(scope)
+                )
+            if tag_list or tokens:
+                allowed: set[str] | None = None
+                for tag in tag_list:
+                    tagged = self._index.tag_ids(tag)
+                    allowed = tagged if allowed is None else allowed & tagged
+                entries = [
+                    entry
+                    for entry in entries
+                    if (allowed is None or entry[1] in allowed)
+                    and (not tokens or self._item_matches_text(items[entry[1]], tokens))
+                ]
+            total = len(entries)
+            after = self._decode_cursor(cursor, sort) if cursor else None
+            if descending:
+                end = bisect.bisect_left(entries, after) if after else total
+                page = [entries[index] for index in range(end - 1, max(end - 1 - limit, -1), -1)]
+                has_more = end - len(page) > 0
+            else:
+                start = bisect.bisect_right(entries, after) if after else 0
+                page = entries[start : start + limit]
+                has_more = start + len(page) < total
+            return FavoriteQueryResult(
+                items=[items[item_id] for _, item_id in page],
+                total=total,
+                next_cursor=self._encode_cursor(sort, page[-1]) if page and has_more else None,
+            )
 
     def get_item(self, item_id: str) -> FavoriteItem | None:
         with self._lock:
-            item = self._collection.items.get(item_id)
-            return FavoriteItem.from_dict(item.to_dict()) if item else None
+            return self._collection.items.get(item_id)
 
     def find_by_source(self, source: FavoriteSource) -> FavoriteItem | None:
         if not source.identifier and not source.url:
             return None
         with self._lock:
-            for item in self._collection.items.values():
-                if item.source.identifier and source.identifier:
-                    if item.source.identifier == source.identifier:
-                        return FavoriteItem.from_dict(item.to_dict())
-                if item.source.url and source.url:
-                    if item.source.url == source.url:
-                        return FavoriteItem.from_dict(item.to_dict())
-        return None
+            item_id = self._index.find(source.identifier, source.url)
+            return self._collection.items.get(item_id) if item_id else None
 
     def add_or_update_item(
         self,
@@ -1029,13 +2586,11 @@ class FavoriteManager:
         normalized_description = description.strip()
         extra = dict(extra or {})
         with self._lock:
-            self._collection.ensure_default_folder()
+            self._ensure_default_folder()
             resolved_folder_id = self._resolve_folder_id(folder_id)
-            existing = None
-            if resolved_source.identifier or resolved_source.url:
-                existing = self.find_by_source(resolved_source)
-            if existing:
-                item = self._collection.items[existing.id]
+            existing_id = self._index.find(resolved_source.identifier, resolved_source.url)
+            if existing_id and existing_id in self._collection.items:
+                item = self._edit_item(existing_id)
                 item.folder_id = resolved_folder_id
                 item.title = normalized_title
                 if normalized_description:
@@ -1056,8 +2611,9 @@ class FavoriteManager:
                 if extra:
                     item.extra.update(extra)
                 item.update_timestamp()
+                self._mark_item_dirty(item.id)
                 self.save()
-                return FavoriteItem.from_dict(item.to_dict()), False
+                return item, False
 
             item_id = uuid.uuid4().hex
             now = time.time()
@@ -1075,8 +2631,9 @@ class FavoriteManager:
                 extra=extra,
             )
             self._collection.items[item_id] = item
+            self._mark_item_dirty(item_id)
             self.save()
-            return FavoriteItem.from_dict(item.to_dict()), True
+            return item, True
 
     def add_local_item(
         self,
@@ -1143,7 +2700,7 @@ class FavoriteManager:
         extra: dict[str, Any] | None = None,
     ) -> bool:
         with self._lock:
-            item = self._collection.items.get(item_id)
+            item = self._edit_item(item_id)
             if not item:
                 return False
             if folder_id is not None:
@@ -1157,13 +2714,22 @@ class FavoriteManager:
             if extra:
                 item.extra.update(extra)
             item.update_timestamp()
+            self._mark_item_dirty(item_id)
             self.save()
             return True
 
     def remove_item(self, item_id: str) -> bool:
+        """Remove a favorite.
+
+        A completed localized copy is deleted with it; its content-store blob
+        goes too once no other favorite references the same content.
+        """
         with self._lock:
             if item_id in self._collection.items:
-                del self._collection.items[item_id]
+                localization = self._collection.items.pop(item_id).localization
+                self._mark_item_deleted(item_id)
+                if localization.status == "completed":
+                    self._release_localized_copy(localization.local_path, localization.checksum)
                 self.save()
                 return True
             return False
@@ -1171,66 +2737,323 @@ class FavoriteManager:
     # ------------------------------------------------------------------
     # AI helpers
     # ------------------------------------------------------------------
-    def set_classifier(self, classifier: FavoriteClassifier | None) -> None:
+    def set_classifier(
+        self,
+        classifier: FavoriteClassifier | BatchFavoriteClassifier | None,
+    ) -> None:
         with self._lock:
             self._classifier = classifier
 
-    async def maybe_classify_item(self, item_id: str) -> FavoriteAIResult | None:
-        classifier = None
+    def bind_event_loop(self, loop: asyncio.AbstractEventLoop | None) -> None:
+        """Run the classification queue on ``loop`` (the application loop).
+
+        Without a bound loop the queue falls back to a private worker thread.
+        """
+        with self._classify_lock:
+            self._loop = loop
+
+    @staticmethod
+    async def _call_classifier(func: Callable[[Any], Any], argument: Any) -> Any:
+        """Await async classifiers on the loop; run sync ones in a worker thread."""
+        # 实现了 async __call__ 的可调用对象同样按协程处理
+        if inspect.iscoroutinefunction(func) or inspect.iscoroutinefunction(type(func).__call__):
+            return await func(argument)
+        result = await asyncio.to_thread(func, argument)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    def _classifier_batch_size(self) -> int:
+        size = getattr(self._classifier, "batch_size", None)
+        return max(1, int(size)) if isinstance(size, int) else _CLASSIFY_BATCH_SIZE
+
+    async def _run_classifier(
+        self,
+        classifier: FavoriteClassifier | BatchFavoriteClassifier,
+        items: list[FavoriteItem],
+    ) -> list[FavoriteAIResult | Exception | None]:
+        classify_batch = getattr(classifier, "classify_batch", None)
+        if callable(classify_batch):
+            try:
+                results = await self._call_classifier(classify_batch, items)
+                results = list(results or [])
+                if len(results) != len(items):
+                    raise ValueError(
+                        f"classify_batch 返回 {len(results)} 个结果，期望 {len(items)} 个",
+                    )
+            except Exception as exc:
+                logger.error(f"收藏 AI 批量分类失败: {exc}")
+                return [exc] * len(items)
+            return results
+
+        async def _classify_one(item: FavoriteItem) -> FavoriteAIResult | Exception | None:
+            try:
+                result = await self._call_classifier(classifier, item)
+            except Exception as exc:
+                logger.error(f"收藏 AI 分类失败: {exc}")
+                return exc
+            return result
+
+        return list(await asyncio.gather(*(_classify_one(item) for item in items)))
+
+    async def _classify_chunk(self, item_ids: Sequence[str]) -> dict[str, FavoriteAIResult | None]:
+        """Classify ``item_ids`` in one classifier call and write all results in one commit.
+
+        Taking the manager lock and saving happen in a worker thread, so the
+        coroutine is safe to run on the application loop.
+        """
+        classifier, items = await asyncio.to_thread(self._begin_classification, item_ids)
+        if classifier is None or not items:
+            return {}
+        results = await self._run_classifier(classifier, items)
+        return await asyncio.to_thread(self._apply_classification, items, results)
+
+    def _begin_classification(
+        self,
+        item_ids: Sequence[str],
+    ) -> tuple[FavoriteClassifier | BatchFavoriteClassifier | None, list[FavoriteItem]]:
         with self._lock:
-            item = self._collection.items.get(item_id)
-            if not item:
-                return None
             classifier = self._classifier
             if classifier is None:
-                return None
-            item.ai.status = "pending"
+                return None, []
+            items: list[FavoriteItem] = []
+            for item_id in item_ids:
+                item = self._edit_item(item_id)
+                if item is None:
+                    continue
+                item.ai.status = "pending"
+                self._mark_item_dirty(item_id)
+                items.append(item)
+        return classifier, items
+
+    def _apply_classification(
+        self,
+        items: list[FavoriteItem],
+        results: Sequence[FavoriteAIResult | Exception | None],
+    ) -> dict[str, FavoriteAIResult | None]:
+        applied: dict[str, FavoriteAIResult | None] = {}
+        with self.batch(), self._lock:
+            now = time.time()
+            for source, result in zip(items, results):
+                item = self._edit_item(source.id)
+                if item is None:
+                    continue
+                if isinstance(result, Exception):
+                    item.ai.status = "failed"
+                    item.ai.metadata.update({"error": str(result)})
+                    applied[item.id] = None
+                elif result is None:
+                    item.ai.status = "idle"
+                    applied[item.id] = None
+                else:
+                    item.ai.status = "completed"
+                    item.ai.suggested_tags = self._normalize_tags(result.tags)
+                    item.ai.suggested_folder_id = result.folder_id
+                    item.ai.metadata = dict(result.metadata)
+                    applied[item.id] = result
+                item.ai.updated_at = now
+                self._mark_item_dirty(item.id)
             self.save()
+        return applied
+
+    async def maybe_classify_item(self, item_id: str) -> FavoriteAIResult | None:
+        results = await self._classify_chunk([item_id])
+        return results.get(item_id)
+
+    # ------------------------------------------------------------------
+    # classification queue
+    # ------------------------------------------------------------------
+    def add_classification_listener(self, callback: Callable[[list[str]], None]) -> None:
+        """``callback(item_ids)`` fires after each batch is saved.
+
+        It runs on the bound event loop, or on the fallback worker thread.
+        """
+        with self._classify_lock:
+            if callback not in self._classify_listeners:
+                self._classify_listeners.append(callback)
+
+    def remove_classification_listener(self, callback: Callable[[list[str]], None]) -> None:
+        with self._classify_lock:
+            if callback in self._classify_listeners:
+                self._classify_listeners.remove(callback)
+
+    def enqueue_classification(self, item_ids: Iterable[str]) -> int:
+        """Queue items for background AI classification.
+
+        Items arriving within a short window are grouped into batches of the
+        classifier's ``batch_size`` with at most ``_CLASSIFY_CONCURRENCY``
+        batches in flight. The queue is drained on the loop given to
+        :meth:`bind_event_loop` (sync classifiers and all lock/IO work run in
+        worker threads), or on a private worker thread when no loop is bound.
+        Returns the number of newly queued items.
+        """
+        with self._lock:
+            if self._classifier is None:
+                return 0
+        with self._classify_lock:
+            added = 0
+            for item_id in item_ids:
+                if item_id not in self._classify_queue:
+                    self._classify_queue[item_id] = None
+                    added += 1
+            if self._classify_queue and not self._classification_running():
+                loop = self._loop
+                if loop is not None and loop.is_running() and not loop.is_closed():
+                    self._classify_future = asyncio.run_coroutine_threadsafe(
+                        self._drain_classification_queue(),
+                        loop,
+                    )
+                    self._classify_future.add_done_callback(self._on_classification_drained)
+                else:
+                    self._classify_thread = Thread(
+                        target=self._classification_worker,
+                        name="ltw-fav-classify",
+                        daemon=True,
+                    )
+                    self._classify_thread.start()
+        return added
+
+    def _classification_running(self) -> bool:
+        return self._classify_thread is not None or self._classify_future is not None
+
+    def _on_classification_drained(self, future: concurrent.futures.Future[None]) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"收藏 AI 分类队列异常退出: {future.exception()}")
+        with self._classify_lock:
+            if self._classify_future is future:
+                self._classify_future = None
+
+    def pending_classification_count(self) -> int:
+        with self._classify_lock:
+            return len(self._classify_queue)
+
+    def _take_classification_batch(self) -> list[str]:
+        size = self._classifier_batch_size()
+        batch: list[str] = []
+        while self._classify_queue and len(batch) < size:
+            item_id = next(iter(self._classify_queue))
+            del self._classify_queue[item_id]
+            batch.append(item_id)
+        return batch
+
+    def _classification_worker(self) -> None:
         try:
-            result = classifier(item)
-            if inspect.isawaitable(result):
-                result = await result
+            asyncio.run(self._drain_classification_queue())
         except Exception as exc:  # pragma: no cover - defensive logging
-            logger.error(f"收藏 AI 分类失败: {exc}")
-            with self._lock:
-                item = self._collection.items.get(item_id)
-                if item:
-                    item.ai.status = "failed"
-                    item.ai.metadata.update({"error": str(exc)})
-                    item.ai.updated_at = time.time()
-                    self.save()
-            return None
+            logger.error(f"收藏 AI 分类队列异常退出: {exc}")
+            with self._classify_lock:
+                self._classify_thread = None
+
+    async def _drain_classification_queue(self) -> None:
+        semaphore = asyncio.Semaphore(_CLASSIFY_CONCURRENCY)
+        running: set[asyncio.Task[None]] = set()
+        await asyncio.sleep(_CLASSIFY_GATHER_DELAY)
+        while True:
+            await semaphore.acquire()
+            running = {task for task in running if not task.done()}
+            with self._classify_lock:
+                batch_ids = self._take_classification_batch()
+                if not batch_ids and not running:
+                    self._classify_thread = None
+                    self._classify_future = None
+                    semaphore.release()
+                    return
+            if not batch_ids:
+                semaphore.release()
+                await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                continue
+            running.add(asyncio.create_task(self._run_queued_batch(batch_ids, semaphore)))
 
-        if result is None:
-            with self._lock:
-                item = self._collection.items.get(item_id)
-                if item:
-                    item.ai.status = "idle"
-                    item.ai.updated_at = time.time()
-                    self.save()
-            return None
+    async def _run_queued_batch(self, item_ids: list[str], semaphore: asyncio.Semaphore) -> None:
+        try:
+            results = await self._classify_chunk(item_ids)
+        except Exception as exc:  # pragma: no cover - defensive logging
+            logger.error(f"收藏 AI 分类批次失败: {exc}")
+            results = {}
+        finally:
+            semaphore.release()
+        with self._classify_lock:
+            listeners = list(self._classify_listeners)
+        for listener in listeners:
+            try:
+                listener(list(results))
+            except Exception as exc:  # pragma: no cover - defensive logging
+                logger.warning(f"收藏 AI 分类回调失败: {exc}")
+
+    def reclassify_all(
+        self,
+        folder_id: str | None = None,
+        *,
+        progress_callback: ProgressCallback | None = None,
+        cancel_event: Event | None = None,
+    ) -> int:
+        """Re-run the classifier over every favorite (or one folder).
+
+        Blocking; call it from a worker thread, or await
+        :meth:`reclassify_all_async` on the application loop instead.
+        """
+        return asyncio.run(
+            self.reclassify_all_async(
+                folder_id,
+                progress_callback=progress_callback,
+                cancel_event=cancel_event,
+            ),
+        )
 
+    async def reclassify_all_async(
+        self,
+        folder_id: str | None = None,
+        *,
+        progress_callback: ProgressCallback | None = None,
+        cancel_event: Event | None = None,
+    ) -> int:
+        """Coroutine form of :meth:`reclassify_all`.
+
+        Items are sent in classifier sized batches with bounded concurrency,
+        each batch saved in one commit, and ``progress_callback(done, total)``
+        fires after every batch. Returns the number of items classified.
+        """
         with self._lock:
-            item = self._collection.items.get(item_id)
-            if not item:
-                return result
-            item.ai.status = "completed"
-            item.ai.suggested_tags = self._normalize_tags(result.tags)
-            item.ai.suggested_folder_id = result.folder_id
-            item.ai.metadata = dict(result.metadata)
-            item.ai.updated_at = time.time()
-            self.save()
-        return result
+            if self._classifier is None:
+                return 0
+            item_ids = [item.id for item in self.list_items(folder_id)]
+            size = self._classifier_batch_size()
+        chunks = [item_ids[index : index + size] for index in range(0, len(item_ids), size)]
+        total = len(item_ids)
+        cancel_event = cancel_event or Event()
+
+        semaphore = asyncio.Semaphore(_CLASSIFY_CONCURRENCY)
+        done = 0
+
+        async def _run_chunk(chunk: list[str]) -> None:
+            nonlocal done
+            async with semaphore:
+                if cancel_event.is_set():
+                    return
+                await self._classify_chunk(chunk)
+            done += len(chunk)
+            if progress_callback is not None:
+                try:
+                    progress_callback(done, total)
+                except Exception as exc:  # pragma: no cover - defensive logging
+                    logger.warning(f"重新分类进度回调失败: {exc}")
+
+        await asyncio.gather(*(_run_chunk(chunk) for chunk in chunks))
+        return done
 
 
 __all__ = [
     "FavoriteAIInfo",
+    "BatchFavoriteClassifier",
     "FavoriteAIResult",
     "FavoriteClassifier",
     "FavoriteCollection",
     "FavoriteFolder",
     "FavoriteItem",
     "FavoriteLocalizationInfo",
+    "FavoriteLocalizationProgress",
     "FavoriteManager",
+    "FavoriteQueryResult",
+    "FavoriteSort",
     "FavoriteSource",
 ]
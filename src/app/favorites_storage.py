@@ -0,0 +1,395 @@
+"""Storage backends for the favorites subsystem.
+
+Backends persist the plain ``to_dict`` payloads produced by
+:mod:`app.favorites`; they never import the model classes so the manager can
+choose and swap them freely.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from threading import RLock
+from typing import Any, Protocol
+
+import orjson
+from loguru import logger
+
+FAVORITES_SQLITE_SCHEMA_VERSION = 1
+
+STORAGE_BACKEND_JSON = "json"
+STORAGE_BACKEND_SQLITE = "sqlite"
+
+
+@dataclass(slots=True)
+class FavoriteChangeSet:
+    """Rows touched since the last commit.
+
+    ``folders``/``folder_order`` are ``None`` when folders are unchanged.
+    ``full`` asks the backend to rewrite everything from the snapshot.
+    """
+
+    items: dict[str, dict[str, Any]] = field(default_factory=dict)
+    deleted_items: set[str] = field(default_factory=set)
+    folders: dict[str, dict[str, Any]] | None = None
+    folder_order: list[str] | None = None
+    version: int = 1
+    full: bool = False
+
+    def is_empty(self) -> bool:
+        return not (
+            self.items
+            or self.deleted_items
+            or self.folders is not None
+            or self.folder_order is not None
+            or self.full
+        )
+
+
+class FavoriteStorage(Protocol):
+    """Persistence interface used by :class:`app.favorites.FavoriteManager`.
+
+    ``requires_snapshot`` tells the manager to materialize the full payload
+    (under its lock) before each commit, since the commit itself runs outside
+    the manager lock.
+    """
+
+    requires_snapshot: bool
+
+    def load(self) -> dict[str, Any] | None:  # pragma: no cover - Protocol signature
+        """Return the collection payload, or ``None`` when nothing is stored."""
+        ...
+
+    def commit(
+        self,
+        changes: FavoriteChangeSet,
+        snapshot: Callable[[], dict[str, Any]],
+    ) -> None:  # pragma: no cover - Protocol signature
+        """Persist ``changes``; ``snapshot`` yields the full collection payload."""
+        ...
+
+    def close(self) -> None:  # pragma: no cover - Protocol signature
+        ...
+
+
+class JsonFavoriteStorage:
+    """Legacy single-file backend (``favorites.json``).
+
+    Writes go to a temporary file in the same directory which is fsynced and
+    then swapped in with ``os.replace``, so readers never see a torn file.
+    """
+
+    requires_snapshot = True
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def load(self) -> dict[str, Any] | None:
+        if not self._path.exists():
+            return None
+        return orjson.loads(self._path.read_bytes())
+
+    def commit(
+        self,
+        changes: FavoriteChangeSet,
+        snapshot: Callable[[], dict[str, Any]],
+    ) -> None:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        data = orjson.dumps(snapshot(), option=orjson.OPT_INDENT_2)
+        fd, tmp_name = tempfile.mkstemp(
+            prefix=f".{self._path.name}.",
+            suffix=".tmp",
+            dir=self._path.parent,
+        )
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                fp.write(data)
+                fp.flush()
+                os.fsync(fp.fileno())
+            os.replace(tmp_name, self._path)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            raise
+
+    def close(self) -> None:
+        return None
+
+
+class SQLiteFavoriteStorage:
+    """SQLite backend with row-level writes.
+
+    Each favorite and folder is one row holding its JSON payload, with the
+    columns used for lookups (folder, source identifier/url, update time)
+    denormalized and indexed. The database runs in WAL mode so a crash never
+    leaves a half-written collection behind.
+    """
+
+    requires_snapshot = False
+
+    def __init__(self, path: Path, *, legacy_json_path: Path | None = None) -> None:
+        self._path = path
+        self._legacy_json_path = legacy_json_path
+        self._lock = RLock()
+        self._conn: sqlite3.Connection | None = None
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    # ------------------------------------------------------------------
+    # connection helpers
+    # ------------------------------------------------------------------
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self._path, timeout=30, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=OFF")
+            self._ensure_schema(conn)
+            self._conn = conn
+        return self._conn
+
+    def _ensure_schema(self, conn: sqlite3.Connection) -> None:
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS folders (
+                    id TEXT PRIMARY KEY,
+                    position INTEGER NOT NULL DEFAULT 0,
+                    data TEXT NOT NULL
+                )
+                """,
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS items (
+                    id TEXT PRIMARY KEY,
+                    folder_id TEXT NOT NULL,
+                    source_identifier TEXT,
+                    source_url TEXT,
+                    updated_at REAL NOT NULL DEFAULT 0,
+                    data TEXT NOT NULL
+                )
+                """,
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_items_folder "
+                "ON items(folder_id, updated_at DESC)",
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_items_source_identifier "
+                "ON items(source_identifier)",
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_items_source_url ON items(source_url)",
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_items_updated_at ON items(updated_at DESC)",
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO meta(key, value) VALUES ('schema_version', ?)",
+                (str(FAVORITES_SQLITE_SCHEMA_VERSION),),
+            )
+
+    def _get_meta(self, conn: sqlite3.Connection, key: str) -> str | None:
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _set_meta(self, conn: sqlite3.Connection, key: str, value: str) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)",
+            (key, value),
+        )
+
+    # ------------------------------------------------------------------
+    # row helpers
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _item_row(item_id: str, data: dict[str, Any]) -> tuple[Any, ...]:
+        source = data.get("source") or {}
+        return (
+            item_id,
+            str(data.get("folder_id") or "default"),
+            source.get("identifier") or None,
+            source.get("url") or None,
+            float(data.get("updated_at") or 0),
+            json.dumps(data, ensure_ascii=False),
+        )
+
+    def _write_items(
+        self,
+        conn: sqlite3.Connection,
+        items: dict[str, dict[str, Any]],
+    ) -> None:
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO items (
+                id, folder_id, source_identifier, source_url, updated_at, data
+            ) VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            [self._item_row(item_id, data) for item_id, data in items.items()],
+        )
+
+    def _write_folders(
+        self,
+        conn: sqlite3.Connection,
+        folders: dict[str, dict[str, Any]],
+        folder_order: list[str],
+    ) -> None:
+        positions = {folder_id: index for index, folder_id in enumerate(folder_order)}
+        conn.execute("DELETE FROM folders")
+        conn.executemany(
+            "INSERT INTO folders (id, position, data) VALUES (?, ?, ?)",
+            [
+                (
+                    folder_id,
+                    positions.get(folder_id, len(positions)),
+                    json.dumps(data, ensure_ascii=False),
+                )
+                for folder_id, data in folders.items()
+            ],
+        )
+
+    def _write_full(self, conn: sqlite3.Connection, payload: dict[str, Any]) -> None:
+        conn.execute("DELETE FROM items")
+        items = payload.get("items") or {}
+        if isinstance(items, dict):
+            self._write_items(
+                conn,
+                {str(iid): data for iid, data in items.items() if isinstance(data, dict)},
+            )
+        folders = payload.get("folders") or {}
+        order = payload.get("folder_order") or []
+        if isinstance(folders, dict):
+            self._write_folders(
+                conn,
+                {str(fid): data for fid, data in folders.items() if isinstance(data, dict)},
+                [str(fid) for fid in order] if isinstance(order, list) else [],
+            )
+        self._set_meta(conn, "collection_version", str(payload.get("version", 1)))
+        self._set_meta(conn, "initialized_at", str(time.time()))
+
+    # ------------------------------------------------------------------
+    # migration
+    # ------------------------------------------------------------------
+    def _migrate_legacy_json(self, conn: sqlite3.Connection) -> bool:
+        legacy = self._legacy_json_path
+        if legacy is None or not legacy.exists():
+            return False
+        try:
+            with legacy.open("r", encoding="utf-8") as fp:
+                payload = json.load(fp)
+        except Exception as exc:
+            logger.error(f"读取旧版收藏数据失败，跳过迁移: {exc}")
+            return False
+        if not isinstance(payload, dict):
+            return False
+        with conn:
+            self._write_full(conn, payload)
+            self._set_meta(conn, "migrated_from", str(legacy))
+        backup = legacy.with_name(f"{legacy.name}.migrated")
+        try:
+            legacy.replace(backup)
+        except OSError as exc:  # pragma: no cover - filesystem error
+            logger.warning(f"重命名旧版收藏数据失败: {exc}")
+        logger.info(
+            "已将收藏数据从 {legacy} 迁移至 SQLite（{count} 项）",
+            legacy=str(legacy),
+            count=len(payload.get("items") or {}),
+        )
+        return True
+
+    # ------------------------------------------------------------------
+    # storage api
+    # ------------------------------------------------------------------
+    def load(self) -> dict[str, Any] | None:
+        with self._lock:
+            conn = self._connection()
+            if self._get_meta(conn, "initialized_at") is None:
+                if not self._migrate_legacy_json(conn):
+                    return None
+            folders: dict[str, Any] = {}
+            folder_order: list[str] = []
+            for row in conn.execute("SELECT id, data FROM folders ORDER BY position"):
+                try:
+                    folders[row["id"]] = json.loads(row["data"])
+                except json.JSONDecodeError:
+                    logger.warning("收藏夹记录损坏，已跳过: {id}", id=row["id"])
+                    continue
+                folder_order.append(row["id"])
+            items: dict[str, Any] = {}
+            for row in conn.execute("SELECT id, data FROM items"):
+                try:
+                    items[row["id"]] = json.loads(row["data"])
+                except json.JSONDecodeError:
+                    logger.warning("收藏记录损坏，已跳过: {id}", id=row["id"])
+            version = self._get_meta(conn, "collection_version") or "1"
+        return {
+            "version": int(version) if version.isdigit() else 1,
+            "folders": folders,
+            "items": items,
+            "folder_order": folder_order,
+        }
+
+    def commit(
+        self,
+        changes: FavoriteChangeSet,
+        snapshot: Callable[[], dict[str, Any]],
+    ) -> None:
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                if changes.full:
+                    self._write_full(conn, snapshot())
+                    return
+                if changes.deleted_items:
+                    conn.executemany(
+                        "DELETE FROM items WHERE id = ?",
+                        [(item_id,) for item_id in changes.deleted_items],
+                    )
+                if changes.items:
+                    self._write_items(conn, changes.items)
+                if changes.folders is not None:
+                    self._write_folders(
+                        conn,
+                        changes.folders,
+                        changes.folder_order or list(changes.folders),
+                    )
+                if self._get_meta(conn, "initialized_at") is None:
+                    self._set_meta(conn, "initialized_at", str(time.time()))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.close()
+                finally:
+                    self._conn = None
+
+
+__all__ = [
+    "STORAGE_BACKEND_JSON",
+    "STORAGE_BACKEND_SQLITE",
+    "FavoriteChangeSet",
+    "FavoriteStorage",
+    "JsonFavoriteStorage",
+    "SQLiteFavoriteStorage",
+]
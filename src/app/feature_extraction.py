@@ -0,0 +1,186 @@
+"""图片外观特征的计算核心 - 只依赖 NumPy 与 Pillow。
+
+后台进程池的工作进程反序列化 :func:`_compute_features_safe` 时只会导入本模块，
+不会牵连路径初始化、缓存等应用其余部分。缓存与批量调度见 :mod:`app.image_features`。
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from PIL import Image
+
+DEFAULT_COLOR_COUNT = 5
+# 判定“暗色 / 亮色”壁纸的平均亮度阈值（0–1）
+DARK_LUMINANCE = 0.35
+LIGHT_LUMINANCE = 0.6
+# 按颜色筛选时，只有占比不低于该值的主色参与比较
+_MIN_COLOR_WEIGHT = 0.12
+_THUMBNAIL_SIZE = 64
+_KMEANS_ITERATIONS = 12
+
+# Rec. 709 亮度系数
+_LUMA = np.array([0.2126, 0.7152, 0.0722], dtype=np.float32)
+
+
+def parse_color(value: str | Sequence[int]) -> tuple[int, int, int]:
+    """解析 ``#rrggbb`` / ``rrggbb`` 或 ``(r, g, b)``。"""
+    if isinstance(value, str):
+        text = value.strip().lstrip("#")
+        if len(text) == 3:
+            text = "".join(ch * 2 for ch in text)
+        if len(text) != 6:
+            raise ValueError(f"无效的颜色值: {value}")
+        return int(text[0:2], 16), int(text[2:4], 16), int(text[4:6], 16)
+    r, g, b = (int(channel) for channel in value)
+    return r, g, b
+
+
+def _format_color(rgb: Sequence[int]) -> str:
+    return "#{:02x}{:02x}{:02x}".format(*rgb)
+
+
+@dataclass(frozen=True, slots=True)
+class ImageFeatures:
+    """一张图片的紧凑外观特征。
+
+    ``colors`` 按占比 ``weights`` 从高到低排列；``luminance`` 为 0–1 的平均亮度；
+    ``aspect_ratio`` 为原图宽 / 高。
+    """
+
+    colors: tuple[tuple[int, int, int], ...]
+    weights: tuple[float, ...]
+    luminance: float
+    aspect_ratio: float
+
+    @property
+    def dominant_color(self) -> tuple[int, int, int] | None:
+        return self.colors[0] if self.colors else None
+
+    @property
+    def is_dark(self) -> bool:
+        return self.luminance <= DARK_LUMINANCE
+
+    @property
+    def is_light(self) -> bool:
+        return self.luminance >= LIGHT_LUMINANCE
+
+    def color_distance(self, color: str | Sequence[int]) -> float:
+        """与目标颜色最接近的主要色的 RGB 欧氏距离（0–441）。"""
+        target = np.asarray(parse_color(color), dtype=np.float32)
+        candidates = [
+            rgb
+            for rgb, weight in zip(self.colors, self.weights)
+            if weight >= _MIN_COLOR_WEIGHT
+        ] or list(self.colors[:1])
+        if not candidates:
+            return float("inf")
+        palette = np.asarray(candidates, dtype=np.float32)
+        return float(np.sqrt(((palette - target) ** 2).sum(axis=1)).min())
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "colors": [_format_color(rgb) for rgb in self.colors],
+            "weights": [round(weight, 4) for weight in self.weights],
+            "luminance": round(self.luminance, 4),
+            "aspect_ratio": round(self.aspect_ratio, 4),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any] | None) -> ImageFeatures | None:
+        if not isinstance(data, Mapping):
+            return None
+        try:
+            colors = tuple(parse_color(value) for value in data.get("colors") or [])
+            weights = tuple(float(value) for value in data.get("weights") or [])
+            return cls(
+                colors=colors,
+                weights=weights[: len(colors)],
+                luminance=float(data["luminance"]),
+                aspect_ratio=float(data["aspect_ratio"]),
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+
+
+def _kmeans(pixels: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """对 ``(N, 3)`` 像素做 k-means（k-means++ 初始化，固定随机种子保证结果稳定）。"""
+    rng = np.random.default_rng(0)
+    k = min(k, len(pixels))
+    centers = np.empty((k, 3), dtype=np.float32)
+    centers[0] = pixels[rng.integers(len(pixels))]
+    closest = ((pixels - centers[0]) ** 2).sum(axis=1)
+    for index in range(1, k):
+        total = float(closest.sum())
+        if total <= 0:
+            centers[index:] = centers[0]
+            break
+        centers[index] = pixels[rng.choice(len(pixels), p=closest / total)]
+        closest = np.minimum(closest, ((pixels - centers[index]) ** 2).sum(axis=1))
+
+    labels = np.zeros(len(pixels), dtype=np.intp)
+    for _ in range(_KMEANS_ITERATIONS):
+        distances = ((pixels[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        new_labels = distances.argmin(axis=1)
+        counts = np.bincount(new_labels, minlength=k).astype(np.float32)
+        sums = np.stack(
+            [np.bincount(new_labels, weights=pixels[:, channel], minlength=k) for channel in range(3)],
+            axis=1,
+        )
+        occupied = counts > 0
+        centers[occupied] = (sums[occupied] / counts[occupied, None]).astype(np.float32)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+    counts = np.bincount(labels, minlength=k)
+    return centers, counts
+
+
+def compute_features(path: str | Path, color_count: int = DEFAULT_COLOR_COUNT) -> ImageFeatures:
+    """读取图片并计算外观特征；无法解码时抛出异常。"""
+    with Image.open(path) as image:
+        width, height = image.size
+        if image.format == "JPEG":
+            image.draft("RGB", (_THUMBNAIL_SIZE * 2, _THUMBNAIL_SIZE * 2))
+        thumb = image.convert("RGB")
+        thumb.thumbnail((_THUMBNAIL_SIZE, _THUMBNAIL_SIZE), Image.Resampling.BOX)
+        pixels = np.asarray(thumb, dtype=np.float32).reshape(-1, 3)
+
+    luminance = float((pixels @ _LUMA).mean() / 255.0)
+    centers, counts = _kmeans(pixels, color_count)
+    order = np.argsort(-counts)
+    total = float(counts.sum()) or 1.0
+    colors = tuple(
+        tuple(int(round(channel)) for channel in np.clip(centers[index], 0, 255))
+        for index in order
+        if counts[index] > 0
+    )
+    weights = tuple(float(counts[index]) / total for index in order if counts[index] > 0)
+    return ImageFeatures(
+        colors=colors,  # type: ignore[arg-type]
+        weights=weights,
+        luminance=luminance,
+        aspect_ratio=width / height if height else 0.0,
+    )
+
+
+def _compute_features_safe(path: str) -> dict[str, Any] | None:
+    # 在子进程中执行：返回可序列化的字典，解码失败时返回 None
+    try:
+        return compute_features(path).to_dict()
+    except Exception:
+        return None
+
+
+__all__ = [
+    "DARK_LUMINANCE",
+    "DEFAULT_COLOR_COUNT",
+    "LIGHT_LUMINANCE",
+    "ImageFeatures",
+    "compute_features",
+    "parse_color",
+]
@@ -0,0 +1,497 @@
+"""Persistent on-disk catalog for IntelliMarkets wallpaper sources."""
+
+from __future__ import annotations
+
+import io
+import json
+import queue
+import sqlite3
+import tarfile
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import closing
+from dataclasses import dataclass, field
+from pathlib import Path
+from threading import Lock, RLock
+from typing import Any
+
+from loguru import logger
+
+from app.paths import CACHE_DIR
+
+IM_CATALOG_PATH = CACHE_DIR / "intellimarkets_catalog.sqlite3"
+IM_CATALOG_SCHEMA_VERSION = 1
+IM_UNCATEGORIZED = "未分类"
+
+_STREAM_EOF = object()
+# Rows written to the staging table per transaction while the tarball streams in.
+_STAGING_BATCH_SIZE = 200
+
+_SOURCES_SCHEMA = """
+    path TEXT PRIMARY KEY,
+    category TEXT NOT NULL,
+    file_name TEXT NOT NULL,
+    friendly_name TEXT NOT NULL,
+    sort_key TEXT NOT NULL,
+    intro TEXT,
+    icon TEXT,
+    link TEXT,
+    func TEXT,
+    apicore_version TEXT,
+    size INTEGER,
+    parameter_names TEXT,
+    content TEXT NOT NULL
+"""
+
+_INDEX_COLUMNS = (
+    "path",
+    "category",
+    "file_name",
+    "friendly_name",
+    "intro",
+    "icon",
+    "link",
+    "func",
+    "apicore_version",
+    "size",
+    "parameter_names",
+)
+
+
+@dataclass(slots=True)
+class IntelliMarketsEntry:
+    """A parsed source file from the IntelliMarkets repository."""
+
+    path: str
+    category: str
+    file_name: str
+    friendly_name: str
+    intro: str = ""
+    icon: str | None = None
+    link: str | None = None
+    func: str = "GET"
+    apicore_version: str | None = None
+    size: int = 0
+    parameter_names: list[str] = field(default_factory=list)
+    content: dict[str, Any] = field(default_factory=dict)
+
+    def to_index_row(self) -> dict[str, Any]:
+        """Return the lightweight row kept in memory for listing and search."""
+        return {
+            "path": self.path,
+            "category": self.category,
+            "file_name": self.file_name,
+            "friendly_name": self.friendly_name,
+            "intro": self.intro,
+            "icon": self.icon,
+            "link": self.link,
+            "func": self.func,
+            "apicore_version": self.apicore_version,
+            "size": self.size,
+            "parameter_names": list(self.parameter_names),
+        }
+
+
+def parse_source_member(
+    member_name: str,
+    raw_bytes: bytes,
+    size: int,
+) -> IntelliMarketsEntry | None:
+    """Parse one ``.json`` member of the repository tarball.
+
+    ``member_name`` is the full tar path including the top-level
+    ``<owner>-<repo>-<sha>/`` directory. Returns ``None`` for members that are
+    not source definitions or cannot be decoded.
+    """
+    if not member_name.lower().endswith(".json"):
+        return None
+    parts = member_name.split("/", 1)
+    if len(parts) < 2 or not parts[1]:
+        return None
+    relative_path = parts[1]
+    segments = relative_path.split("/")
+    if len(segments) == 1:
+        category = IM_UNCATEGORIZED
+        file_name = segments[0]
+    else:
+        category = segments[0]
+        file_name = segments[-1]
+    if not file_name.lower().endswith(".json"):
+        return None
+
+    text = raw_bytes.decode("utf-8-sig", errors="ignore")
+    try:
+        payload = json.loads(text)
+    except json.JSONDecodeError as exc:
+        logger.error(
+            "解析 IntelliMarkets 图片源失败: {path} -> {error}",
+            path=relative_path,
+            error=str(exc),
+        )
+        return None
+    if not isinstance(payload, dict):
+        return None
+
+    parameter_names: list[str] = []
+    parameters = payload.get("parameters")
+    if isinstance(parameters, list):
+        for param in parameters:
+            if not isinstance(param, dict):
+                continue
+            for key in ("friendly_name", "name"):
+                value = param.get(key)
+                if isinstance(value, str) and value:
+                    parameter_names.append(value)
+
+    apicore_version = payload.get("APICORE_version")
+    return IntelliMarketsEntry(
+        path=relative_path,
+        category=category,
+        file_name=file_name,
+        friendly_name=str(payload.get("friendly_name") or file_name),
+        intro=str(payload.get("intro") or ""),
+        icon=payload.get("icon") if isinstance(payload.get("icon"), str) else None,
+        link=payload.get("link") if isinstance(payload.get("link"), str) else None,
+        func=str(payload.get("func") or "GET"),
+        apicore_version=None if apicore_version is None else str(apicore_version),
+        size=int(size or 0),
+        parameter_names=parameter_names,
+        content=payload,
+    )
+
+
+def iter_tarball_entries(fileobj: io.RawIOBase) -> Iterator[IntelliMarketsEntry]:
+    """Parse source definitions from a gzipped tarball stream.
+
+    The archive is read in stream mode (``r|gz``) so only the current member
+    is ever held in memory and parsing can start before the download ends.
+    """
+    with tarfile.open(fileobj=fileobj, mode="r|gz") as tar:
+        for member in tar:
+            if not member.isfile() or not member.name.lower().endswith(".json"):
+                continue
+            extracted = tar.extractfile(member)
+            if extracted is None:
+                continue
+            entry = parse_source_member(member.name, extracted.read(), member.size)
+            if entry is not None:
+                yield entry
+
+
+class ChunkStreamReader(io.RawIOBase):
+    """Blocking file-like object fed with byte chunks from another thread.
+
+    The producer calls :meth:`feed` for each downloaded chunk and
+    :meth:`finish` at the end; the consumer reads it like a regular file.
+    The internal queue is bounded so a slow consumer applies back-pressure
+    instead of letting the download buffer up in memory.
+    """
+
+    def __init__(self, max_chunks: int = 16) -> None:
+        super().__init__()
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=max_chunks)
+        self._buffer = memoryview(b"")
+        self._eof = False
+        self._aborted = False
+
+    def readable(self) -> bool:
+        return True
+
+    def try_feed(self, chunk: bytes) -> bool:
+        """Queue ``chunk`` without blocking; returns ``False`` when full."""
+        try:
+            self._queue.put_nowait(chunk)
+        except queue.Full:
+            return False
+        return True
+
+    def feed(self, item: Any) -> bool:
+        """Queue ``item``, blocking while full. Returns ``False`` once closed."""
+        while not self.closed:
+            try:
+                self._queue.put(item, timeout=0.5)
+            except queue.Full:
+                continue
+            return True
+        return False
+
+    def finish(self, error: BaseException | None = None) -> None:
+        """Signal end of stream, optionally propagating a producer error."""
+        self.feed(error if error is not None else _STREAM_EOF)
+
+    def abort(self) -> None:
+        """Make pending and future reads fail without waiting for the producer."""
+        self._aborted = True
+
+    def readinto(self, buffer: Any) -> int:
+        while not self._buffer and not self._eof:
+            try:
+                item = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                if self._aborted:
+                    raise OSError("stream aborted") from None
+                continue
+            if item is _STREAM_EOF:
+                self._eof = True
+            elif isinstance(item, BaseException):
+                raise item
+            else:
+                self._buffer = memoryview(item)
+        if not self._buffer:
+            return 0
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+class IntelliMarketsCatalog:
+    """SQLite-backed catalog of IntelliMarkets sources.
+
+    Only index rows are loaded into memory; the full source definition
+    (``content``) stays on disk until :meth:`load_details` is called.
+    """
+
+    def __init__(self, path: Path = IM_CATALOG_PATH) -> None:
+        self._path = path
+        self._lock = RLock()
+        # Serializes replace_all() callers; readers only wait on _lock.
+        self._replace_lock = Lock()
+        self._ready = False
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    # ------------------------------------------------------------------
+    # connection helpers
+    # ------------------------------------------------------------------
+    def _connect(self) -> sqlite3.Connection:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self._path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        if not self._ready:
+            self._ensure_schema(conn)
+            self._ready = True
+        return conn
+
+    def _ensure_schema(self, conn: sqlite3.Connection) -> None:
+        # WAL lets readers proceed while replace_all() fills the staging table.
+        conn.execute("PRAGMA journal_mode=WAL")
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+            )
+            row = conn.execute(
+                "SELECT value FROM meta WHERE key = 'schema_version'",
+            ).fetchone()
+            version = int(row["value"]) if row and str(row["value"]).isdigit() else 0
+            if version != IM_CATALOG_SCHEMA_VERSION:
+                conn.execute("DROP TABLE IF EXISTS sources")
+                conn.execute("DELETE FROM meta")
+            conn.execute(f"CREATE TABLE IF NOT EXISTS sources ({_SOURCES_SCHEMA})")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_sources_category "
+                "ON sources(category, sort_key)",
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO meta(key, value) VALUES ('schema_version', ?)",
+                (str(IM_CATALOG_SCHEMA_VERSION),),
+            )
+
+    # ------------------------------------------------------------------
+    # metadata
+    # ------------------------------------------------------------------
+    def get_meta(self, key: str) -> str | None:
+        with self._lock:
+            try:
+                with closing(self._connect()) as conn:
+                    row = conn.execute(
+                        "SELECT value FROM meta WHERE key = ?",
+                        (key,),
+                    ).fetchone()
+            except sqlite3.Error as exc:
+                logger.warning("读取 IntelliMarkets 目录元数据失败: {error}", error=str(exc))
+                return None
+        return row["value"] if row else None
+
+    def set_meta(self, **values: str | None) -> None:
+        with self._lock:
+            try:
+                with closing(self._connect()) as conn, conn:
+                    for key, value in values.items():
+                        if value is None:
+                            conn.execute("DELETE FROM meta WHERE key = ?", (key,))
+                        else:
+                            conn.execute(
+                                "INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)",
+                                (key, str(value)),
+                            )
+            except sqlite3.Error as exc:
+                logger.warning("写入 IntelliMarkets 目录元数据失败: {error}", error=str(exc))
+
+    @property
+    def revision(self) -> str | None:
+        """Commit SHA the catalog was built from, if known."""
+        return self.get_meta("revision")
+
+    @property
+    def etag(self) -> str | None:
+        return self.get_meta("etag")
+
+    @property
+    def checked_at(self) -> float | None:
+        raw = self.get_meta("checked_at")
+        try:
+            return float(raw) if raw else None
+        except ValueError:
+            return None
+
+    def mark_checked(self, *, etag: str | None = None) -> None:
+        """Record that the remote revision was verified as unchanged."""
+        values: dict[str, str | None] = {"checked_at": str(time.time())}
+        if etag:
+            values["etag"] = etag
+        self.set_meta(**values)
+
+    # ------------------------------------------------------------------
+    # index / details
+    # ------------------------------------------------------------------
+    def load_index(self) -> list[dict[str, Any]]:
+        """Return all index rows ordered by category and display name."""
+        columns = ", ".join(_INDEX_COLUMNS)
+        with self._lock:
+            try:
+                with closing(self._connect()) as conn:
+                    rows = conn.execute(
+                        f"SELECT {columns} FROM sources ORDER BY category, sort_key",
+                    ).fetchall()
+            except sqlite3.Error as exc:
+                logger.warning("读取 IntelliMarkets 目录失败: {error}", error=str(exc))
+                return []
+        result: list[dict[str, Any]] = []
+        for row in rows:
+            item = dict(row)
+            try:
+                item["parameter_names"] = json.loads(item.get("parameter_names") or "[]")
+            except json.JSONDecodeError:
+                item["parameter_names"] = []
+            result.append(item)
+        return result
+
+    def load_details(self, path: str) -> dict[str, Any] | None:
+        """Load the full source definition for ``path``."""
+        with self._lock:
+            try:
+                with closing(self._connect()) as conn:
+                    row = conn.execute(
+                        "SELECT content FROM sources WHERE path = ?",
+                        (path,),
+                    ).fetchone()
+            except sqlite3.Error as exc:
+                logger.warning("读取 IntelliMarkets 图片源详情失败: {error}", error=str(exc))
+                return None
+        if row is None:
+            return None
+        try:
+            payload = json.loads(row["content"])
+        except json.JSONDecodeError:
+            return None
+        return payload if isinstance(payload, dict) else None
+
+    def replace_all(
+        self,
+        entries: Iterable[IntelliMarketsEntry],
+        *,
+        revision: str | None = None,
+        etag: str | None = None,
+    ) -> int:
+        """Atomically replace the catalog contents and return the row count.
+
+        ``entries`` may be a slow stream (e.g. a tarball being downloaded), so
+        rows go into a staging table without holding the reader lock; the lock
+        is only taken for the final swap. Readers keep seeing the previous
+        catalog until then, and a failed stream leaves it untouched.
+        """
+        count = 0
+        with self._replace_lock, closing(self._connect()) as conn:
+            with conn:
+                conn.execute("DROP TABLE IF EXISTS sources_staging")
+                conn.execute(f"CREATE TABLE sources_staging ({_SOURCES_SCHEMA})")
+            batch: list[tuple[Any, ...]] = []
+            for entry in entries:
+                batch.append(
+                    (
+                        entry.path,
+                        entry.category,
+                        entry.file_name,
+                        entry.friendly_name,
+                        entry.friendly_name.lower(),
+                        entry.intro,
+                        entry.icon,
+                        entry.link,
+                        entry.func,
+                        entry.apicore_version,
+                        entry.size,
+                        json.dumps(entry.parameter_names, ensure_ascii=False),
+                        json.dumps(entry.content, ensure_ascii=False),
+                    ),
+                )
+                count += 1
+                if len(batch) >= _STAGING_BATCH_SIZE:
+                    self._insert_staging(conn, batch)
+            self._insert_staging(conn, batch)
+
+            now = str(time.time())
+            with self._lock, conn:
+                # sqlite3 only opens transactions implicitly before DML; begin
+                # explicitly so the swap and the meta update commit together.
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute("DROP TABLE sources")
+                conn.execute("ALTER TABLE sources_staging RENAME TO sources")
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_sources_category "
+                    "ON sources(category, sort_key)",
+                )
+                for key, value in (
+                    ("revision", revision),
+                    ("etag", etag),
+                    ("updated_at", now),
+                    ("checked_at", now),
+                ):
+                    if value is None:
+                        conn.execute("DELETE FROM meta WHERE key = ?", (key,))
+                    else:
+                        conn.execute(
+                            "INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)",
+                            (key, value),
+                        )
+        return count
+
+    @staticmethod
+    def _insert_staging(conn: sqlite3.Connection, batch: list[tuple[Any, ...]]) -> None:
+        if not batch:
+            return
+        with conn:
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO sources_staging (
+                    path, category, file_name, friendly_name, sort_key,
+                    intro, icon, link, func, apicore_version, size,
+                    parameter_names, content
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                batch,
+            )
+        batch.clear()
+
+
+__all__ = [
+    "ChunkStreamReader",
+    "IM_CATALOG_PATH",
+    "IM_UNCATEGORIZED",
+    "IntelliMarketsCatalog",
+    "IntelliMarketsEntry",
+    "iter_tarball_entries",
+    "parse_source_member",
+]
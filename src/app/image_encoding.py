@@ -0,0 +1,332 @@
+"""图片编码核心 - 单张图片的缩放、编码与质量搜索，只依赖 Pillow / NumPy。
+
+后台进程池的工作进程反序列化 :func:`_optimize_job` 时只会导入本模块，不会牵连
+路径初始化、元数据索引等应用其余部分。文件夹级的调度、清单与提交见
+:mod:`app.image_optimizer`。
+"""
+
+from __future__ import annotations
+
+import io
+import math
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from loguru import logger
+from PIL import Image, ImageOps
+
+from app.content_store import hash_file
+
+try:
+    import pillow_jxl  # noqa: F401  # 注册 JPEG XL 编码插件
+except ImportError:
+    pillow_jxl = None
+
+# 编码器内部缓冲（YUV 平面等）按每像素字节数粗略估算
+_ENCODER_BYTES_PER_PIXEL = 3
+
+# 输出格式 -> (Pillow 格式名, 扩展名, 是否支持透明通道)
+_FORMATS: dict[str, tuple[str, str, bool]] = {
+    "avif": ("AVIF", ".avif", True),
+    "webp": ("WEBP", ".webp", True),
+    "jxl": ("JXL", ".jxl", True),
+    "jpeg": ("JPEG", ".jpg", False),
+}
+# 计算 SSIM 时先把图片缩到该长边，避免在原图尺寸上做窗口统计
+_SSIM_SIZE = 512
+_SSIM_WINDOW = 7
+
+
+def available_formats() -> list[str]:
+    """当前 Pillow 可以编码的输出格式（JPEG XL 需要安装 ``pillow-jxl-plugin``）。"""
+    Image.init()
+    return [name for name, (pil_format, _ext, _alpha) in _FORMATS.items() if pil_format in Image.SAVE]
+
+
+@dataclass(frozen=True)
+class OptimizationProfile:
+    """一组优化参数。
+
+    设置 ``target_bytes`` 或 ``target_ssim`` 后，每张图片在
+    ``[min_quality, max_quality]`` 内二分搜索质量：前者取输出不超过目标大小的
+    最高质量，后者取与（缩放后）原图 SSIM 不低于目标值的最低质量。
+    """
+
+    format: str = "avif"
+    quality: int = 85
+    max_resolution: int | None = None  # 长边像素上限，超出时等比缩小
+    strip_metadata: bool = True  # 去除 EXIF / XMP，保留 ICC 色彩配置
+    keep_original: bool = False
+    target_bytes: int | None = None
+    target_ssim: float | None = None
+    min_quality: int = 30
+    max_quality: int = 95
+
+    def __post_init__(self) -> None:
+        if self.format not in _FORMATS:
+            raise ValueError(f"不支持的输出格式: {self.format}")
+        if not 1 <= self.min_quality <= self.max_quality <= 100:
+            raise ValueError("质量范围无效")
+
+    @property
+    def extension(self) -> str:
+        return _FORMATS[self.format][1]
+
+    @property
+    def cache_key(self) -> str:
+        """影响输出内容的参数摘要，写入优化清单，用于判断是否需要重新转换。"""
+        if self.target_bytes:
+            mode = f"bytes{self.target_bytes}:{self.min_quality}-{self.max_quality}"
+        elif self.target_ssim:
+            mode = f"ssim{self.target_ssim:g}:{self.min_quality}-{self.max_quality}"
+        else:
+            mode = f"q{self.quality}"
+        return f"{self.format}:{mode}:{self.max_resolution or 0}:{int(self.strip_metadata)}"
+
+
+def _box_mean(values: np.ndarray, size: int) -> np.ndarray:
+    # 借助积分图计算 size×size 窗口均值（仅保留完整窗口）
+    integral = np.pad(values, ((1, 0), (1, 0))).cumsum(axis=0).cumsum(axis=1)
+    return (
+        integral[size:, size:] - integral[:-size, size:] - integral[size:, :-size] + integral[:-size, :-size]
+    ) / (size * size)
+
+
+def _ssim_luma(image: Image.Image) -> np.ndarray:
+    gray = image.convert("L")
+    if max(gray.size) > _SSIM_SIZE:
+        gray.thumbnail((_SSIM_SIZE, _SSIM_SIZE), Image.Resampling.BOX)
+    return np.asarray(gray, dtype=np.float64)
+
+
+def structural_similarity(reference: np.ndarray, candidate: np.ndarray) -> float:
+    """两张同尺寸灰度图的平均 SSIM（均匀窗口）。"""
+    size = min(_SSIM_WINDOW, *reference.shape)
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    mu_a, mu_b = _box_mean(reference, size), _box_mean(candidate, size)
+    var_a = _box_mean(reference * reference, size) - mu_a * mu_a
+    var_b = _box_mean(candidate * candidate, size) - mu_b * mu_b
+    covariance = _box_mean(reference * candidate, size) - mu_a * mu_b
+    ssim = ((2 * mu_a * mu_b + c1) * (2 * covariance + c2)) / (
+        (mu_a * mu_a + mu_b * mu_b + c1) * (var_a + var_b + c2)
+    )
+    return float(ssim.mean())
+
+
+def _prepare_image(img: Image.Image, profile: OptimizationProfile) -> Image.Image:
+    if profile.strip_metadata:
+        # 去掉 EXIF 前先按方向标记旋转，避免图片“躺倒”（原地处理，不额外复制）
+        ImageOps.exif_transpose(img, in_place=True)
+    if profile.max_resolution and max(img.size) > profile.max_resolution:
+        img.thumbnail((profile.max_resolution, profile.max_resolution), Image.Resampling.LANCZOS)
+
+    keep_alpha = _FORMATS[profile.format][2]
+    if img.mode == "P":
+        # 只有带透明色的调色板图片才需要 RGBA 中间图
+        img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+    if img.mode in ("RGBA", "LA"):
+        if keep_alpha:
+            return img if img.mode == "RGBA" else img.convert("RGBA")
+        # 不支持透明通道的格式：铺白底；直接以 RGBA 图作蒙版，省去拆分通道的整幅拷贝
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img.convert("RGBA") if img.mode == "LA" else img, (0, 0), img)
+        return background
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    return img
+
+
+def _save_options(profile: OptimizationProfile, quality: int, info: dict[str, Any]) -> dict[str, Any]:
+    options: dict[str, Any] = {"quality": quality}
+    if profile.format == "jpeg":
+        # 接近 mozjpeg 默认行为：渐进式、优化哈夫曼表、4:2:0 色度抽样
+        options.update(optimize=True, progressive=True, subsampling="4:2:0")
+    elif profile.format == "webp":
+        options["method"] = 6
+    if info.get("icc_profile"):
+        options["icc_profile"] = info["icc_profile"]
+    if not profile.strip_metadata:
+        if info.get("exif"):
+            options["exif"] = info["exif"]
+        if info.get("xmp") and profile.format != "jxl":
+            options["xmp"] = info["xmp"]
+    return options
+
+
+def _encode(image: Image.Image, profile: OptimizationProfile, quality: int, info: dict[str, Any]) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, _FORMATS[profile.format][0], **_save_options(profile, quality, info))
+    return buffer.getvalue()
+
+
+def _search_quality(
+    image: Image.Image,
+    profile: OptimizationProfile,
+    info: dict[str, Any],
+) -> tuple[bytes, int]:
+    """按目标大小或目标 SSIM 二分搜索质量，返回 ``(编码结果, 质量)``。"""
+    low, high = profile.min_quality, profile.max_quality
+    best: tuple[bytes, int] | None = None
+    reference = _ssim_luma(image) if profile.target_ssim else None
+    while low <= high:
+        quality = (low + high) // 2
+        data = _encode(image, profile, quality, info)
+        if profile.target_bytes:
+            acceptable = len(data) <= profile.target_bytes
+        else:
+            with Image.open(io.BytesIO(data)) as decoded:
+                acceptable = structural_similarity(reference, _ssim_luma(decoded)) >= profile.target_ssim
+        if acceptable:
+            best = (data, quality)
+            # 目标大小：继续尝试更高质量；目标 SSIM：继续尝试更低质量
+            if profile.target_bytes:
+                low = quality + 1
+            else:
+                high = quality - 1
+        elif profile.target_bytes:
+            high = quality - 1
+        else:
+            low = quality + 1
+    if best is not None:
+        return best
+    # 目标无法满足：目标大小取最低质量，目标 SSIM 取最高质量
+    fallback = profile.min_quality if profile.target_bytes else profile.max_quality
+    return _encode(image, profile, fallback, info), fallback
+
+
+def _output_size(size: tuple[int, int], profile: OptimizationProfile) -> tuple[int, int]:
+    width, height = size
+    limit = profile.max_resolution
+    if not limit or max(width, height) <= limit:
+        return width, height
+    factor = limit / max(width, height)
+    return max(1, math.ceil(width * factor)), max(1, math.ceil(height * factor))
+
+
+def _draft_size(
+    size: tuple[int, int],
+    image_format: str | None,
+    profile: OptimizationProfile,
+) -> tuple[int, int] | None:
+    """JPEG 缩图时交给 ``draft()`` 的目标尺寸（解码器以 1/2、1/4、1/8 直接降采样）。"""
+    if image_format != "JPEG":
+        return None
+    output = _output_size(size, profile)
+    return output if output != size else None
+
+
+def _bytes_per_pixel(mode: str) -> int:
+    if mode in ("I", "F"):
+        return 4
+    if mode.startswith("I;16"):
+        return 2
+    # Pillow 内部把多通道像素按 4 字节对齐存储（RGB 同样占 4 字节）
+    return 4 if Image.getmodebands(mode) > 1 else 1
+
+
+def estimate_peak_memory(img: Image.Image, profile: OptimizationProfile) -> int:
+    """根据尚未解码的图片头部估算一次转换的峰值内存（字节）。
+
+    计入解码后的原图（JPEG 按 ``draft`` 降采样后的尺寸）、带方向标记时旋转
+    产生的副本、缩放 / 铺底后的中间图以及编码器缓冲。只是量级估计，用于调度。
+    """
+    try:
+        orientation = img.getexif().get(0x0112, 1) if profile.strip_metadata else 1
+    except Exception:
+        orientation = 1
+    return _estimate_memory(img.size, img.format, img.mode, orientation, profile)
+
+
+def _estimate_memory(
+    size: tuple[int, int],
+    image_format: str | None,
+    mode: str,
+    orientation: int | None,
+    profile: OptimizationProfile,
+) -> int:
+    width, height = size
+    draft = _draft_size(size, image_format, profile)
+    if draft is not None:
+        scale = 1
+        while scale < 8 and width // (scale * 2) >= draft[0] and height // (scale * 2) >= draft[1]:
+            scale *= 2
+        width, height = math.ceil(width / scale), math.ceil(height / scale)
+    decoded = width * height * _bytes_per_pixel(mode)
+    total = decoded
+    if profile.strip_metadata and orientation not in (1, None):
+        total += decoded
+    out_width, out_height = _output_size(size, profile)
+    pixels = out_width * out_height
+    flatten = mode in ("RGBA", "LA", "P") and not _FORMATS[profile.format][2]
+    if (out_width, out_height) != (width, height) or mode not in ("RGB", "RGBA") or flatten:
+        total += pixels * 4
+    return total + pixels * _ENCODER_BYTES_PER_PIXEL
+
+
+def _write_file(path: Path, data: bytes, durable: bool) -> None:
+    with path.open("wb") as fp:
+        fp.write(data)
+        if durable:
+            fp.flush()
+            os.fsync(fp.fileno())
+
+
+def optimize_image(
+    source_path: Path,
+    target_path: Path,
+    profile: OptimizationProfile,
+    *,
+    durable: bool = False,
+) -> tuple[bool, str, int]:
+    """按 ``profile`` 转换单张图片，返回 ``(是否成功, 消息, 实际使用的质量)``。
+
+    ``durable`` 为真时写完后 fsync，保证返回成功时内容已经落盘。
+    """
+    try:
+        img = Image.open(source_path)
+        image = img
+        try:
+            info = dict(img.info)
+            draft = _draft_size(img.size, img.format, profile)
+            if draft is not None:
+                # JPEG 可直接以 1/2、1/4… 分辨率解码，缩图时省去大部分解码内存和时间
+                img.draft("RGB", draft)
+            image = _prepare_image(img, profile)
+            if image is not img:
+                # 中间图已独立：先释放原图的解码数据，编码阶段只保留一份像素
+                img.close()
+            if profile.target_bytes or profile.target_ssim:
+                data, quality = _search_quality(image, profile, info)
+            else:
+                quality = profile.quality
+                data = _encode(image, profile, quality, info)
+        finally:
+            image.close()
+            img.close()
+        _write_file(target_path, data, durable)
+        return True, f"转换成功: {source_path.name}", quality
+
+    except Exception as e:
+        error_msg = f"转换失败 {source_path.name}: {e}"
+        logger.error(error_msg)
+        return False, error_msg, 0
+
+
+def _optimize_job(source: str, target: str, profile: OptimizationProfile) -> tuple[bool, str, int, str, int]:
+    # 在工作进程中执行：参数与返回值都必须可序列化
+    source_path = Path(source)
+    target_path = Path(target)
+    target_path.parent.mkdir(parents=True, exist_ok=True)
+    success, message, quality = optimize_image(source_path, target_path, profile, durable=True)
+    if not success:
+        target_path.unlink(missing_ok=True)
+        return False, message, 0, "", 0
+    size = target_path.stat().st_size if target_path.exists() else 0
+    try:
+        digest, _ = hash_file(source_path)
+    except OSError:
+        digest = ""
+    return True, message, size, digest, quality
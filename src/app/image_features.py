@@ -0,0 +1,91 @@
+"""图片外观特征 - 主色（缩略图上的向量化 k-means）、平均亮度与宽高比。
+
+特征计算是 CPU 密集操作，批量计算通过 :mod:`app.process_pool` 在子进程中
+执行；单个计算函数 :func:`compute_features` 也可以直接在线程中调用。计算本身
+位于只依赖 NumPy / Pillow 的 :mod:`app.feature_extraction`，工作进程只导入它。
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from threading import Event
+from typing import Any
+
+from loguru import logger
+
+from app.feature_extraction import (
+    DARK_LUMINANCE,
+    DEFAULT_COLOR_COUNT,
+    LIGHT_LUMINANCE,
+    ImageFeatures,
+    _compute_features_safe,
+    compute_features,
+    parse_color,
+)
+from app.process_pool import get_process_pool, reset_process_pool
+
+
+def compute_features_batch(
+    paths: Iterable[str | Path],
+    *,
+    progress_callback: Callable[[int, int], None] | None = None,
+    cancel_event: Event | None = None,
+) -> dict[str, ImageFeatures]:
+    """在后台进程池中批量计算特征，返回 ``{路径: 特征}``（跳过无法解码的文件）。
+
+    阻塞调用，请在工作线程中使用。进程池不可用时退回当前线程逐个计算。
+    """
+    targets = [str(path) for path in paths]
+    total = len(targets)
+    results: dict[str, ImageFeatures] = {}
+    if not total:
+        return results
+    cancel_event = cancel_event or Event()
+    finished: set[str] = set()
+
+    def _record(path: str, payload: dict[str, Any] | None) -> None:
+        finished.add(path)
+        features = ImageFeatures.from_dict(payload)
+        if features is not None:
+            results[path] = features
+        if progress_callback is not None:
+            progress_callback(len(finished), total)
+
+    pool = None
+    try:
+        pool = get_process_pool()
+        futures: dict[Future[dict[str, Any] | None], str] = {
+            pool.submit(_compute_features_safe, path): path for path in targets
+        }
+        for future in as_completed(futures):
+            _record(futures[future], future.result())
+            if cancel_event.is_set():
+                for pending in futures:
+                    pending.cancel()
+                break
+        return results
+    except (BrokenProcessPool, OSError, RuntimeError) as exc:
+        logger.warning("后台进程池不可用，改为在当前线程计算图片特征: {error}", error=str(exc))
+        reset_process_pool(pool)
+
+    for path in targets:
+        if path in finished:
+            continue
+        if cancel_event.is_set():
+            break
+        _record(path, _compute_features_safe(path))
+    return results
+
+
+__all__ = [
+    "DARK_LUMINANCE",
+    "DEFAULT_COLOR_COUNT",
+    "LIGHT_LUMINANCE",
+    "ImageFeatures",
+    "compute_features",
+    "compute_features_batch",
+    "parse_color",
+]
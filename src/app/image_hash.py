@@ -0,0 +1,211 @@
+"""感知哈希 - 计算 aHash/dHash/pHash，并用 BK 树做 Hamming 距离近邻查询。
+
+三种哈希都是 64 位整数：先用 Pillow 把图片缩成 64×64 灰度图（JPEG 借助
+``draft`` 直接以低分辨率解码），其余运算全部是 NumPy 向量化操作。
+"""
+
+from __future__ import annotations
+
+from collections.abc import Hashable, Iterable, Mapping
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Generic, TypeVar
+
+import numpy as np
+from PIL import Image
+
+# 两张图的 pHash 距离不超过该值即视为近似重复（64 位中约 10% 不同）
+DEFAULT_MAX_DISTANCE = 6
+_DOWNSCALE_SIZE = 64
+
+K = TypeVar("K", bound=Hashable)
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def _pack_bits(bits: np.ndarray) -> int:
+    return int.from_bytes(np.packbits(bits.astype(np.uint8).ravel()).tobytes(), "big")
+
+
+def _dct_matrix(size: int) -> np.ndarray:
+    n = np.arange(size)
+    matrix = np.cos(np.pi * (2 * n[None, :] + 1) * n[:, None] / (2 * size))
+    matrix[0, :] *= 1 / np.sqrt(2)
+    return matrix * np.sqrt(2 / size)
+
+
+_DCT_32 = _dct_matrix(32)
+
+
+@dataclass(frozen=True, slots=True)
+class ImageHashes:
+    """一张图片的三种 64 位感知哈希。"""
+
+    ahash: int
+    dhash: int
+    phash: int
+
+    def to_dict(self) -> dict[str, str]:
+        return {
+            "ahash": f"{self.ahash:016x}",
+            "dhash": f"{self.dhash:016x}",
+            "phash": f"{self.phash:016x}",
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any] | None) -> ImageHashes | None:
+        if not isinstance(data, Mapping):
+            return None
+        try:
+            return cls(
+                ahash=int(str(data["ahash"]), 16),
+                dhash=int(str(data["dhash"]), 16),
+                phash=int(str(data["phash"]), 16),
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def is_similar(self, other: ImageHashes, max_distance: int = DEFAULT_MAX_DISTANCE) -> bool:
+        """以 pHash 为准，并用 dHash 复核，减少纯色/渐变图之间的误判。"""
+        return (
+            hamming(self.phash, other.phash) <= max_distance
+            and hamming(self.dhash, other.dhash) <= max_distance * 2
+        )
+
+
+def compute_hashes_from_image(image: Image.Image) -> ImageHashes:
+    gray = image.convert("L")
+    base = gray.resize((_DOWNSCALE_SIZE, _DOWNSCALE_SIZE), Image.Resampling.BOX)
+    pixels = np.asarray(base, dtype=np.float64)
+
+    # aHash：8×8 块均值与整体均值比较
+    blocks = pixels.reshape(8, 8, 8, 8).mean(axis=(1, 3))
+    ahash = _pack_bits(blocks > blocks.mean())
+
+    # dHash：9×8 缩略图相邻像素的水平梯度符号
+    wide = np.asarray(base.resize((9, 8), Image.Resampling.BOX), dtype=np.float64)
+    dhash = _pack_bits(wide[:, 1:] > wide[:, :-1])
+
+    # pHash：32×32 的二维 DCT，取左上 8×8 低频系数与中位数比较（排除直流分量）
+    small = pixels.reshape(32, 2, 32, 2).mean(axis=(1, 3))
+    low = (_DCT_32 @ small @ _DCT_32.T)[:8, :8]
+    median = np.median(low.ravel()[1:])
+    phash = _pack_bits(low > median)
+
+    return ImageHashes(ahash=ahash, dhash=dhash, phash=phash)
+
+
+def compute_hashes(path: str | Path) -> ImageHashes:
+    """读取图片并计算感知哈希；无法解码时抛出异常。"""
+    with Image.open(path) as image:
+        if image.format == "JPEG":
+            image.draft("L", (_DOWNSCALE_SIZE * 2, _DOWNSCALE_SIZE * 2))
+        return compute_hashes_from_image(image)
+
+
+class _BKNode(Generic[K]):
+    __slots__ = ("children", "keys", "value")
+
+    def __init__(self, value: int, key: K) -> None:
+        self.value = value
+        self.keys: list[K] = [key]
+        self.children: dict[int, _BKNode[K]] = {}
+
+
+class BKTree(Generic[K]):
+    """Hamming 距离上的 BK 树。
+
+    查询时依据三角不等式只下探距离落在 ``[d - r, d + r]`` 的子树，
+    小半径查询的访问节点数远少于线性扫描。树只支持插入，删除时请重建。
+    """
+
+    def __init__(self, items: Iterable[tuple[int, K]] = ()) -> None:
+        self._root: _BKNode[K] | None = None
+        self._size = 0
+        for value, key in items:
+            self.add(value, key)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, value: int, key: K) -> None:
+        self._size += 1
+        if self._root is None:
+            self._root = _BKNode(value, key)
+            return
+        node = self._root
+        while True:
+            distance = hamming(value, node.value)
+            if distance == 0:
+                node.keys.append(key)
+                return
+            child = node.children.get(distance)
+            if child is None:
+                node.children[distance] = _BKNode(value, key)
+                return
+            node = child
+
+    def search(self, value: int, max_distance: int) -> list[tuple[int, K]]:
+        """返回所有距离不超过 ``max_distance`` 的 ``(distance, key)``，按距离排序。"""
+        if self._root is None:
+            return []
+        results: list[tuple[int, K]] = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node.value)
+            if distance <= max_distance:
+                results.extend((distance, key) for key in node.keys)
+            low, high = distance - max_distance, distance + max_distance
+            stack.extend(
+                child for edge, child in node.children.items() if low <= edge <= high
+            )
+        results.sort(key=lambda pair: pair[0])
+        return results
+
+
+def find_duplicate_groups(
+    hashes: Mapping[K, ImageHashes],
+    max_distance: int = DEFAULT_MAX_DISTANCE,
+) -> list[list[K]]:
+    """把近似重复的图片分组（传递闭包），只返回成员数大于 1 的组。
+
+    组内及组间顺序都沿用 ``hashes`` 的迭代顺序。
+    """
+    keys = list(hashes)
+    position = {key: index for index, key in enumerate(keys)}
+    tree: BKTree[K] = BKTree((hashes[key].phash, key) for key in keys)
+    parent = list(range(len(keys)))
+
+    def _find(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    for key in keys:
+        current = hashes[key]
+        for _distance, other in tree.search(current.phash, max_distance):
+            if other == key or not current.is_similar(hashes[other], max_distance):
+                continue
+            a, b = _find(position[key]), _find(position[other])
+            if a != b:
+                parent[max(a, b)] = min(a, b)
+
+    groups: dict[int, list[K]] = {}
+    for index, key in enumerate(keys):
+        groups.setdefault(_find(index), []).append(key)
+    return [members for members in groups.values() if len(members) > 1]
+
+
+__all__ = [
+    "DEFAULT_MAX_DISTANCE",
+    "BKTree",
+    "ImageHashes",
+    "compute_hashes",
+    "compute_hashes_from_image",
+    "find_duplicate_groups",
+    "hamming",
+]
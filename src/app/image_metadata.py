@@ -0,0 +1,515 @@
+"""图片元数据索引 - 尺寸、格式、字节数、SHA-256、感知哈希与外观特征，全应用共享。
+
+索引保存在缓存目录下的 SQLite 数据库中，以“绝对路径 + 大小 + 修改时间”
+判断条目是否仍然有效，并按内容哈希复用：文件被复制或改名后只需重新计算
+SHA-256，不必再次解码。查询只访问数据库；未命中的文件交给后台线程计算，
+调用方下次查询即可命中，不会阻塞在读取和解码上。
+
+自动更换的近似重复检测和外观筛选也从这里取感知哈希与外观特征；外观特征
+计算量大，只在 :meth:`ImageMetadataIndex.features_many` 请求时才在进程池中计算。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Condition, Event, RLock, Thread
+from typing import Any
+
+from loguru import logger
+from PIL import Image
+
+from app.content_store import hash_file
+from app.feature_extraction import ImageFeatures
+from app.image_features import compute_features_batch
+from app.image_hash import ImageHashes, compute_hashes_from_image
+from app.paths import CACHE_DIR
+
+IMAGE_METADATA_PATH = CACHE_DIR / "image_metadata.sqlite3"
+IMAGE_METADATA_SCHEMA_VERSION = 2
+
+# 后台线程每计算这么多个文件提交一次事务
+_WRITE_BATCH_SIZE = 32
+# SQLite 单条语句的参数上限较低，批量查询时按块拆分
+_QUERY_CHUNK_SIZE = 500
+_HASH_DOWNSCALE_SIZE = 128
+# 同步补算元数据时的读取/解码线程数（解码与哈希计算会释放 GIL）
+_COMPUTE_THREADS = 4
+
+_COLUMNS = (
+    "path",
+    "size",
+    "mtime",
+    "sha256",
+    "width",
+    "height",
+    "format",
+    "mode",
+    "orientation",
+    "ahash",
+    "dhash",
+    "phash",
+    "features",
+)
+
+
+@dataclass(frozen=True, slots=True)
+class ImageMetadata:
+    """一张本地图片的元数据。
+
+    无法识别为图片的文件同样会被记录（``format`` 为 ``None``、尺寸为 0），
+    避免反复尝试解码。
+    """
+
+    path: str
+    size: int
+    mtime: float
+    sha256: str
+    width: int
+    height: int
+    format: str | None
+    mode: str | None
+    orientation: int
+    hashes: ImageHashes | None
+    features: ImageFeatures | None = None
+
+    @property
+    def is_image(self) -> bool:
+        return self.format is not None
+
+    @property
+    def mime_type(self) -> str | None:
+        return Image.MIME.get(self.format) if self.format else None
+
+    @property
+    def aspect_ratio(self) -> float:
+        return self.width / self.height if self.height else 0.0
+
+    def to_row(self) -> tuple[Any, ...]:
+        hashes = self.hashes.to_dict() if self.hashes is not None else {}
+        return (
+            self.path,
+            self.size,
+            self.mtime,
+            self.sha256,
+            self.width,
+            self.height,
+            self.format,
+            self.mode,
+            self.orientation,
+            hashes.get("ahash"),
+            hashes.get("dhash"),
+            hashes.get("phash"),
+            json.dumps(self.features.to_dict()) if self.features is not None else None,
+        )
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> ImageMetadata:
+        return cls(
+            path=row["path"],
+            size=int(row["size"]),
+            mtime=float(row["mtime"]),
+            sha256=row["sha256"],
+            width=int(row["width"] or 0),
+            height=int(row["height"] or 0),
+            format=row["format"],
+            mode=row["mode"],
+            orientation=int(row["orientation"] or 1),
+            hashes=ImageHashes.from_dict(
+                {"ahash": row["ahash"], "dhash": row["dhash"], "phash": row["phash"]},
+            ),
+            features=_load_features(row["features"]),
+        )
+
+
+def _load_features(raw: str | None) -> ImageFeatures | None:
+    if not raw:
+        return None
+    try:
+        return ImageFeatures.from_dict(json.loads(raw))
+    except ValueError:
+        return None
+
+
+def _hash_thumbnail(image: Image.Image) -> Image.Image:
+    """把图片缩小后再计算感知哈希，避免生成全分辨率的灰度副本。
+
+    JPEG 借助 ``draft`` 直接以低分辨率解码；其他格式按整数倍 ``reduce``，
+    短边保留 ``_HASH_DOWNSCALE_SIZE`` 的两倍，与全分辨率计算的哈希基本一致。
+    """
+    if image.format == "JPEG":
+        image.draft("L", (_HASH_DOWNSCALE_SIZE, _HASH_DOWNSCALE_SIZE))
+    factor = min(image.size) // (_HASH_DOWNSCALE_SIZE * 2)
+    if factor < 2:
+        return image
+    if image.mode not in ("L", "LA", "RGB", "RGBA", "RGBX", "CMYK", "I", "F"):
+        image = image.convert("L")
+    return image.reduce(factor)
+
+
+def _describe_image(path: str) -> dict[str, Any]:
+    """从文件读取尺寸、格式与感知哈希；无法解码时只返回空的图片信息。"""
+    try:
+        with Image.open(path) as image:
+            width, height = image.size
+            image_format, mode = image.format, image.mode
+            try:
+                orientation = int(image.getexif().get(0x0112, 1) or 1)
+            except Exception:
+                orientation = 1
+            try:
+                hashes: ImageHashes | None = compute_hashes_from_image(_hash_thumbnail(image))
+            except Exception as exc:
+                logger.debug("计算感知哈希失败: {error}", error=str(exc))
+                hashes = None
+    except Exception:
+        return {"width": 0, "height": 0, "format": None, "mode": None, "orientation": 1, "hashes": None}
+    return {
+        "width": width,
+        "height": height,
+        "format": image_format,
+        "mode": mode,
+        "orientation": orientation,
+        "hashes": hashes,
+    }
+
+
+class ImageMetadataIndex:
+    """SQLite 支持的图片元数据索引。
+
+    :meth:`get` / :meth:`get_many` 只查询数据库，未命中时把文件交给后台线程；
+    需要立即拿到结果时使用 :meth:`compute` / :meth:`hashes` /
+    :meth:`features_many`（阻塞，请在工作线程中调用）。
+    """
+
+    def __init__(self, path: Path = IMAGE_METADATA_PATH) -> None:
+        self._path = path
+        self._lock = RLock()
+        self._ready = False
+        self._pending: dict[str, None] = {}
+        self._condition = Condition()
+        self._worker: Thread | None = None
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    # ------------------------------------------------------------------
+    # connection helpers
+    # ------------------------------------------------------------------
+    def _connect(self) -> sqlite3.Connection:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self._path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        if not self._ready:
+            self._ensure_schema(conn)
+            self._ready = True
+        return conn
+
+    def _ensure_schema(self, conn: sqlite3.Connection) -> None:
+        conn.execute("PRAGMA journal_mode=WAL")
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+            )
+            row = conn.execute(
+                "SELECT value FROM meta WHERE key = 'schema_version'",
+            ).fetchone()
+            version = int(row["value"]) if row and str(row["value"]).isdigit() else 0
+            if version != IMAGE_METADATA_SCHEMA_VERSION:
+                conn.execute("DROP TABLE IF EXISTS images")
+                conn.execute("DELETE FROM meta")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS images (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime REAL NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    width INTEGER NOT NULL,
+                    height INTEGER NOT NULL,
+                    format TEXT,
+                    mode TEXT,
+                    orientation INTEGER NOT NULL,
+                    ahash TEXT,
+                    dhash TEXT,
+                    phash TEXT,
+                    features TEXT,
+                    indexed_at REAL NOT NULL
+                )
+                """,
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_images_sha256 ON images(sha256)",
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO meta(key, value) VALUES ('schema_version', ?)",
+                (str(IMAGE_METADATA_SCHEMA_VERSION),),
+            )
+
+    def _store(self, conn: sqlite3.Connection, items: Iterable[ImageMetadata]) -> None:
+        placeholders = ", ".join("?" for _ in range(len(_COLUMNS) + 1))
+        now = time.time()
+        conn.executemany(
+            f"INSERT OR REPLACE INTO images ({', '.join(_COLUMNS)}, indexed_at) "
+            f"VALUES ({placeholders})",
+            [(*item.to_row(), now) for item in items],
+        )
+
+    # ------------------------------------------------------------------
+    # queries
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _stat(path: str | Path) -> tuple[str, os.stat_result | None]:
+        key = os.path.abspath(path)
+        try:
+            return key, os.stat(key)
+        except OSError:
+            return key, None
+
+    def get(self, path: str | Path, *, schedule: bool = True) -> ImageMetadata | None:
+        """返回仍然有效的元数据；未命中时返回 ``None``，并在 ``schedule`` 时排入后台计算。"""
+        key, stat = self._stat(path)
+        if stat is None:
+            return None
+        return self.get_many([key], schedule=schedule).get(key)
+
+    def get_many(
+        self,
+        paths: Iterable[str | Path],
+        *,
+        schedule: bool = True,
+    ) -> dict[str, ImageMetadata]:
+        """批量查询，返回 ``{绝对路径: 元数据}``；文件不存在或未命中的路径不在结果中。"""
+        stats: dict[str, os.stat_result] = {}
+        for path in paths:
+            key, stat = self._stat(path)
+            if stat is not None:
+                stats[key] = stat
+        found: dict[str, ImageMetadata] = {}
+        if stats:
+            keys = list(stats)
+            with self._lock:
+                try:
+                    with closing(self._connect()) as conn:
+                        for start in range(0, len(keys), _QUERY_CHUNK_SIZE):
+                            chunk = keys[start : start + _QUERY_CHUNK_SIZE]
+                            rows = conn.execute(
+                                f"SELECT {', '.join(_COLUMNS)} FROM images "
+                                f"WHERE path IN ({', '.join('?' for _ in chunk)})",
+                                chunk,
+                            ).fetchall()
+                            for row in rows:
+                                stat = stats[row["path"]]
+                                if row["size"] == stat.st_size and row["mtime"] == stat.st_mtime:
+                                    found[row["path"]] = ImageMetadata.from_row(row)
+                except sqlite3.Error as exc:
+                    logger.warning("读取图片元数据索引失败: {error}", error=str(exc))
+        if schedule:
+            self.request(key for key in stats if key not in found)
+        return found
+
+    def find_by_sha256(self, digest: str) -> list[ImageMetadata]:
+        """返回内容哈希相同的所有条目（不校验文件是否仍然存在）。"""
+        with self._lock:
+            try:
+                with closing(self._connect()) as conn:
+                    rows = conn.execute(
+                        f"SELECT {', '.join(_COLUMNS)} FROM images WHERE sha256 = ?",
+                        (digest,),
+                    ).fetchall()
+            except sqlite3.Error as exc:
+                logger.warning("读取图片元数据索引失败: {error}", error=str(exc))
+                return []
+        return [ImageMetadata.from_row(row) for row in rows]
+
+    def forget(self, paths: Iterable[str | Path]) -> None:
+        keys = [(os.path.abspath(path),) for path in paths]
+        if not keys:
+            return
+        with self._lock:
+            try:
+                with closing(self._connect()) as conn, conn:
+                    conn.executemany("DELETE FROM images WHERE path = ?", keys)
+            except sqlite3.Error as exc:
+                logger.warning("更新图片元数据索引失败: {error}", error=str(exc))
+
+    # ------------------------------------------------------------------
+    # computation
+    # ------------------------------------------------------------------
+    def _known_content(self, digest: str, size: int) -> ImageMetadata | None:
+        with self._lock:
+            try:
+                with closing(self._connect()) as conn:
+                    row = conn.execute(
+                        f"SELECT {', '.join(_COLUMNS)} FROM images "
+                        "WHERE sha256 = ? AND size = ? LIMIT 1",
+                        (digest, size),
+                    ).fetchone()
+            except sqlite3.Error:
+                return None
+        return ImageMetadata.from_row(row) if row is not None else None
+
+    def _describe(self, key: str) -> ImageMetadata | None:
+        # 流式计算内容哈希，不把整个文件读入内存；解码直接从文件进行
+        try:
+            stat = os.stat(key)
+            digest, _ = hash_file(Path(key))
+        except OSError as exc:
+            logger.debug("读取图片失败 {path}: {error}", path=key, error=str(exc))
+            return None
+        known = self._known_content(digest, stat.st_size)
+        if known is not None:
+            # 内容相同的文件（复制、改名、收藏副本）直接复用，无需再解码
+            details: dict[str, Any] = {
+                "width": known.width,
+                "height": known.height,
+                "format": known.format,
+                "mode": known.mode,
+                "orientation": known.orientation,
+                "hashes": known.hashes,
+                "features": known.features,
+            }
+        else:
+            details = _describe_image(key)
+        return ImageMetadata(
+            path=key,
+            size=stat.st_size,
+            mtime=stat.st_mtime,
+            sha256=digest,
+            **details,
+        )
+
+    def compute(self, path: str | Path) -> ImageMetadata | None:
+        """立即读取并索引文件（命中时直接返回）。阻塞调用，请在工作线程中使用。"""
+        key = os.path.abspath(path)
+        return self.compute_many([key]).get(key)
+
+    def compute_many(self, paths: Iterable[str | Path]) -> dict[str, ImageMetadata]:
+        """批量版 :meth:`compute`，未命中的文件在少量线程中并行读取。阻塞调用。"""
+        keys = list(dict.fromkeys(os.path.abspath(path) for path in paths))
+        found = self.get_many(keys, schedule=False)
+        missing = [key for key in keys if key not in found]
+        if not missing:
+            return found
+        with ThreadPoolExecutor(max_workers=min(_COMPUTE_THREADS, len(missing))) as executor:
+            computed = [item for item in executor.map(self._describe, missing) if item is not None]
+        if computed:
+            with self._lock:
+                try:
+                    with closing(self._connect()) as conn, conn:
+                        self._store(conn, computed)
+                except sqlite3.Error as exc:
+                    logger.warning("写入图片元数据索引失败: {error}", error=str(exc))
+            found.update((item.path, item) for item in computed)
+        return found
+
+    def hashes(self, path: str | Path) -> ImageHashes | None:
+        """返回图片的感知哈希，未索引时立即计算；无法解码时返回 ``None``。阻塞调用。"""
+        metadata = self.compute(path)
+        return metadata.hashes if metadata is not None else None
+
+    def features_many(
+        self,
+        paths: Iterable[str | Path],
+        *,
+        cancel_event: Event | None = None,
+    ) -> dict[str, ImageFeatures]:
+        """返回 ``{绝对路径: 外观特征}``，跳过不存在或无法解码的文件。阻塞调用。
+
+        未索引的文件先补算元数据；缺少特征的图片在后台进程池中计算，结果按
+        内容哈希写回，同一内容的其他副本随之命中。
+        """
+        indexed = self.compute_many(paths)
+        found = {key: item.features for key, item in indexed.items() if item.features is not None}
+        missing = [key for key, item in indexed.items() if item.features is None and item.is_image]
+        if not missing:
+            return found
+        computed = compute_features_batch(missing, cancel_event=cancel_event)
+        if computed:
+            rows = [
+                (json.dumps(features.to_dict()), indexed[key].sha256, indexed[key].size)
+                for key, features in computed.items()
+            ]
+            with self._lock:
+                try:
+                    with closing(self._connect()) as conn, conn:
+                        conn.executemany(
+                            "UPDATE images SET features = ? WHERE sha256 = ? AND size = ?",
+                            rows,
+                        )
+                except sqlite3.Error as exc:
+                    logger.warning("写入图片元数据索引失败: {error}", error=str(exc))
+            found.update(computed)
+        return found
+
+    # ------------------------------------------------------------------
+    # background worker
+    # ------------------------------------------------------------------
+    def request(self, paths: Iterable[str | Path]) -> None:
+        """把文件排入后台线程计算（立即返回，重复请求会合并）。"""
+        with self._condition:
+            for path in paths:
+                self._pending[os.path.abspath(path)] = None
+            if not self._pending or (self._worker is not None and self._worker.is_alive()):
+                return
+            self._worker = Thread(target=self._run_worker, name="image-metadata", daemon=True)
+            self._worker.start()
+
+    def _take_batch(self) -> list[str]:
+        with self._condition:
+            batch: list[str] = []
+            for key in self._pending:
+                batch.append(key)
+                if len(batch) >= _WRITE_BATCH_SIZE:
+                    break
+            for key in batch:
+                del self._pending[key]
+            if not batch:
+                # 队列为空时退出线程，下次请求时再启动
+                self._worker = None
+                self._condition.notify_all()
+            return batch
+
+    def _iter_fresh(self, keys: list[str]) -> Iterator[ImageMetadata]:
+        fresh = self.get_many(keys, schedule=False)
+        for key in keys:
+            if key in fresh:
+                continue
+            metadata = self._describe(key)
+            if metadata is not None:
+                yield metadata
+
+    def _run_worker(self) -> None:
+        while batch := self._take_batch():
+            try:
+                items = list(self._iter_fresh(batch))
+                if not items:
+                    continue
+                with self._lock, closing(self._connect()) as conn, conn:
+                    self._store(conn, items)
+            except Exception as exc:
+                logger.warning("后台索引图片元数据失败: {error}", error=str(exc))
+
+    def wait_idle(self, timeout: float | None = None) -> bool:
+        """等待后台队列处理完毕，返回是否在超时前完成。"""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._worker is None, timeout)
+
+
+image_metadata_index = ImageMetadataIndex()
+
+
+__all__ = [
+    "IMAGE_METADATA_PATH",
+    "ImageMetadata",
+    "ImageMetadataIndex",
+    "image_metadata_index",
+]
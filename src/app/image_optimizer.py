@@ -3,15 +3,461 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
+import json
+import os
 import time
-from collections.abc import Callable
-from concurrent.futures import ThreadPoolExecutor
-from dataclasses import dataclass
+from collections import deque
+from collections.abc import Callable, Mapping
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from itertools import islice
 from pathlib import Path
+from threading import Event, Lock, RLock
+from typing import Any
 
 from loguru import logger
 from PIL import Image
 
+from app.content_store import hash_file
+from app.image_encoding import (
+    OptimizationProfile,
+    _estimate_memory,
+    _optimize_job,
+    available_formats,
+    estimate_peak_memory,
+    optimize_image,
+    structural_similarity,
+)
+from app.image_metadata import ImageMetadata, image_metadata_index
+from app.paths import DATA_DIR
+from app.process_pool import (
+    default_process_workers,
+    get_process_pool,
+    reset_process_pool,
+)
+
+MANIFEST_DIR = DATA_DIR / "image_optimizer"
+# 旧版本把输出暂存在该目录中，扫描源图片时仍需排除其中的遗留文件
+TEMP_FOLDER_NAME = "avif_optimized"
+# 转换结果先写到最终文件旁的隐藏临时文件（.<输出文件名>.ltwopt），提交时原子改名
+_TEMP_SUFFIX = ".ltwopt"
+
+_THREAD_WORKERS = 4
+# 每个工作进程最多排队的任务数：保证工作进程不空闲，同时避免一次性提交全部文件
+_IN_FLIGHT_PER_WORKER = 2
+# 同时解码的图片估算内存总和上限；单张超出上限的图片只会独占执行
+DEFAULT_MEMORY_BUDGET = 1024 * 1024 * 1024
+# 队首图片放不进内存预算时，向后查找可先执行的较小图片的范围
+_SCHEDULE_LOOKAHEAD = 32
+
+
+def estimate_file_memory(
+    path: Path,
+    profile: OptimizationProfile,
+    metadata: ImageMetadata | None = None,
+) -> int:
+    """估算转换峰值内存；无法识别时返回 0（交给转换阶段报错）。
+
+    传入图片元数据索引中的条目时不访问文件，否则只读取文件头。
+    """
+    if metadata is not None and metadata.is_image and metadata.mode:
+        return _estimate_memory(
+            (metadata.width, metadata.height),
+            metadata.format,
+            metadata.mode,
+            metadata.orientation,
+            profile,
+        )
+    try:
+        with Image.open(path) as img:
+            return estimate_peak_memory(img, profile)
+    except Exception:
+        return 0
+
+
+def _fsync_directory(path: Path) -> None:
+    # 让改名操作本身落盘；Windows 不支持对目录 fsync，NTFS 的元数据日志已保证改名原子性
+    if os.name == "nt":
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _temp_output_path(final_path: Path) -> Path:
+    return final_path.with_name(f".{final_path.name}{_TEMP_SUFFIX}")
+
+
+def _plan_output_names(
+    folder_path: Path,
+    image_files: list[Path],
+    extension: str,
+    keep_original: bool,
+    recorded: Mapping[str, str] | None = None,
+) -> list[Path]:
+    """为每个源文件生成相对于 ``folder_path`` 的输出路径，保留子目录结构。
+
+    ``recorded`` 是清单中记录的 ``{源文件相对路径: 输出相对路径}``：扩展名相同的
+    已知源文件沿用原来的输出名，不随同目录其他文件的增减而改变。新的源文件
+    中，同一目录下主文件名相同的（``x.png`` 与 ``x.jpg``）或与已占用的输出名
+    冲突的，改用 ``x.png.avif`` 这类带原扩展名的名字，避免互相覆盖；输出与
+    源文件同名且需要保留原图时，改为 ``x.optimized.jpg``。
+    """
+    relatives = [source.relative_to(folder_path) for source in image_files]
+    recorded = recorded or {}
+    outputs: list[Path | None] = [None] * len(relatives)
+    taken: set[str] = set()
+    for index, relative in enumerate(relatives):
+        previous = recorded.get(relative.as_posix())
+        if (
+            previous
+            and previous.lower().endswith(extension.lower())
+            and previous.lower() not in taken
+            and not (keep_original and previous.lower() == relative.as_posix().lower())
+        ):
+            outputs[index] = Path(previous)
+            taken.add(previous.lower())
+
+    counts: dict[tuple[Path, str], int] = {}
+    for relative in relatives:
+        key = (relative.parent, relative.stem.lower())
+        counts[key] = counts.get(key, 0) + 1
+    for index, relative in enumerate(relatives):
+        if outputs[index] is not None:
+            continue
+        output = relative.with_suffix(extension)
+        if counts[(relative.parent, relative.stem.lower())] > 1 or output.as_posix().lower() in taken:
+            output = relative.with_name(f"{relative.name}{extension}")
+        if keep_original and output.as_posix().lower() == relative.as_posix().lower():
+            output = relative.with_name(f"{relative.stem}.optimized{extension}")
+        outputs[index] = output
+        taken.add(output.as_posix().lower())
+    return [output for output in outputs if output is not None]
+
+
+def _folder_key(folder_path: Path) -> str:
+    return hashlib.sha1(os.path.abspath(folder_path).encode("utf-8")).hexdigest()[:16]
+
+
+class OptimizationManifest:
+    """记录某个文件夹中已优化的图片，重复运行时跳过未变化的文件。
+
+    以源文件相对路径为键，保存源文件大小、修改时间、SHA-256、输出相对路径、
+    优化配置摘要与实际使用的质量。大小或修改时间变化但内容哈希一致（例如重新下载了同一张图）
+    时同样视为已处理。清单保存在数据目录中，不会写入用户的图片文件夹。
+    """
+
+    def __init__(self, folder_path: Path, *, directory: Path = MANIFEST_DIR) -> None:
+        self._path = directory / f"{_folder_key(folder_path)}.json"
+        self._lock = RLock()
+        self._entries: dict[str, dict[str, Any]] = {}
+        # 历次运行产生的全部输出（换用其他配置后旧输出仍在磁盘上）：
+        # 输出相对路径（小写）-> {"source": 源文件相对路径, "keep_original": 是否保留了原图}
+        self._outputs: dict[str, dict[str, Any]] = {}
+        self._dirty = False
+        self._load()
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def _load(self) -> None:
+        try:
+            if self._path.exists():
+                data = json.loads(self._path.read_text(encoding="utf-8"))
+                entries = data.get("entries") if isinstance(data, dict) else None
+                if isinstance(entries, dict):
+                    self._entries = {
+                        str(key): value for key, value in entries.items() if isinstance(value, dict)
+                    }
+                outputs = data.get("outputs") if isinstance(data, dict) else None
+                if isinstance(outputs, dict):
+                    self._outputs = {
+                        str(output).lower(): origin
+                        for output, origin in outputs.items()
+                        if isinstance(origin, dict)
+                    }
+                elif isinstance(outputs, list):
+                    # 旧格式只记录了输出路径，来源未知，一律视为仍有原图
+                    self._outputs = {
+                        str(output).lower(): {"source": None, "keep_original": True}
+                        for output in outputs
+                    }
+        except Exception as e:
+            logger.warning(f"读取优化清单失败，将重新处理全部图片 {self._path}: {e}")
+            self._entries = {}
+            self._outputs = {}
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = json.dumps(
+                {"version": 1, "entries": self._entries, "outputs": self._outputs},
+                ensure_ascii=False,
+            )
+            self._dirty = False
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._path.with_suffix(".tmp")
+            tmp_path.write_text(payload, encoding="utf-8")
+            tmp_path.replace(self._path)
+        except Exception as e:
+            logger.warning(f"保存优化清单失败 {self._path}: {e}")
+
+    def get(self, relative: str) -> dict[str, Any] | None:
+        with self._lock:
+            entry = self._entries.get(relative)
+            return dict(entry) if entry else None
+
+    def recorded_outputs(self) -> dict[str, str]:
+        """``{源文件相对路径: 记录的输出相对路径}``，规划输出名时沿用。"""
+        with self._lock:
+            return {
+                relative: str(entry["output"])
+                for relative, entry in self._entries.items()
+                if entry.get("output")
+            }
+
+    def is_previous_output(self, folder_path: Path, relative: str, profile_key: str) -> bool:
+        """``relative`` 是否为之前的输出、扫描源文件时应当排除。
+
+        保留原图时生成的输出，以及源文件仍在的输出都排除；替换模式下原图已
+        删除，输出就是唯一的副本，只有它仍是当前配置的最新结果时才排除，
+        换用其他配置时会作为源文件重新处理。
+        """
+        with self._lock:
+            origin = self._outputs.get(relative.lower())
+            if origin is None or relative in self._entries:
+                return False
+            source = origin.get("source")
+            if origin.get("keep_original") or not source:
+                return True
+            entry = self._entries.get(source)
+        if (folder_path / source).exists():
+            return True
+        if (
+            not entry
+            or entry.get("profile") != profile_key
+            or str(entry.get("output", "")).lower() != relative.lower()
+        ):
+            return False
+        try:
+            return (folder_path / relative).stat().st_size == entry.get("output_size")
+        except OSError:
+            return False
+
+    @staticmethod
+    def make_entry(
+        stat: os.stat_result,
+        digest: str,
+        output: str,
+        profile_key: str,
+        quality: int,
+        output_size: int,
+        *,
+        kept: bool = False,
+    ) -> dict[str, Any]:
+        """``kept`` 表示输出不比原图小、保留了原图，此时 ``output`` 并不存在于磁盘。"""
+        entry = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "sha256": digest,
+            "output": output,
+            "output_size": output_size,
+            "profile": profile_key,
+            "quality": quality,
+        }
+        if kept:
+            entry["kept"] = True
+        return entry
+
+    def record(
+        self,
+        relative: str,
+        stat: os.stat_result,
+        digest: str,
+        output: str,
+        profile_key: str,
+        quality: int,
+        output_size: int,
+    ) -> None:
+        self.restore(relative, self.make_entry(stat, digest, output, profile_key, quality, output_size))
+
+    def restore(self, relative: str, entry: dict[str, Any], *, keep_original: bool = False) -> None:
+        """写入日志中保存的条目（提交或恢复时使用）。"""
+        with self._lock:
+            self._entries[relative] = dict(entry)
+            if entry.get("output") and not entry.get("kept"):
+                self._outputs[str(entry["output"]).lower()] = {
+                    "source": relative,
+                    "keep_original": keep_original,
+                }
+            self._dirty = True
+
+    def refresh_stat(self, relative: str, stat: os.stat_result) -> None:
+        """原地覆盖源文件后，清单改记输出文件的状态，下次运行视为已处理。"""
+        with self._lock:
+            entry = self._entries.get(relative)
+            if entry is None:
+                return
+            entry.update(size=stat.st_size, mtime=stat.st_mtime, sha256="")
+            self._dirty = True
+
+    def is_current(
+        self,
+        relative: str,
+        stat: os.stat_result,
+        source: Path,
+        output: str,
+        profile_key: str,
+    ) -> bool:
+        """源文件与清单一致（先比较大小和修改时间，不一致时再比较内容哈希）。"""
+        entry = self.get(relative)
+        if not entry or entry.get("profile") != profile_key or entry.get("output") != output:
+            return False
+        if entry.get("size") == stat.st_size and entry.get("mtime") == stat.st_mtime:
+            return True
+        if entry.get("size") != stat.st_size or not entry.get("sha256"):
+            return False
+        try:
+            digest, _ = hash_file(source)
+        except OSError:
+            return False
+        if digest != entry["sha256"]:
+            return False
+        with self._lock:
+            self._entries[relative] = {**entry, "mtime": stat.st_mtime}
+            self._dirty = True
+        return True
+
+
+class OptimizationJournal:
+    """替换原图的预写日志（JSON Lines），与优化清单一起保存在数据目录中。
+
+    两阶段提交：转换结果先写到最终文件旁的临时文件并 fsync，随后追加
+    ``prepare`` 记录；日志 fsync 后才把临时文件原子改名为最终文件并删除原图，
+    完成后追加 ``commit`` 记录。进程中途退出时，下次运行按日志把已准备好的
+    文件继续提交（已提交的补写清单条目），而不是重新转换。
+    """
+
+    def __init__(self, folder_path: Path, *, directory: Path = MANIFEST_DIR) -> None:
+        self._path = directory / f"{_folder_key(folder_path)}.journal"
+        self._fp = None
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def append(self, record: dict[str, Any]) -> None:
+        if self._fp is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            self._fp = self._path.open("a", encoding="utf-8")
+        self._fp.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._fp.flush()
+
+    def sync(self) -> None:
+        if self._fp is not None:
+            self._fp.flush()
+            os.fsync(self._fp.fileno())
+
+    def pending(self) -> list[dict[str, Any]]:
+        """需要重放的 ``prepare`` 记录（忽略写到一半的末行）。
+
+        清单在全部提交后才保存，日志也随之清空，所以日志仍在时，已 ``commit``
+        的记录同样要重放以补写清单条目（:func:`_commit_output` 可重复执行）。
+        """
+        try:
+            lines = self._path.read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            return []
+        except OSError as e:
+            logger.warning(f"读取优化日志失败 {self._path}: {e}")
+            return []
+        prepared: dict[str, dict[str, Any]] = {}
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(record, dict) or "source" not in record:
+                continue
+            if record.get("op") == "prepare":
+                prepared[record["source"]] = record
+        return list(prepared.values())
+
+    def close(self) -> None:
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+
+    def clear(self) -> None:
+        self.close()
+        self._path.unlink(missing_ok=True)
+
+
+def _commit_output(folder_path: Path, record: dict[str, Any], manifest: OptimizationManifest) -> bool:
+    """执行一条替换记录（可重复执行），返回是否移入了新的输出文件。
+
+    清单条目在输出就位时写入，即使改名已在中断前完成（清单尚未保存），
+    重复执行时也会补写，避免下次运行重新转换。
+    """
+    source_file = folder_path / record["source"]
+    final_output = folder_path / record["final"]
+    temp_output = folder_path / record["temp"] if record.get("temp") else None
+    committed = False
+    if temp_output is not None and temp_output.exists():
+        # 原子改名：覆盖同名旧文件，原地优化时直接覆盖源文件
+        os.replace(temp_output, final_output)
+        _fsync_directory(final_output.parent)
+        committed = True
+    if final_output.exists():
+        if record.get("manifest"):
+            manifest.restore(
+                record["source"],
+                record["manifest"],
+                keep_original=not record.get("delete_source"),
+            )
+        if final_output == source_file:
+            manifest.refresh_stat(record["source"], final_output.stat())
+    # 确认输出已就位后再删除原始文件
+    if (
+        record.get("delete_source")
+        and final_output != source_file
+        and final_output.exists()
+        and source_file.exists()
+    ):
+        source_file.unlink()
+    return committed
+
+
+@dataclass
+class FileOptimizationResult:
+    """单个文件的优化结果。"""
+
+    source: str  # 相对路径
+    output: str  # 相对路径
+    original_size: int  # 字节
+    optimized_size: int  # 字节
+    quality: int
+    # 输出不比原图小：未提交输出，原图保持不变（optimized_size 为丢弃的输出大小）
+    skipped: bool = False
+
+    @property
+    def saved_bytes(self) -> int:
+        if self.skipped:
+            return 0
+        return self.original_size - self.optimized_size
+
 
 @dataclass
 class ImageOptimizationResult:
@@ -25,6 +471,14 @@ class ImageOptimizationResult:
     optimized_size: int  # 字节
     time_elapsed: float  # 秒
     errors: list[str]
+    cancelled: bool = False
+    skipped_files: int = 0  # 清单中已是最新、无需重新转换的文件
+    kept_files: int = 0  # 输出不比原图小、保留原图的文件
+    files: list[FileOptimizationResult] = field(default_factory=list)
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.original_size - self.optimized_size
 
 
 @dataclass
@@ -37,6 +491,7 @@ class OptimizationProgress:
     percentage: float
     current_size: int
     optimized_size: int
+    file_result: FileOptimizationResult | None = None  # 刚完成的文件（失败时为 None）
 
 
 class ImageOptimizer:
@@ -44,7 +499,18 @@ class ImageOptimizer:
 
     def __init__(self):
         self._supported_formats = {".jpg", ".jpeg", ".png", ".bmp", ".tiff", ".webp"}
-        self._executor = ThreadPoolExecutor(max_workers=4)
+        self._executor = ThreadPoolExecutor(max_workers=_THREAD_WORKERS)
+        self._cancel_event: Event | None = None
+        self._recover_lock = Lock()
+
+    @property
+    def is_running(self) -> bool:
+        return self._cancel_event is not None
+
+    def cancel(self) -> None:
+        """请求取消正在进行的优化；已在转换中的文件会先完成。"""
+        if self._cancel_event is not None:
+            self._cancel_event.set()
 
     def is_image_file(self, file_path: Path) -> bool:
         """检查是否为支持的图片文件。"""
@@ -57,8 +523,12 @@ class ImageOptimizer:
 
         image_files = []
         try:
+            temp_folder = folder_path / TEMP_FOLDER_NAME
             for file_path in folder_path.rglob("*"):
                 if file_path.is_file() and self.is_image_file(file_path):
+                    # 临时输出目录中的文件是上次未完成的转换结果，不是源图片
+                    if temp_folder in file_path.parents:
+                        continue
                     image_files.append(file_path)
         except Exception as e:
             logger.error(f"扫描图片文件时出错: {e}")
@@ -67,45 +537,97 @@ class ImageOptimizer:
 
     def convert_to_avif(self, source_path: Path, target_path: Path, quality: int = 85) -> tuple[bool, str]:
         """将图片转换为AVIF格式。"""
-        try:
-            with Image.open(source_path) as img:
-                # 转换为RGB模式（如果需要）
-                if img.mode in ("RGBA", "LA", "P"):
-                    # 保持透明度
-                    background = Image.new("RGB", img.size, (255, 255, 255))
-                    if img.mode == "P":
-                        img = img.convert("RGBA")
-                    background.paste(img, mask=img.split()[-1] if img.mode in ("RGBA", "LA") else None)
-                    img = background
-                elif img.mode != "RGB":
-                    img = img.convert("RGB")
-
-                # 保存为AVIF格式
-                img.save(
-                    target_path,
-                    "AVIF",
-                    quality=quality,
-                    optimize=True,
-                )
-
-            return True, f"转换成功: {source_path.name}"
-
-        except Exception as e:
-            error_msg = f"转换失败 {source_path.name}: {e}"
-            logger.error(error_msg)
-            return False, error_msg
+        success, message, _quality = optimize_image(
+            source_path, target_path, OptimizationProfile(format="avif", quality=quality)
+        )
+        return success, message
 
     async def optimize_folder_to_avif(
         self,
         folder_path: Path,
         quality: int = 85,
         progress_callback: Callable[[OptimizationProgress], None] | None = None,
+        **kwargs: Any,
+    ) -> ImageOptimizationResult:
+        """异步优化文件夹中的所有图片为AVIF格式（固定质量、替换原图）。"""
+        return await self.optimize_folder(
+            folder_path,
+            OptimizationProfile(format="avif", quality=quality),
+            progress_callback,
+            **kwargs,
+        )
+
+    async def optimize_folder(
+        self,
+        folder_path: Path,
+        profile: OptimizationProfile | None = None,
+        progress_callback: Callable[[OptimizationProgress], None] | None = None,
+        *,
+        use_processes: bool = True,
+        max_workers: int | None = None,
+        cancel_event: Event | None = None,
+        memory_budget: int | None = None,
+    ) -> ImageOptimizationResult:
+        """按优化配置异步处理文件夹中的所有图片。
+
+        默认在 :mod:`app.process_pool` 的共享进程池中并行转换，并发数默认为
+        CPU 核心数减一，``max_workers`` 可调低或调高（调高时共享进程池随之扩大）；
+        在途任务数有上限，进度按文件的原始顺序汇报。``cancel_event`` 置位（或
+        调用 :meth:`cancel`）后不再提交新文件，已转换完成的文件照常落盘。进程池不可用或
+        ``use_processes=False`` 时退回线程池。输出与源文件位于同一目录；
+        除非 ``profile.keep_original``，原图在输出就位后删除。
+
+        提交任务前只读取文件头估算每张图片的峰值内存，同时进行的转换估算总和
+        不超过 ``memory_budget``（默认 :data:`DEFAULT_MEMORY_BUDGET`），超大图片
+        会等到其他转换结束后单独执行。
+        """
+        if self._cancel_event is not None:
+            raise RuntimeError("图片优化正在进行中")
+        cancel_event = cancel_event or Event()
+        self._cancel_event = cancel_event
+        try:
+            return await self._optimize_folder(
+                folder_path,
+                profile or OptimizationProfile(),
+                progress_callback,
+                cancel_event,
+                use_processes=use_processes,
+                max_workers=max_workers,
+                memory_budget=memory_budget,
+            )
+        finally:
+            self._cancel_event = None
+
+    async def _optimize_folder(
+        self,
+        folder_path: Path,
+        profile: OptimizationProfile,
+        progress_callback: Callable[[OptimizationProgress], None] | None,
+        cancel_event: Event,
+        *,
+        use_processes: bool,
+        max_workers: int | None,
+        memory_budget: int | None,
     ) -> ImageOptimizationResult:
-        """异步优化文件夹中的所有图片为AVIF格式。"""
         start_time = time.time()
 
-        # 获取所有图片文件
-        image_files = self.get_image_files(folder_path)
+        # 先续完上次中断的替换，已转换好的文件不会再次转换
+        await asyncio.to_thread(self._recover_before_run, folder_path)
+
+        # 获取所有图片文件（排除之前的输出，见 OptimizationManifest.is_previous_output）
+        manifest = OptimizationManifest(folder_path)
+        profile_key = profile.cache_key
+
+        def _scan() -> list[Path]:
+            return [
+                source_file
+                for source_file in self.get_image_files(folder_path)
+                if not manifest.is_previous_output(
+                    folder_path, source_file.relative_to(folder_path).as_posix(), profile_key
+                )
+            ]
+
+        image_files = await asyncio.to_thread(_scan)
         if not image_files:
             return ImageOptimizationResult(
                 success=True,
@@ -124,102 +646,224 @@ class ImageOptimizer:
         optimized_size = 0
         errors = []
 
-        # 创建输出文件夹
-        avif_folder = folder_path / "avif_optimized"
-        avif_folder.mkdir(exist_ok=True)
+        # 输出先写到最终位置旁的临时文件，全部转换结束后按日志两阶段提交
+        outputs = _plan_output_names(
+            folder_path,
+            image_files,
+            profile.extension,
+            profile.keep_original,
+            manifest.recorded_outputs(),
+        )
+        targets = [_temp_output_path(folder_path / output) for output in outputs]
+        relatives = [source.relative_to(folder_path).as_posix() for source in image_files]
+        file_results: list[FileOptimizationResult] = []
+
+        costs: dict[int, int] = {}
 
-        # 记录成功处理的文件及其目标路径，便于后续替换原图
-        processed_mapping: list[tuple[Path, Path]] = []
+        def _plan() -> tuple[list[int], list[int], int]:
+            # 清单记录一致且输出文件仍在（或上次已决定保留原图）的图片无需重新转换；
+            # 其余图片估算解码内存
+            pending: list[int] = []
+            up_to_date: list[int] = []
+            kept = 0
+            for index, source_file in enumerate(image_files):
+                try:
+                    stat = source_file.stat()
+                except OSError:
+                    pending.append(index)
+                    continue
+                entry = manifest.get(relatives[index])
+                was_kept = bool(entry and entry.get("kept"))
+                if (was_kept or (folder_path / outputs[index]).exists()) and manifest.is_current(
+                    relatives[index], stat, source_file, outputs[index].as_posix(), profile_key
+                ):
+                    if was_kept:
+                        kept += 1
+                    else:
+                        up_to_date.append(index)
+                else:
+                    pending.append(index)
+            # 元数据索引中已有的图片无需再打开文件头
+            known = image_metadata_index.get_many(
+                (image_files[index] for index in pending), schedule=False
+            )
+            for index in pending:
+                costs[index] = estimate_file_memory(
+                    image_files[index], profile, known.get(os.path.abspath(image_files[index]))
+                )
+            return pending, up_to_date, kept
 
-        # 逐个处理文件
-        for i, source_file in enumerate(image_files):
-            try:
-                # 计算原始文件大小
-                original_size += source_file.stat().st_size
+        to_convert, up_to_date, previously_kept = await asyncio.to_thread(_plan)
+        total_count = len(to_convert)
+        if up_to_date or previously_kept:
+            logger.info(
+                f"优化清单中已有 {len(up_to_date) + previously_kept} 张未变化的图片，跳过转换"
+            )
+        kept_count = 0
 
-                # 生成输出文件名（暂时输出到 avif_optimized 目录，后续再移动回原目录）
-                relative_path = source_file.relative_to(folder_path)
-                target_file = avif_folder / f"{relative_path.stem}.avif"
-                target_file.parent.mkdir(parents=True, exist_ok=True)
+        # 待提交的替换记录；已是最新的文件只需（在输出就位时）删除原图
+        journal = OptimizationJournal(folder_path)
+        commit_records: list[dict[str, Any]] = [
+            {
+                "op": "prepare",
+                "source": relatives[index],
+                "final": outputs[index].as_posix(),
+                "temp": None,
+                "delete_source": not profile.keep_original,
+            }
+            for index in up_to_date
+        ]
 
-                # 转换文件
-                success, message = await asyncio.get_event_loop().run_in_executor(
-                    self._executor,
-                    self.convert_to_avif,
-                    source_file,
-                    target_file,
-                    quality,
-                )
+        # 转换结果可能乱序完成，先按提交顺序暂存，再依次汇总并汇报进度
+        position = {index: pos for pos, index in enumerate(to_convert)}
+        outcomes: dict[int, tuple[bool, str, int, str, int]] = {}
+        next_report = 0
 
-                if success:
-                    processed_count += 1
-                    # 记录映射关系，稍后替换原图
-                    processed_mapping.append((source_file, target_file))
-                    # 计算优化后文件大小
-                    if target_file.exists():
-                        optimized_size += target_file.stat().st_size
-                else:
-                    failed_count += 1
-                    errors.append(message)
+        def _account(pos: int) -> None:
+            nonlocal processed_count, failed_count, original_size, optimized_size, kept_count
+            success, message, size, digest, used_quality = outcomes.pop(pos)
+            index = to_convert[pos]
+            source_file = image_files[index]
+            file_result = None
+            try:
+                stat = source_file.stat()
+                original_size += stat.st_size
+            except OSError:
+                stat = None
+            if success and stat is not None and size >= stat.st_size:
+                # 输出不比原图小：丢弃输出、保留原图，并记入清单避免下次重复转换
+                targets[index].unlink(missing_ok=True)
+                kept_count += 1
+                optimized_size += stat.st_size
+                file_result = FileOptimizationResult(
+                    source=relatives[index],
+                    output=relatives[index],
+                    original_size=stat.st_size,
+                    optimized_size=size,
+                    quality=used_quality,
+                    skipped=True,
+                )
+                file_results.append(file_result)
+                manifest.restore(
+                    relatives[index],
+                    OptimizationManifest.make_entry(
+                        stat,
+                        digest,
+                        outputs[index].as_posix(),
+                        profile_key,
+                        used_quality,
+                        size,
+                        kept=True,
+                    ),
+                )
+            elif success:
+                processed_count += 1
+                optimized_size += size
+                file_result = FileOptimizationResult(
+                    source=relatives[index],
+                    output=outputs[index].as_posix(),
+                    original_size=stat.st_size if stat is not None else 0,
+                    optimized_size=size,
+                    quality=used_quality,
+                )
+                file_results.append(file_result)
+                record = {
+                    "op": "prepare",
+                    "source": relatives[index],
+                    "final": outputs[index].as_posix(),
+                    "temp": targets[index].relative_to(folder_path).as_posix(),
+                    "delete_source": not profile.keep_original,
+                    "manifest": OptimizationManifest.make_entry(
+                        stat, digest, outputs[index].as_posix(), profile_key, used_quality, size
+                    )
+                    if stat is not None
+                    else None,
+                }
+                journal.append(record)
+                commit_records.append(record)
+            else:
+                failed_count += 1
+                errors.append(message)
 
-                # 更新进度
-                if progress_callback:
-                    progress_info = OptimizationProgress(
+            if progress_callback:
+                progress_callback(
+                    OptimizationProgress(
                         current_file=source_file.name,
                         processed_count=processed_count,
-                        total_count=len(image_files),
-                        percentage=(i + 1) / len(image_files) * 100,
+                        total_count=total_count,
+                        percentage=(pos + 1) / total_count * 100,
                         current_size=original_size,
                         optimized_size=optimized_size,
+                        file_result=file_result,
                     )
-                    progress_callback(progress_info)
-
-                # 稍微延迟以避免界面卡顿
-                await asyncio.sleep(0.01)
-
-            except Exception as e:
-                error_msg = f"处理文件 {source_file.name} 时出错: {e}"
-                logger.error(error_msg)
-                failed_count += 1
-                errors.append(error_msg)
-
-        # 将生成的 AVIF 文件移动回原目录，并删除原文件
-        for source_file, temp_avif in processed_mapping:
-            try:
-                # 目标路径：原目录下，扩展名改为 .avif
-                final_avif = source_file.with_suffix(".avif")
-
-                # 如果已存在同名 .avif 文件，先删除，避免 rename 失败
-                if final_avif.exists():
-                    final_avif.unlink()
+                )
 
-                # 移动 AVIF 文件到目标位置
-                if temp_avif.exists():
-                    temp_avif.replace(final_avif)
+        def _on_result(index: int, outcome: tuple[bool, str, int, str, int]) -> None:
+            nonlocal next_report
+            outcomes[position[index]] = outcome
+            while next_report in outcomes:
+                _account(next_report)
+                next_report += 1
 
-                # 删除原始文件
-                if source_file.exists():
-                    try:
-                        source_file.unlink()
-                    except Exception as e:
-                        err = f"删除原文件失败 {source_file}: {e}"
-                        logger.warning(err)
-                        errors.append(err)
-                        failed_count += 1
-            except Exception as e:
-                err = f"替换原文件为 AVIF 时出错 {source_file}: {e}"
-                logger.error(err)
-                errors.append(err)
-                failed_count += 1
+        budget = memory_budget or DEFAULT_MEMORY_BUDGET
 
-        # 清理临时 avif_optimized 目录（若为空则删除）
         try:
-            if avif_folder.exists():
-                # 仅在目录为空时删除，避免误删其他文件
-                if not any(avif_folder.iterdir()):
-                    avif_folder.rmdir()
-        except Exception as e:
-            logger.warning(f"清理临时 AVIF 目录失败 {avif_folder}: {e}")
+            remaining = list(to_convert)
+            if remaining and use_processes:
+                # 与图片特征等计算共用应用级进程池（默认为 UI 预留一个核心）
+                workers = max(1, max_workers or default_process_workers())
+                # 进程池不小于 workers；调低并发时池中进程更多，在途任务数不能超过 workers
+                limit = (
+                    workers * _IN_FLIGHT_PER_WORKER
+                    if workers >= default_process_workers()
+                    else workers
+                )
+                pool = None
+                try:
+                    pool = get_process_pool(workers)
+                    await self._run_conversions(
+                        pool,
+                        limit,
+                        remaining,
+                        image_files,
+                        targets,
+                        profile,
+                        cancel_event,
+                        _on_result,
+                        costs,
+                        budget,
+                    )
+                except (BrokenProcessPool, OSError, RuntimeError) as e:
+                    logger.warning(f"进程池不可用，改用线程池转换: {e}")
+                    reset_process_pool(pool)
+                remaining = [
+                    to_convert[pos] for pos in range(next_report, total_count) if pos not in outcomes
+                ]
+            if remaining and not cancel_event.is_set():
+                await self._run_conversions(
+                    self._executor,
+                    _THREAD_WORKERS * _IN_FLIGHT_PER_WORKER,
+                    remaining,
+                    image_files,
+                    targets,
+                    profile,
+                    cancel_event,
+                    _on_result,
+                    costs,
+                    budget,
+                )
+            # 取消时可能留下空档，其后已完成的文件仍需计入
+            for pos in sorted(outcomes):
+                _account(pos)
+            # 第一阶段结束：日志落盘后再开始替换
+            journal.sync()
+            commit_errors = await asyncio.to_thread(
+                self._commit_all, folder_path, commit_records, journal, manifest
+            )
+            errors.extend(commit_errors)
+            failed_count += len(commit_errors)
+        finally:
+            journal.close()
 
         time_elapsed = time.time() - start_time
 
@@ -232,8 +876,153 @@ class ImageOptimizer:
             optimized_size=optimized_size,
             time_elapsed=time_elapsed,
             errors=errors,
+            cancelled=cancel_event.is_set(),
+            skipped_files=len(up_to_date) + previously_kept,
+            kept_files=kept_count,
+            files=file_results,
         )
 
+    @staticmethod
+    def _commit_all(
+        folder_path: Path,
+        records: list[dict[str, Any]],
+        journal: OptimizationJournal,
+        manifest: OptimizationManifest,
+    ) -> list[str]:
+        """第二阶段：逐条提交替换记录，全部处理完后清空日志，返回错误信息。"""
+        errors: list[str] = []
+        for record in records:
+            try:
+                _commit_output(folder_path, record, manifest)
+                if record.get("temp"):
+                    journal.append({"op": "commit", "source": record["source"]})
+            except Exception as e:
+                err = f"替换原文件时出错 {record['source']}: {e}"
+                logger.error(err)
+                errors.append(err)
+        manifest.save()
+        journal.clear()
+        return errors
+
+    def has_pending_recovery(self, folder_path: Path) -> bool:
+        """上次优化是否在替换完成前中断（日志仍在）。"""
+        return OptimizationJournal(folder_path).path.exists()
+
+    def recover_folder(self, folder_path: Path) -> int:
+        """续完上次中断的替换并清理残留的临时文件，返回续提交的文件数。
+
+        优化正在进行时直接返回 0：该任务开始时已自行恢复，此时的日志和临时
+        文件属于正在进行的任务，不能提交或删除。
+        """
+        with self._recover_lock:
+            if self._cancel_event is not None:
+                logger.info("图片优化正在进行中，跳过中断恢复")
+                return 0
+            return self._recover_folder(folder_path)
+
+    def _recover_before_run(self, folder_path: Path) -> int:
+        """优化任务开始前的恢复，与 :meth:`recover_folder` 互斥执行。"""
+        with self._recover_lock:
+            return self._recover_folder(folder_path)
+
+    def _recover_folder(self, folder_path: Path) -> int:
+        journal = OptimizationJournal(folder_path)
+        records = journal.pending()
+        recovered = 0
+        if records:
+            manifest = OptimizationManifest(folder_path)
+            for record in records:
+                try:
+                    if _commit_output(folder_path, record, manifest):
+                        recovered += 1
+                except Exception as e:
+                    logger.warning(f"恢复中断的图片替换失败 {record.get('source')}: {e}")
+            manifest.save()
+        journal.clear()
+
+        # 日志之外的临时文件是转换到一半的结果，只能丢弃
+        if folder_path.exists():
+            for orphan in folder_path.rglob(f".*{_TEMP_SUFFIX}"):
+                try:
+                    orphan.unlink()
+                except OSError as e:
+                    logger.warning(f"删除残留临时文件失败 {orphan}: {e}")
+        if recovered:
+            logger.info(f"已恢复上次中断的图片优化，续提交 {recovered} 个文件")
+        return recovered
+
+    async def _run_conversions(
+        self,
+        executor: Executor,
+        limit: int,
+        indices: list[int],
+        sources: list[Path],
+        targets: list[Path],
+        profile: OptimizationProfile,
+        cancel_event: Event,
+        on_result: Callable[[int, tuple[bool, str, int, str, int]], None],
+        costs: dict[int, int],
+        memory_budget: int,
+    ) -> None:
+        """以有限的在途任务数（``limit``）和内存预算提交转换，完成一个补一个。"""
+        loop = asyncio.get_running_loop()
+        limit = max(1, limit)
+        waiting = deque(indices)
+        pending: dict[asyncio.Future[tuple[bool, str, int, str, int]], tuple[int, Future]] = {}
+        in_flight_bytes = 0
+
+        def _take() -> int | None:
+            # 队首放不进预算时，在后面少量文件里找能先执行的；没有在途任务时总是放行
+            for offset, index in enumerate(islice(waiting, _SCHEDULE_LOOKAHEAD)):
+                if not pending or in_flight_bytes + costs.get(index, 0) <= memory_budget:
+                    del waiting[offset]
+                    return index
+            return None
+
+        def _submit() -> bool:
+            nonlocal in_flight_bytes
+            index = _take()
+            if index is None:
+                return False
+            cost = costs.get(index, 0)
+            if cost > memory_budget:
+                logger.debug(f"{sources[index].name} 预计占用 {self.format_file_size(cost)} 内存，单独转换")
+            in_flight_bytes += cost
+            job = executor.submit(_optimize_job, str(sources[index]), str(targets[index]), profile)
+            pending[asyncio.wrap_future(job, loop=loop)] = (index, job)
+            return True
+
+        try:
+            while len(pending) < limit and _submit():
+                pass
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    index, _job = pending.pop(future)
+                    in_flight_bytes -= costs.get(index, 0)
+                    if future.cancelled():
+                        continue
+                    try:
+                        outcome = future.result()
+                    except BrokenProcessPool:
+                        raise
+                    except Exception as e:
+                        error_msg = f"处理文件 {sources[index].name} 时出错: {e}"
+                        logger.error(error_msg)
+                        outcome = (False, error_msg, 0, "", 0)
+                    on_result(index, outcome)
+                if cancel_event.is_set():
+                    # 尚未开始的任务直接撤销，正在转换的任务等待其完成
+                    for _index, job in pending.values():
+                        job.cancel()
+                    continue
+                while len(pending) < limit and _submit():
+                    pass
+        finally:
+            # 共享进程池不会随本次优化关闭：提前退出时撤销尚未开始的任务
+            for _index, job in pending.values():
+                job.cancel()
+
     def format_file_size(self, size_bytes: int) -> str:
         """格式化文件大小。"""
         if size_bytes == 0:
@@ -259,3 +1048,23 @@ class ImageOptimizer:
 
 # 创建全局实例
 image_optimizer = ImageOptimizer()
+
+
+__all__ = [
+    "DEFAULT_MEMORY_BUDGET",
+    "MANIFEST_DIR",
+    "TEMP_FOLDER_NAME",
+    "FileOptimizationResult",
+    "ImageOptimizationResult",
+    "ImageOptimizer",
+    "OptimizationJournal",
+    "OptimizationManifest",
+    "OptimizationProfile",
+    "OptimizationProgress",
+    "available_formats",
+    "estimate_file_memory",
+    "estimate_peak_memory",
+    "image_optimizer",
+    "optimize_image",
+    "structural_similarity",
+]
@@ -0,0 +1,212 @@
+"""Mirror selection: race mirrors for the first response and persist per-mirror latency/failure stats."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections.abc import AsyncIterator, Sequence
+from contextlib import asynccontextmanager
+from pathlib import Path
+from threading import RLock
+from typing import Any
+from urllib.parse import urlparse
+
+import aiohttp
+from loguru import logger
+
+from app.paths import CACHE_DIR
+
+MIRROR_STATS_PATH = CACHE_DIR / "mirror_stats.json"
+
+# Assumed time-to-first-byte for mirrors without stats, so new mirrors still get tried.
+_DEFAULT_LATENCY = 1.0
+# Penalty seconds added per consecutive failure, and the cap on counted failures.
+_FAILURE_PENALTY = 3.0
+_MAX_PENALIZED_FAILURES = 5
+# Failures older than this are no longer penalized.
+_FAILURE_MEMORY_SECONDS = 24 * 3600
+_EWMA_ALPHA = 0.3
+
+
+def mirror_key(url: str) -> str:
+    """Stats are keyed by host, so different paths on one host share latency data."""
+    return urlparse(url).netloc.lower() or url
+
+
+class MirrorStatsStore:
+    """On-disk store for mirror latency and failure statistics."""
+
+    def __init__(self, path: Path = MIRROR_STATS_PATH) -> None:
+        self._path = path
+        self._lock = RLock()
+        self._stats: dict[str, dict[str, Any]] = {}
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            if self._path.exists():
+                data = json.loads(self._path.read_text(encoding="utf-8"))
+                if isinstance(data, dict):
+                    self._stats = {
+                        str(key): value
+                        for key, value in data.items()
+                        if isinstance(value, dict)
+                    }
+        except Exception as exc:
+            logger.warning("读取镜像统计失败，将重新统计: {error}", error=str(exc))
+            self._stats = {}
+
+    def save(self) -> None:
+        with self._lock:
+            payload = json.dumps(self._stats, ensure_ascii=False, indent=2)
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._path.with_suffix(".tmp")
+            tmp_path.write_text(payload, encoding="utf-8")
+            tmp_path.replace(self._path)
+        except Exception as exc:
+            logger.warning("保存镜像统计失败: {error}", error=str(exc))
+
+    def get(self, url: str) -> dict[str, Any] | None:
+        with self._lock:
+            entry = self._stats.get(mirror_key(url))
+            return dict(entry) if entry else None
+
+    def record_success(self, url: str, latency: float) -> None:
+        with self._lock:
+            entry = self._stats.setdefault(mirror_key(url), {})
+            previous = entry.get("latency")
+            if isinstance(previous, (int, float)):
+                entry["latency"] = previous * (1 - _EWMA_ALPHA) + latency * _EWMA_ALPHA
+            else:
+                entry["latency"] = latency
+            entry["successes"] = int(entry.get("successes", 0)) + 1
+            entry["consecutive_failures"] = 0
+            entry["updated_at"] = time.time()
+
+    def record_failure(self, url: str) -> None:
+        with self._lock:
+            entry = self._stats.setdefault(mirror_key(url), {})
+            entry["failures"] = int(entry.get("failures", 0)) + 1
+            entry["consecutive_failures"] = int(entry.get("consecutive_failures", 0)) + 1
+            entry["last_failure"] = time.time()
+            entry["updated_at"] = time.time()
+
+    def score(self, url: str) -> float:
+        """Lower is better: EWMA time-to-first-byte plus a penalty for recent consecutive failures."""
+        entry = self.get(url)
+        if not entry:
+            return _DEFAULT_LATENCY
+        latency = entry.get("latency")
+        score = float(latency) if isinstance(latency, (int, float)) else _DEFAULT_LATENCY
+        failures = int(entry.get("consecutive_failures", 0))
+        last_failure = entry.get("last_failure") or 0
+        if failures and time.time() - float(last_failure) < _FAILURE_MEMORY_SECONDS:
+            score += _FAILURE_PENALTY * min(failures, _MAX_PENALIZED_FAILURES)
+        return score
+
+    def rank(self, candidates: Sequence[str]) -> list[str]:
+        """Sort by score; ties keep their original (user-preferred) order."""
+        return sorted(candidates, key=self.score)
+
+
+class MirrorSelector:
+    """Race several mirrors for the first response and record the outcome.
+
+    Candidates are ordered by historical score and started in a staggered
+    fashion: when the previous request has not produced headers within
+    ``stagger`` seconds (or has failed), the next one starts. The first mirror
+    to answer with HTTP 200 wins and the remaining requests are cancelled.
+    """
+
+    def __init__(self, stats: MirrorStatsStore | None = None, stagger: float = 0.3) -> None:
+        self._stats = stats or MirrorStatsStore()
+        self._stagger = stagger
+
+    @property
+    def stats(self) -> MirrorStatsStore:
+        return self._stats
+
+    def rank(self, candidates: Sequence[str]) -> list[str]:
+        return self._stats.rank(candidates)
+
+    def report_failure(self, url: str) -> None:
+        """Record a failure that happened after the race, e.g. while reading the body."""
+        self._stats.record_failure(url)
+        self._stats.save()
+
+    @asynccontextmanager
+    async def open_fastest(
+        self,
+        session: aiohttp.ClientSession,
+        candidates: Sequence[str],
+        *,
+        headers: dict[str, str] | None = None,
+        timeout: float = 30.0,
+    ) -> AsyncIterator[tuple[str, aiohttp.ClientResponse]]:
+        """Yield ``(url, response)`` for the first mirror to return HTTP 200 headers.
+
+        The response is released when the context exits; raises
+        ``RuntimeError`` when every candidate fails.
+        """
+        ranked = self.rank(candidates)
+        errors: list[str] = []
+        started: dict[asyncio.Task, tuple[str, float]] = {}
+        pending: set[asyncio.Task] = set()
+        winner: tuple[str, aiohttp.ClientResponse] | None = None
+
+        async def _attempt(url: str) -> aiohttp.ClientResponse:
+            resp = await session.get(url, headers=headers, timeout=timeout)
+            if resp.status != 200:
+                resp.release()
+                raise RuntimeError(f"HTTP {resp.status}")
+            return resp
+
+        queue = list(ranked)
+        try:
+            while queue or pending:
+                if queue:
+                    url = queue.pop(0)
+                    task = asyncio.create_task(_attempt(url))
+                    started[task] = (url, time.perf_counter())
+                    pending.add(task)
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=self._stagger if queue else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    url, start = started[task]
+                    exc = task.exception()
+                    if exc is not None:
+                        errors.append(f"{url}: {exc}")
+                        self._stats.record_failure(url)
+                        continue
+                    resp = task.result()
+                    self._stats.record_success(url, time.perf_counter() - start)
+                    if winner is None:
+                        winner = (url, resp)
+                    else:
+                        resp.release()
+                if winner is not None:
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+            for result in await asyncio.gather(*pending, return_exceptions=True):
+                if isinstance(result, aiohttp.ClientResponse):
+                    result.release()
+            await asyncio.to_thread(self._stats.save)
+
+        if winner is None:
+            raise RuntimeError("; ".join(errors) or "没有可用的镜像")
+        url, resp = winner
+        logger.info(f"镜像竞速胜出：{url}")
+        try:
+            yield url, resp
+        finally:
+            resp.release()
+
+
+mirror_selector = MirrorSelector()
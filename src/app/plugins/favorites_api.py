@@ -2,10 +2,13 @@
 
 from __future__ import annotations
 
+import asyncio
 from collections.abc import Callable, Iterable, Sequence
 from pathlib import Path
+from typing import Any
 
 from app.favorites import (
+    BatchFavoriteClassifier,
     FavoriteAIResult,
     FavoriteClassifier,
     FavoriteFolder,
@@ -13,10 +16,16 @@ from app.favorites import (
     FavoriteManager,
     FavoriteSource,
 )
+from app.image_hash import DEFAULT_MAX_DISTANCE
 
 
 class FavoriteService:
-    """Restrictive façade over :class:`FavoriteManager` for plugins."""
+    """Restrictive façade over :class:`FavoriteManager` for plugins.
+
+    Items and folders returned here are read-only snapshots; plugins change
+    favorites through the service methods, or call ``copy()`` for a scratch
+    object.
+    """
 
     def __init__(
         self,
@@ -177,16 +186,21 @@ class FavoriteService:
     def localize_items_from_files(self, mapping: dict[str, str]) -> dict[str, Path | None]:
         self._ensure_permission("favorites_export")
         results: dict[str, Path | None] = {}
-        for item_id, source_path in mapping.items():
-            results[item_id] = self._manager.localize_item_from_file(item_id, source_path)
+        with self._manager.batch():
+            for item_id, source_path in mapping.items():
+                results[item_id] = self._manager.localize_item_from_file(item_id, source_path)
         return results
 
     def reset_localization(self, item_ids: Iterable[str]) -> None:
         self._ensure_permission("favorites_write")
-        for item_id in item_ids:
-            self._manager.reset_localization(item_id)
+        with self._manager.batch():
+            for item_id in item_ids:
+                self._manager.reset_localization(item_id)
 
-    def register_classifier(self, classifier: FavoriteClassifier | None) -> None:
+    def register_classifier(
+        self,
+        classifier: FavoriteClassifier | BatchFavoriteClassifier | None,
+    ) -> None:
         self._ensure_permission("favorites_write")
         self._manager.set_classifier(classifier)
 
@@ -194,6 +208,48 @@ class FavoriteService:
         self._ensure_permission("favorites_write")
         return await self._manager.maybe_classify_item(item_id)
 
+    def enqueue_classification(self, item_ids: Iterable[str]) -> int:
+        self._ensure_permission("favorites_write")
+        return self._manager.enqueue_classification(item_ids)
+
+    async def reclassify_all(
+        self,
+        folder_id: str | None = None,
+        *,
+        progress_callback: Callable[[int, int], None] | None = None,
+    ) -> int:
+        self._ensure_permission("favorites_write")
+        return await self._manager.reclassify_all_async(
+            folder_id,
+            progress_callback=progress_callback,
+        )
+
+    async def find_duplicates(
+        self,
+        folder_id: str | None = None,
+        *,
+        max_distance: int = DEFAULT_MAX_DISTANCE,
+        progress_callback: Callable[[int, int], None] | None = None,
+    ) -> list[list[FavoriteItem]]:
+        self._ensure_permission("favorites_read")
+        return await asyncio.to_thread(
+            self._manager.find_duplicates,
+            folder_id,
+            max_distance=max_distance,
+            progress_callback=progress_callback,
+        )
+
+    async def find_by_appearance(
+        self,
+        folder_id: str | None = None,
+        **criteria: Any,
+    ) -> list[FavoriteItem]:
+        """Compute missing colour / brightness features, then filter by ``criteria``."""
+        self._ensure_permission("favorites_read")
+        item_ids = [item.id for item in self._manager.list_items(folder_id)]
+        await asyncio.to_thread(self._manager.compute_image_features, item_ids)
+        return self._manager.find_by_appearance(folder_id, **criteria)
+
     # ------------------------------------------------------------------
     # import / export
     # ------------------------------------------------------------------
@@ -203,9 +259,15 @@ class FavoriteService:
         folder_ids: Sequence[str] | None = None,
         *,
         include_assets: bool = True,
+        progress_callback: Callable[[int, int], None] | None = None,
     ) -> Path:
         self._ensure_permission("favorites_export")
-        return self._manager.export_folders(Path(target_path), folder_ids, include_assets=include_assets)
+        return self._manager.export_folders(
+            Path(target_path),
+            folder_ids,
+            include_assets=include_assets,
+            progress_callback=progress_callback,
+        )
 
     def export_items(
         self,
@@ -213,13 +275,27 @@ class FavoriteService:
         item_ids: Sequence[str],
         *,
         include_assets: bool = True,
+        progress_callback: Callable[[int, int], None] | None = None,
     ) -> Path:
         self._ensure_permission("favorites_export")
-        return self._manager.export_items(Path(target_path), item_ids, include_assets=include_assets)
+        return self._manager.export_items(
+            Path(target_path),
+            item_ids,
+            include_assets=include_assets,
+            progress_callback=progress_callback,
+        )
 
-    def import_package(self, source_path: str | Path) -> tuple[int, int]:
+    def import_package(
+        self,
+        source_path: str | Path,
+        *,
+        progress_callback: Callable[[int, int], None] | None = None,
+    ) -> tuple[int, int]:
         self._ensure_permission("favorites_export")
-        return self._manager.import_folders(Path(source_path))
+        return self._manager.import_folders(
+            Path(source_path),
+            progress_callback=progress_callback,
+        )
 
     # ------------------------------------------------------------------
     # utility
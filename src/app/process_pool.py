@@ -0,0 +1,85 @@
+"""共享进程池 - CPU 密集的图片计算放到子进程执行，避免占用 UI 所在进程的 GIL。
+
+进程池按需创建并在退出时关闭，默认为 UI 保留一个核心、其余核心都用于
+工作进程；需要更多并发的调用方可以请求更大的进程池。子进程统一使用
+``spawn`` 启动方式，各平台行为一致，也不会继承父进程中持有的锁。
+"""
+
+from __future__ import annotations
+
+import atexit
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+
+from loguru import logger
+
+_lock = Lock()
+_pool: ProcessPoolExecutor | None = None
+_pool_workers = 0
+
+
+def default_process_workers() -> int:
+    """保留一个核心给 UI，其余核心都用于工作进程。"""
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+def get_process_pool(min_workers: int | None = None) -> ProcessPoolExecutor:
+    """返回共享进程池，工作进程数不少于 :func:`default_process_workers`。
+
+    ``min_workers`` 超过当前进程数时换用更大的进程池；旧池不再接收新任务，
+    已提交的任务照常完成后自行退出。
+    """
+    global _pool, _pool_workers
+    workers = max(default_process_workers(), min_workers or 0)
+    retired: ProcessPoolExecutor | None = None
+    with _lock:
+        if _pool is not None and workers > _pool_workers:
+            retired, _pool = _pool, None
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            _pool_workers = workers
+            logger.debug("已创建后台进程池，工作进程数 {count}", count=workers)
+        pool = _pool
+    if retired is not None:
+        retired.shutdown(wait=False)
+    return pool
+
+
+def reset_process_pool(pool: ProcessPoolExecutor | None = None) -> None:
+    """丢弃（例如已损坏的）进程池，下次调用 :func:`get_process_pool` 时重建。
+
+    传入 ``pool`` 时只在它仍是当前进程池时丢弃，已被换掉的旧池不影响新池。
+    """
+    global _pool, _pool_workers
+    with _lock:
+        if pool is not None and pool is not _pool:
+            return
+        pool, _pool = _pool, None
+        _pool_workers = 0
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_process_pool() -> None:
+    global _pool, _pool_workers
+    with _lock:
+        pool, _pool = _pool, None
+        _pool_workers = 0
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+atexit.register(shutdown_process_pool)
+
+
+__all__ = [
+    "default_process_workers",
+    "get_process_pool",
+    "reset_process_pool",
+    "shutdown_process_pool",
+]
@@ -0,0 +1,183 @@
+"""Prebuilt in-memory search index for source and category pickers."""
+
+from __future__ import annotations
+
+import unicodedata
+from bisect import bisect_right
+from collections.abc import Hashable, Iterable
+from functools import lru_cache
+from typing import Generic, TypeVar
+
+try:
+    from pypinyin import Style, lazy_pinyin
+except ImportError:
+    lazy_pinyin = None
+    Style = None
+
+K = TypeVar("K", bound=Hashable)
+
+_GRAM_SIZE = 3
+_FIELD_SEPARATOR = "\n"
+
+# GB2312 一级汉字按拼音排序，可通过区位码边界推断声母（无 pypinyin 时的兜底）。
+_GB2312_INITIAL_BOUNDS = (
+    (0xB0A1, "a"),
+    (0xB0C5, "b"),
+    (0xB2C1, "c"),
+    (0xB4EE, "d"),
+    (0xB6EA, "e"),
+    (0xB7A2, "f"),
+    (0xB8C1, "g"),
+    (0xB9FE, "h"),
+    (0xBBF7, "j"),
+    (0xBFA6, "k"),
+    (0xC0AC, "l"),
+    (0xC2E8, "m"),
+    (0xC4C3, "n"),
+    (0xC5B6, "o"),
+    (0xC5BE, "p"),
+    (0xC6DA, "q"),
+    (0xC8BB, "r"),
+    (0xC8F6, "s"),
+    (0xCBFA, "t"),
+    (0xCDDA, "w"),
+    (0xCEF4, "x"),
+    (0xD1B9, "y"),
+    (0xD4D1, "z"),
+)
+_GB2312_CODES = tuple(code for code, _ in _GB2312_INITIAL_BOUNDS)
+_GB2312_LEVEL1_END = 0xD7F9
+
+
+def normalize_text(value: str) -> str:
+    """Fold width/compatibility forms and case for matching."""
+    return unicodedata.normalize("NFKC", value).casefold()
+
+
+def _is_cjk(char: str) -> bool:
+    return "一" <= char <= "鿿"
+
+
+@lru_cache(maxsize=8192)
+def _char_initial(char: str) -> str:
+    if lazy_pinyin is not None:
+        try:
+            initials = lazy_pinyin(char, style=Style.FIRST_LETTER)
+        except Exception:
+            initials = []
+        if initials and initials[0] and initials[0] != char:
+            return initials[0][0].lower()
+    try:
+        encoded = char.encode("gb2312")
+    except UnicodeEncodeError:
+        return ""
+    if len(encoded) != 2:
+        return ""
+    code = (encoded[0] << 8) | encoded[1]
+    if code < _GB2312_CODES[0] or code > _GB2312_LEVEL1_END:
+        return ""
+    return _GB2312_INITIAL_BOUNDS[bisect_right(_GB2312_CODES, code) - 1][1]
+
+
+def pinyin_initials(text: str) -> str:
+    """Return pinyin initials for Chinese text, e.g. ``必应壁纸`` -> ``bybz``.
+
+    Letters and digits are kept as-is so mixed names such as ``4K壁纸`` give
+    ``4kbz``; other characters are dropped. Returns an empty string when the
+    text contains no Chinese characters.
+    """
+    if not any(_is_cjk(char) for char in text):
+        return ""
+    parts: list[str] = []
+    for char in normalize_text(text):
+        if _is_cjk(char):
+            parts.append(_char_initial(char))
+        elif char.isalnum():
+            parts.append(char)
+    return "".join(parts)
+
+
+class SearchIndex(Generic[K]):
+    """Substring search over a fixed set of documents.
+
+    Each document is stored once as a normalized text blob (all fields plus
+    pinyin initials of Chinese fields). A trigram inverted index narrows the
+    candidates for longer query tokens, which are then verified with a plain
+    substring check; shorter tokens scan the prebuilt blobs directly. Results
+    keep the insertion order of the documents.
+    """
+
+    __slots__ = ("_grams", "_keys", "_texts")
+
+    def __init__(self, documents: Iterable[tuple[K, Iterable[str | None]]]) -> None:
+        self._keys: list[K] = []
+        self._texts: list[str] = []
+        self._grams: dict[str, set[int]] = {}
+        for key, fields in documents:
+            self._add(key, fields)
+
+    def _add(self, key: K, fields: Iterable[str | None]) -> None:
+        parts: list[str] = []
+        for raw in fields:
+            if not raw:
+                continue
+            text = str(raw)
+            parts.append(normalize_text(text))
+            initials = pinyin_initials(text)
+            if initials:
+                parts.append(initials)
+        blob = _FIELD_SEPARATOR.join(parts)
+        doc_id = len(self._keys)
+        self._keys.append(key)
+        self._texts.append(blob)
+        for part in parts:
+            for start in range(len(part) - _GRAM_SIZE + 1):
+                self._grams.setdefault(part[start : start + _GRAM_SIZE], set()).add(
+                    doc_id,
+                )
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _candidates(self, token: str) -> set[int] | None:
+        if len(token) < _GRAM_SIZE:
+            return None
+        postings: list[set[int]] = []
+        for start in range(len(token) - _GRAM_SIZE + 1):
+            posting = self._grams.get(token[start : start + _GRAM_SIZE])
+            if not posting:
+                return set()
+            postings.append(posting)
+        postings.sort(key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result &= posting
+            if not result:
+                break
+        return result
+
+    def search(self, query: str) -> list[K]:
+        """Return keys of documents containing every whitespace-separated token."""
+        tokens = normalize_text(query).split()
+        if not tokens:
+            return list(self._keys)
+        candidates: set[int] | None = None
+        for token in sorted(tokens, key=len, reverse=True):
+            narrowed = self._candidates(token)
+            if narrowed is not None:
+                candidates = narrowed if candidates is None else candidates & narrowed
+            if candidates is not None and not candidates:
+                return []
+        doc_ids = sorted(candidates) if candidates is not None else range(len(self._keys))
+        texts = self._texts
+        return [
+            self._keys[doc_id]
+            for doc_id in doc_ids
+            if all(token in texts[doc_id] for token in tokens)
+        ]
+
+    def search_set(self, query: str) -> set[K]:
+        return set(self.search(query))
+
+
+__all__ = ["SearchIndex", "normalize_text", "pinyin_initials"]
@@ -22,6 +22,7 @@ import ltwapi
 from ltws import URLTemplateEngine
 
 from .paths import BASE_DIR, CACHE_DIR, CONFIG_DIR, DATA_DIR
+from .search_index import SearchIndex
 from .source_parser import (
     API,
     Category,
@@ -213,6 +214,8 @@ class WallpaperSourceManager:
         self._state_path = CONFIG_DIR / "wallpaper_sources.json"
         self._records: dict[str, WallpaperSourceRecord] = {}
         self._state: dict[str, Any] = {}
+        self._category_refs_cache: dict[str, list[WallpaperCategoryRef]] = {}
+        self._category_search_index: SearchIndex[str] | None = None
         _ensure_dir(self._user_dir)
         _ensure_dir(self._cache_dir)
         self.reload()
@@ -314,6 +317,7 @@ class WallpaperSourceManager:
         active = self._state.get("active_source")
         if not active or active not in records or not records[active].enabled:
             self._state["active_source"] = self.first_enabled_identifier()
+        self._invalidate_category_cache()
         self._save_state()
 
     def list_records(self, *, include_disabled: bool = True) -> list[WallpaperSourceRecord]:
@@ -337,6 +341,7 @@ class WallpaperSourceManager:
         if record is None:
             raise WallpaperSourceError(f"source '{identifier}' not found")
         record.enabled = enabled
+        self._invalidate_category_cache()
         self._state.setdefault("enabled", {})[identifier] = enabled
         if enabled and identifier not in self._state.get("order", []):
             self._state.setdefault("order", []).append(identifier)
@@ -420,7 +425,32 @@ class WallpaperSourceManager:
     # ------------------------------------------------------------------
     # category helpers
     # ------------------------------------------------------------------
+    def _invalidate_category_cache(self) -> None:
+        self._category_refs_cache.clear()
+        self._category_search_index = None
+
     def category_refs(self, identifier: str) -> list[WallpaperCategoryRef]:
+        cached = self._category_refs_cache.get(identifier)
+        if cached is None:
+            cached = self._build_category_refs(identifier)
+            self._category_refs_cache[identifier] = cached
+        return list(cached)
+
+    def search_category_ids(self, term: str) -> set[str]:
+        """Return ids of enabled categories matching ``term``.
+
+        The index is built once from the categories' search tokens and reused
+        until sources are reloaded or toggled.
+        """
+        if self._category_search_index is None:
+            self._category_search_index = SearchIndex(
+                (ref.category_id, ref.search_tokens)
+                for record in self.enabled_records()
+                for ref in self.category_refs(record.identifier)
+            )
+        return self._category_search_index.search_set(term)
+
+    def _build_category_refs(self, identifier: str) -> list[WallpaperCategoryRef]:
         record = self._records.get(identifier)
         if record is None:
             return []
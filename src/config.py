@@ -35,7 +35,10 @@ DEFAULT_CONFIG = {
         "log_directory": "./log",
         "download_directory": "",
         "favorites_directory": "",
+        "favorites_backend": "sqlite",
         "clear_cache_after_360_source": True,
+        # 图片优化时同时解码的图片估算内存上限（MB）
+        "optimize_memory_budget_mb": 1024,
     },
     "wallpaper": {
         "auto_change": {
@@ -53,6 +56,7 @@ DEFAULT_CONFIG = {
                 "unit": "minutes",
                 "items": [],
             },
+            "dedup": {"enabled": True, "max_distance": 6},
         },
         "allow_NSFW": False,
         "sources": {
@@ -9,8 +9,11 @@ import subprocess
 import sys
 import time
 import uuid
-from collections.abc import Callable
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
 from pathlib import Path
+from threading import Lock
 
 # NOTE: download_file moved from pycurl to requests streaming
 from urllib.parse import parse_qs, unquote, urlparse
@@ -19,6 +22,7 @@ import aiohttp
 import platformdirs
 import requests
 from loguru import logger
+from requests.adapters import HTTPAdapter
 
 try:
     import magic
@@ -556,7 +560,15 @@ def download_file(
     headers: dict[str, str] | None = None,
     progress_callback: Callable[[int, int], None] | None = None,
     resume: bool = False,
+    session: requests.Session | None = None,
+    reserve_filename: Callable[[str], str] | None = None,
 ) -> str | None:
+    """下载单个文件并返回保存路径，失败返回 None。
+
+    传入 ``session`` 时复用调用方的连接池（不会关闭该会话），
+    否则为本次下载创建独立会话。``reserve_filename`` 在推断出文件名后调用，
+    返回实际使用的文件名（批量下载用它避免同名文件互相覆盖）。
+    """
     logger.debug(f"开始下载：{url}")
 
     # 构造请求头（字典形式，便于 requests 直接使用）
@@ -575,10 +587,14 @@ def download_file(
 
 
     # 使用 requests 会话以复用连接、限制重定向次数
-    with requests.Session() as session:
+    owns_session = session is None
+    if owns_session:
+        session = requests.Session()
         session.headers.update(req_headers_dict)
         session.max_redirects = 5  # 与原逻辑保持一致
 
+    with session if owns_session else nullcontext(session):
+
         for attempt in range(1, max_retries + 1):
             start_offset = 0
             tmp_path = save_dir / f"{uuid.uuid4().hex}.tmp"
@@ -756,7 +772,12 @@ def download_file(
                 elif ext and not filename.lower().endswith(ext.lower()):
                     filename = f"{Path(filename).stem}{ext}"
 
-                target = save_path if save_path.is_file() else save_dir / filename
+                if save_path.is_file():
+                    target = save_path
+                else:
+                    if reserve_filename is not None:
+                        filename = reserve_filename(filename)
+                    target = save_dir / filename
                 shutil.move(str(tmp_path), str(target))
                 logger.success("下载完成：{}", target)
                 return str(target)
@@ -776,6 +797,105 @@ def download_file(
                     pass
 
 
+def build_pooled_session(pool_size: int) -> requests.Session:
+    """创建连接池大小为 ``pool_size`` 的会话，供多线程批量下载共享。"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.max_redirects = 5
+    return session
+
+
+class _FilenameReservations:
+    """同一批下载内的文件名登记：重名时依次改用 ``name-1.ext``、``name-2.ext``…（不区分大小写）。"""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._taken: set[str] = set()
+
+    def reserve(self, filename: str) -> str:
+        stem, suffix = Path(filename).stem, Path(filename).suffix
+        with self._lock:
+            candidate = filename
+            counter = 1
+            while candidate.lower() in self._taken:
+                candidate = f"{stem}-{counter}{suffix}"
+                counter += 1
+            self._taken.add(candidate.lower())
+            return candidate
+
+
+def download_files(
+    urls: Sequence[str],
+    save_path: str = "./temp",
+    custom_filenames: Sequence[str | None] | None = None,
+    timeout: int = 300,
+    max_retries: int = 3,
+    headers: dict[str, str] | None = None,
+    max_workers: int = 4,
+    progress_callback: Callable[[int, int], None] | None = None,
+) -> list[str | None]:
+    """并发下载多个文件，所有任务共享同一个带连接池的会话。
+
+    返回值与 ``urls`` 一一对应，下载失败的位置为 None。
+    ``progress_callback(done, total)`` 在每个文件结束（成功或失败）后调用。
+    同一批次中的文件不会互相覆盖：带扩展名的自定义文件名在提交任务前按顺序登记，
+    其余文件名要等响应头到达后才能确定，在移动到目标位置时登记。
+    """
+    url_list = [str(url) for url in urls]
+    if not url_list:
+        return []
+    names: list[str | None] = list(custom_filenames or [])
+    names.extend([None] * (len(url_list) - len(names)))
+    reservations = _FilenameReservations()
+    reserve_later: list[Callable[[str], str] | None] = []
+    for index, name in enumerate(names):
+        if name and "." in name:
+            names[index] = reservations.reserve(name)
+            reserve_later.append(None)
+        else:
+            reserve_later.append(reservations.reserve)
+    workers = max(1, min(max_workers, len(url_list)))
+    results: list[str | None] = [None] * len(url_list)
+    done = 0
+
+    with build_pooled_session(workers) as session, ThreadPoolExecutor(
+        max_workers=workers,
+        thread_name_prefix="ltw-download",
+    ) as executor:
+        futures = {
+            executor.submit(
+                download_file,
+                url,
+                save_path,
+                names[index],
+                timeout,
+                max_retries,
+                headers,
+                None,
+                False,
+                session,
+                reserve_later[index],
+            ): index
+            for index, url in enumerate(url_list)
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                results[index] = future.result()
+            except Exception as exc:
+                logger.error("批量下载失败：{} ({})", url_list[index], exc)
+                results[index] = None
+            done += 1
+            if progress_callback:
+                progress_callback(done, len(url_list))
+    return results
+
+
 if __name__ == "__main__":
     print(get_sys_wallpaper())
 
@@ -78,20 +78,27 @@ Module Description:
 """
 from __future__ import annotations
 
+import multiprocessing
 import sys
 import traceback
+from typing import TYPE_CHECKING
 
-import flet as ft
-
-from app import Application
-from app.ipc import IPCAlreadyRunningError
-from app.paths import HITO_FONT_PATH, UI_FONT_PATH
+if TYPE_CHECKING:
+    import flet as ft
 
 _START_HIDDEN = any(arg.lower() in {"/hide", "--hide"} for arg in sys.argv[1:])
 
 
 def main(page: ft.Page) -> None:
     """Delegate to the modular :class:`Application`."""
+    # 界面依赖在此处导入：后台进程池以 spawn 启动的子进程会以 __mp_main__
+    # 身份重新执行本模块的顶层代码，不应在每个工作进程里加载 flet 和整个应用
+    import flet as ft
+
+    from app import Application
+    from app.ipc import IPCAlreadyRunningError
+    from app.paths import HITO_FONT_PATH, UI_FONT_PATH
+
     try:
         app = Application(start_hidden=_START_HIDDEN)
     except IPCAlreadyRunningError:
@@ -156,9 +163,20 @@ def main(page: ft.Page) -> None:
     app(page)
 
 
+def _run() -> None:
+    import flet as ft
+
+    from app import setup_logging
+
+    setup_logging()
+    ft.app(target=main)
+
+
 if __name__ == "__main__":
+    # 打包后的程序需要它才能正确启动后台进程池的子进程
+    multiprocessing.freeze_support()
     try:
-        ft.app(target=main)
+        _run()
     except Exception as e:
         # 获取完整的异常信息包括堆栈跟踪
         error_message = f"发生错误: {e!s}\n\n详细信息:\n{traceback.format_exc()}"